@@ -192,6 +192,16 @@ def get_flight_stats(db: Session = Depends(get_db)):
     }
 
 
+@router.post("/airports/reload")
+def reload_airports():
+    """Reload the in-memory airport registry (after editing the airports table outside the API)"""
+    from app.db.base import engine
+    from app.utils.location_utils import airports
+
+    airports.load(engine)
+    return airports.stats()
+
+
 @router.delete("/flights/{flight_id}")
 def delete_flight(
     flight_id: int, 
@@ -1,5 +1,5 @@
 # app/api/v1/bookings.py
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import json
@@ -19,6 +19,7 @@ from app.schemas.booking import (
 from app.services.booking_service import reserve_seats, confirm_reservation, cancel_booking
 from app.services.email_service import send_booking_email
 from app.db.models import Booking, Flight
+from app.utils.pagination import keyset_paginate, NEXT_CURSOR_HEADER
 
 # --- IST timestamp helper ---
 from datetime import datetime, timezone, timedelta
@@ -195,16 +196,19 @@ def lookup_booking(pnr: str, db: Session = Depends(get_db)):
 
 @router.get("/list", response_model=List[BookingOut])
 def list_bookings(
+    response: Response,
     flight_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
     pnrs: Optional[str] = Query(None, description="Comma-separated list of PNRs to filter by"),
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page"),
     db: Session = Depends(get_db)
 ):
     """
-    List bookings with optional filters.
+    List bookings with optional filters (newest first).
     If 'pnrs' is provided, only returns bookings matching those PNRs.
+    Pass the X-Next-Cursor response header back as 'cursor' for the next page.
     """
     q = db.query(Booking)
     
@@ -218,9 +222,17 @@ def list_bookings(
     if status:
         q = q.filter(Booking.status == status)
         
-    q = q.order_by(Booking.id.desc()).limit(limit).offset(offset)
+    try:
+        rows, next_cursor = keyset_paginate(
+            q, key="id", id_column=Booking.id, descending=True, limit=limit, cursor=cursor, offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
     results: List[BookingOut] = []
-    for b in q:
+    for b in rows:
         # parse payment_meta safely
         try:
             pm = json.loads(b.payment_meta) if isinstance(b.payment_meta, str) and b.payment_meta.strip() else None
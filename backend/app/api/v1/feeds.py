@@ -1,12 +1,16 @@
 # app/api/v1/feeds.py
-from fastapi import APIRouter, Query, Depends
-from typing import List
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional
 from sqlalchemy.orm import Session
+import json
 import random
 from datetime import datetime, timedelta
 from app.db.base import SessionLocal
 from app.db.models import Flight
 from app.schemas.flight import FlightOut
+from app.utils.websocket_manager import manager, sse_event, parse_event_id, SSE_RETRY_MS
 
 router = APIRouter(prefix="/api/v1")
 
@@ -81,3 +85,66 @@ def simulate_feed(count: int = Query(3, ge=1, le=1000), insert: bool = Query(Fal
 
     # if not inserted, return generated objects with id=None
     return generated
+
+
+# ----------------------------
+# Server-Sent Events price feed
+# ----------------------------
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",      # nginx: don't buffer the stream
+    "Connection": "keep-alive",
+}
+
+
+def _resume_event(client, last_event_id: Optional[str]) -> str:
+    """`resync` event for a reconnecting client (same modes as the WebSocket resume)."""
+    parsed = parse_event_id(last_event_id)
+    missed = manager.missed_updates(client, parsed[1], parsed[0]) if parsed else None
+    mode, updates = missed if missed is not None else ("full", [])
+    data = json.dumps({"type": "resync", "mode": mode, "seq": manager.seq, "stream": manager.stream, "updates": updates})
+    return f"retry: {SSE_RETRY_MS}\n" + sse_event(data, "resync", f"{manager.stream}:{manager.seq}")
+
+
+@router.get("/feeds/stream")
+async def feed_stream(
+    request: Request,
+    topics: Optional[List[str]] = Query(None, description="Topics, repeated or comma-separated (default: all)"),
+    last_event_id: Optional[str] = Query(None, description="Resume point for clients that can't send the Last-Event-ID header"),
+):
+    """
+    One-way live price feed (text/event-stream) from the same source and
+    topics as /ws/feeds:
+        GET /api/v1/feeds/stream?topics=route:HYD:BLR,flight:123
+
+    Events: `connection_established`, `flight_updates` (id "<stream>:<seq>")
+    and, when resuming with Last-Event-ID, one `resync` event (replay |
+    snapshot | full). Idle streams get a ": ping" comment every 15s.
+    """
+    requested = [t for raw in (topics or []) for t in raw.split(",") if t.strip()]
+    client, invalid = manager.attach_stream(requested)
+    if invalid:
+        manager.detach_stream(client)
+        raise HTTPException(status_code=400, detail=f"Invalid topics: {invalid}")
+
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    first = _resume_event(client, resume_from) if resume_from else manager.stream_hello(client)
+
+    async def events():
+        try:
+            yield first
+            while True:
+                event = await manager.next_event(client)
+                if event is None:
+                    break
+                yield event
+        finally:
+            manager.detach_stream(client)
+
+    # detach again after the response in case it ended before the generator started
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(manager.detach_stream, client),
+    )
@@ -1,5 +1,5 @@
 # app/api/v1/flights.py
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
@@ -11,17 +11,17 @@ from app.schemas.flight import (
     FlightOutWithDynamic,
 )
 from app.db import models
-from sqlalchemy import func, text
-from sqlalchemy.exc import SQLAlchemyError
-from zoneinfo import ZoneInfo
-from datetime import datetime, timezone
 
-from app.services.pricing import calculate_price
+from app.services.pricing import cached_prices_for_flights
+from app.services.search_log_writer import search_log_writer
+from app.services.popular_routes import popular_routes
 
 # human-friendly normalizers
 from app.utils.date_utils import normalize_date
 from app.utils.time_utils import normalize_time
-from app.utils.location_utils import normalize_city
+from app.utils.location_utils import normalize_city, airports
+from app.utils.epoch_utils import now_ts
+from app.utils.pagination import keyset_paginate, NEXT_CURSOR_HEADER
 
 # price utils (cooldown + human time)
 from app.utils.price_utils import (
@@ -33,7 +33,7 @@ from app.utils.price_utils import (
 
 # services
 from app.services.flight_service import (
-    list_flights,
+    list_flights_page,
     get_flight,
     create_flight,
     update_flight,
@@ -47,82 +47,36 @@ router = APIRouter(prefix="/api/v1", tags=["flights"])
 # -----------------------
 # Helpers (DB-light, safe)
 # -----------------------
-def airport_exists(db: Session, value: str) -> bool:
-    """Return True if a city or code exists in airports table."""
-    if not value:
-        return False
-    v = value.lower()
-    row = db.execute(
-        text(
-            """
-            SELECT 1
-            FROM airports
-            WHERE lower(city) = :v OR lower(code) = :v
-            LIMIT 1
-            """
-        ),
-        {"v": v},
-    ).fetchone()
-    return row is not None
-
-
-def get_airport_code(db: Session, value: str) -> Optional[str]:
+def airport_exists(value: str) -> bool:
+    """Return True if a city, code or alias is a known airport (in-memory registry)."""
+    return airports.exists(value)
+
+
+def resolve_location_code(value: Optional[str]) -> Optional[str]:
     """
-    Return airport code for a given city name or code.
-    Example: 'Hyderabad' or 'hyd' -> 'HYD'
+    Canonical code matching flights.origin_code / destination_code.
+    Example: 'Bangalore', 'blr' or 'Bengaluru' -> 'BLR'
     """
-    if not value:
-        return None
-    v = value.lower()
-    row = db.execute(
-        text(
-            """
-            SELECT code
-            FROM airports
-            WHERE lower(city) = :v OR lower(code) = :v
-            LIMIT 1
-            """
-        ),
-        {"v": v},
-    ).fetchone()
-    return row[0] if row else None
-
-
-def log_search(db: Session, origin_code: Optional[str], destination_code: Optional[str], search_date: Optional[str]):
+    return airports.location_code(value)
+
+
+def log_search(origin_code: Optional[str], destination_code: Optional[str], search_date: Optional[str]):
     """
-    Insert a row into search_logs with searched_at in Asia/Kolkata formatted as:
-    'Saturday 30 November 2025'. Non-blocking: errors are logged but won't raise.
+    Queue a search_logs row (searched_at in Asia/Kolkata, e.g. 'Saturday 30 November 2025').
+    Non-blocking: the background writer batches the INSERTs; rows are dropped (and counted) when overloaded.
     """
-    try:
-        ist_ts = datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%A %d %B %Y")
-        db.execute(
-            text(
-                """
-                INSERT INTO search_logs (origin_code, destination_code, search_date, searched_at)
-                VALUES (:o, :d, :dt, :ts)
-                """
-            ),
-            {"o": origin_code, "d": destination_code, "dt": search_date, "ts": ist_ts},
-        )
-        db.commit()
-        return True
-    except SQLAlchemyError as e:
-        print("[LOG_SEARCH] write failed:", repr(e))
-        return False
-    except Exception as e:
-        print("[LOG_SEARCH] unexpected error:", repr(e))
-        return False
+    return search_log_writer.log(origin_code, destination_code, search_date)
 
 
 # ------------------------
 # Flight existence helper (searches flights table)
 # ------------------------
-def _exists_in_db(db: Session, *, origin: Optional[str] = None, destination: Optional[str] = None) -> bool:
+def _exists_in_db(db: Session, *, origin_code: Optional[str] = None, destination_code: Optional[str] = None) -> bool:
     q = db.query(models.Flight)
-    if origin:
-        q = q.filter(func.lower(models.Flight.origin) == origin.lower())
-    if destination:
-        q = q.filter(func.lower(models.Flight.destination) == destination.lower())
+    if origin_code:
+        q = q.filter(models.Flight.origin_code == origin_code)
+    if destination_code:
+        q = q.filter(models.Flight.destination_code == destination_code)
     return db.query(q.exists()).scalar()
 
 
@@ -150,6 +104,107 @@ def _human_field(v):
         return str(v)
 
 
+_SORT_COLUMNS = {
+    "price": models.Flight.price_real,
+    "duration": models.Flight.duration_min,
+}
+
+
+def _sorted_page(q, sort_by: Optional[str], order: str, limit: int, offset: int, cursor: Optional[str], response: Response):
+    """
+    Order by the requested sort (id as tiebreak; id-only ignores `order` as before)
+    and fetch one page. Sets X-Next-Cursor when more rows follow.
+    """
+    column = _SORT_COLUMNS.get(sort_by)
+    try:
+        flights, next_cursor = keyset_paginate(
+            q,
+            key=sort_by or "id",
+            column=column,
+            id_column=models.Flight.id,
+            descending=column is not None and order == "desc",
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return flights
+
+
+def _dynamic_results(db: Session, flights) -> List[dict]:
+    """
+    Build FlightOutWithDynamic dicts for a page of flights.
+    Demand scores are loaded in one query and the page is priced through the price cache.
+    """
+    flight_ids = [f.id for f in flights if getattr(f, "id", None) is not None]
+    demand_map = {}
+    if flight_ids:
+        ds_rows = db.query(models.DemandScore).filter(models.DemandScore.flight_id.in_(flight_ids)).all()
+        demand_map = {ds.flight_id: ds.score for ds in ds_rows}
+
+    demand_scores = [float(demand_map.get(f.id, 0.0)) for f in flights]
+    priced = cached_prices_for_flights(flights, demand_scores)
+
+    results = []
+    for f, demand_score, (new_price_raw, breakdown) in zip(flights, demand_scores, priced):
+        try:
+            new_price = float(new_price_raw) if new_price_raw is not None else None
+        except Exception:
+            new_price = None
+
+        base_price = float(getattr(f, "base_price", None) or getattr(f, "price_real", 0.0) or 0.0)
+        price_increase_percent = None
+        if base_price and new_price is not None:
+            try:
+                price_increase_percent = round((new_price - base_price) / base_price * 100, 1)
+            except Exception:
+                price_increase_percent = None
+
+        # Determine whether to show computed dynamic price or the published (stable) price_real
+        computed_price = round(new_price, 2) if new_price is not None else None
+
+        # If cooldown active, show published price_real instead of computed price
+        last_updated_ts = getattr(f, "last_price_updated_ts", None)
+        if not should_update_price(last_updated_ts, DEFAULT_MIN_UPDATE_SECONDS):
+            dynamic_price = float(f.price_real)
+            price_breakdown_out = None
+            price_cached_seconds_left = max(0, DEFAULT_MIN_UPDATE_SECONDS - int(seconds_since_iso(last_updated_ts)))
+        else:
+            dynamic_price = computed_price
+            price_breakdown_out = breakdown if isinstance(breakdown, dict) else None
+            price_cached_seconds_left = 0
+
+        results.append({
+            "id": int(f.id) if f.id is not None else None,
+            "flight_number": str(f.flight_number),
+            "airline": str(f.airline),
+            "origin": str(f.origin),
+            "destination": str(f.destination),
+            # Return actual ISO format for frontend date parsing
+            "departure_iso": str(getattr(f, "departure_iso", "")),
+            "arrival_iso": str(getattr(f, "arrival_iso", "")),
+            "duration_min": int(f.duration_min),
+            "price_real": float(f.price_real),
+            "base_price": base_price,
+            "dynamic_price": dynamic_price,
+            "price_increase_percent": price_increase_percent,
+            "seats_total": int(f.seats_total),
+            "seats_available": int(f.seats_available),
+            "flight_date": str(f.flight_date),
+            "demand_score": float(demand_score),
+            "price_breakdown": price_breakdown_out,
+            # only the human-friendly timestamp (no raw ISO)
+            "last_price_updated": _human_time_safe(getattr(f, "last_price_updated", None)),
+            # optional helper so front-end can show countdown (0 if live)
+            "price_cached_seconds_left": int(price_cached_seconds_left),
+        })
+
+    return results
+
+
 # ============================================
 # Lookup Flight (ID or Flight Number)
 # Returns human-friendly times
@@ -192,11 +247,19 @@ def api_lookup_flight(key: str, db: Session = Depends(get_db)):
 # ============================================
 @router.get("/flights", response_model=List[FlightOut])
 def api_list_flights(
+    response: Response,
     limit: int = Query(50, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page"),
     db: Session = Depends(get_db),
 ):
-    return list_flights(db, limit=limit, offset=offset)
+    try:
+        flights, next_cursor = list_flights_page(db, limit=limit, offset=offset, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return flights
 
 
 # ============================================
@@ -204,6 +267,7 @@ def api_list_flights(
 # ============================================
 @router.get("/flights/search", response_model=List[FlightOutWithDynamic])
 def api_search_flights(
+    response: Response,
     origin: Optional[str] = Query(None, min_length=1),
     destination: Optional[str] = Query(None, min_length=1),
     date: Optional[str] = Query(None),
@@ -213,6 +277,7 @@ def api_search_flights(
     order: str = Query("asc", regex="^(asc|desc)$"),
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page"),
     db: Session = Depends(get_db),
 ):
     # Normalize user input
@@ -226,34 +291,34 @@ def api_search_flights(
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
+    # Resolve to canonical airport codes (used for filtering and logging)
+    origin_code = resolve_location_code(origin) if origin else None
+    destination_code = resolve_location_code(destination) if destination else None
+
     # Same-city validation
-    if origin and destination and origin.lower() == destination.lower():
+    if origin and destination and (origin.lower() == destination.lower() or origin_code == destination_code):
         raise HTTPException(status_code=400, detail="Origin and destination cannot be the same.")
 
-    # Prefer airport validation (more accurate). Fallback to flights table if airports not present.
+    # Prefer airport validation (in-memory registry). Fallback to flights table for cities without an airport row.
     if origin:
-        if airport_exists(db, origin) is False and _exists_in_db(db, origin=origin) is False:
+        if airport_exists(origin) is False and _exists_in_db(db, origin_code=origin_code) is False:
             raise HTTPException(status_code=422, detail=f"Unknown origin '{origin}'. Try Hyderabad, Bengaluru, etc.")
     if destination:
-        if airport_exists(db, destination) is False and _exists_in_db(db, destination=destination) is False:
+        if airport_exists(destination) is False and _exists_in_db(db, destination_code=destination_code) is False:
             raise HTTPException(status_code=422, detail=f"Unknown destination '{destination}'. Try Hyderabad, Bengaluru, etc.")
 
-    # Resolve to airport codes for logging (best-effort)
-    origin_code = get_airport_code(db, origin) if origin else None
-    destination_code = get_airport_code(db, destination) if destination else None
-
     # Log the search (non-blocking)
     try:
-        log_search(db, origin_code, destination_code, date)
+        log_search(origin_code, destination_code, date)
     except Exception:
         pass
 
-    # Build base query using SQLAlchemy models
+    # Build base query using SQLAlchemy models (served by idx_flights_route_date)
     q = db.query(models.Flight)
-    if origin:
-        q = q.filter(func.lower(models.Flight.origin) == origin.lower())
-    if destination:
-        q = q.filter(func.lower(models.Flight.destination) == destination.lower())
+    if origin_code:
+        q = q.filter(models.Flight.origin_code == origin_code)
+    if destination_code:
+        q = q.filter(models.Flight.destination_code == destination_code)
     if date:
         q = q.filter(models.Flight.flight_date == date)
     if min_price is not None:
@@ -262,101 +327,14 @@ def api_search_flights(
         q = q.filter(models.Flight.price_real <= max_price)
 
     # Filter out past flights (safety check)
-    # We compare departure_iso string.
-    # User's data seems to be in IST (Asia/Kolkata).
-    # If we compare naive IST string in DB to UTC now string, we get wrong results:
-    # DB: "2026-01-06T17:08:00" (5 PM IST)
-    # UTC Now: "2026-01-06T11:38:00" (5 PM IST is 11:38 AM UTC)
-    # String compare: "17..." > "11...", so it shows up!
-    # Fix: Compare against CURRENT IST TIME in ISO format.
-    now_ist = datetime.now(ZoneInfo("Asia/Kolkata")).isoformat()
-    # Remove offset info if DB is naive to ensure string matching works, or keep valid ISO.
-    # Ideally DB should have timezone. Assuming naive ISO in DB:
-    # "2026-01-06T17:08:00" vs "2026-01-06T22:11:00+05:30"
-    # We should strip offset from now_ist for string comparison if DB is naive.
-    # Let's try sending a proper ISO string that matches the DB format.
-    
-    # If DB has "YYYY-MM-DDTHH:MM:SS"
-    now_iso = datetime.now(ZoneInfo("Asia/Kolkata")).replace(tzinfo=None).isoformat()
-    q = q.filter(models.Flight.departure_iso > now_iso)
-
-    # Sorting
-    if sort_by == "price":
-        q = q.order_by(models.Flight.price_real.asc() if order == "asc" else models.Flight.price_real.desc())
-    elif sort_by == "duration":
-        q = q.order_by(models.Flight.duration_min.asc() if order == "asc" else models.Flight.duration_min.desc())
-    else:
-        q = q.order_by(models.Flight.id.asc())
-
-    # Pagination
-    flights = q.offset(offset).limit(limit).all()
-
-    # Batch load demand scores for efficiency
-    flight_ids = [f.id for f in flights if getattr(f, "id", None) is not None]
-    demand_map = {}
-    if flight_ids:
-        ds_rows = db.query(models.DemandScore).filter(models.DemandScore.flight_id.in_(flight_ids)).all()
-        demand_map = {ds.flight_id: ds.score for ds in ds_rows}
-
-    # Build results with dynamic price
-    results = []
-    for f in flights:
-        demand_score = float(demand_map.get(f.id, 0.0))
-
-        # Calculate price
-        new_price_raw, breakdown = calculate_price(f, demand_score=demand_score)
-        try:
-            new_price = float(new_price_raw) if new_price_raw is not None else None
-        except Exception:
-            new_price = None
-
-        base_price = float(getattr(f, "base_price", None) or getattr(f, "price_real", 0.0) or 0.0)
-        price_increase_percent = None
-        if base_price and new_price is not None:
-            try:
-                price_increase_percent = round((new_price - base_price) / base_price * 100, 1)
-            except Exception:
-                price_increase_percent = None
-
-        # Determine whether to show computed dynamic price or the published (stable) price_real
-        computed_price = round(new_price, 2) if new_price is not None else None
-
-        # If cooldown active, show published price_real instead of computed price
-        if not should_update_price(getattr(f, "last_price_updated", None), DEFAULT_MIN_UPDATE_SECONDS):
-            dynamic_price = float(f.price_real)
-            price_breakdown_out = None
-            price_cached_seconds_left = max(0, DEFAULT_MIN_UPDATE_SECONDS - int(seconds_since_iso(getattr(f, "last_price_updated", None) or 0)))
-        else:
-            dynamic_price = computed_price
-            price_breakdown_out = breakdown if isinstance(breakdown, dict) else None
-            price_cached_seconds_left = 0
+    # departure_ts is the UTC epoch of the (naive IST) departure_iso, so this is an
+    # indexed range scan with no string/timezone mixing.
+    q = q.filter(models.Flight.departure_ts > now_ts())
 
-        results.append({
-            "id": int(f.id) if f.id is not None else None,
-            "flight_number": str(f.flight_number),
-            "airline": str(f.airline),
-            "origin": str(f.origin),
-            "destination": str(f.destination),
-            # Return actual ISO format for frontend date parsing
-            "departure_iso": str(getattr(f, "departure_iso", "")),
-            "arrival_iso": str(getattr(f, "arrival_iso", "")),
-            "duration_min": int(f.duration_min),
-            "price_real": float(f.price_real),
-            "base_price": base_price,
-            "dynamic_price": dynamic_price,
-            "price_increase_percent": price_increase_percent,
-            "seats_total": int(f.seats_total),
-            "seats_available": int(f.seats_available),
-            "flight_date": str(f.flight_date),
-            "demand_score": float(demand_score),
-            "price_breakdown": price_breakdown_out,
-            # only the human-friendly timestamp (no raw ISO)
-            "last_price_updated": _human_time_safe(getattr(f, "last_price_updated", None)),
-            # optional helper so front-end can show countdown (0 if live)
-            "price_cached_seconds_left": int(price_cached_seconds_left),
-        })
+    # Sorting + pagination (keyset when a cursor is given)
+    flights = _sorted_page(q, sort_by, order, limit, offset, cursor, response)
 
-    return results
+    return _dynamic_results(db, flights)
 
 
 # ============================================
@@ -367,6 +345,7 @@ def api_search_flights(
 def api_route_search(
     origin: str,
     destination: str,
+    response: Response,
     date: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None, ge=0.0),
     max_price: Optional[float] = Query(None, ge=0.0),
@@ -374,6 +353,7 @@ def api_route_search(
     order: str = Query("asc", regex="^(asc|desc)$"),
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page"),
     db: Session = Depends(get_db),
 ):
     try:
@@ -384,24 +364,25 @@ def api_route_search(
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
-    if origin.lower() == destination.lower():
+    origin_code = resolve_location_code(origin)
+    destination_code = resolve_location_code(destination)
+
+    if origin.lower() == destination.lower() or origin_code == destination_code:
         raise HTTPException(status_code=400, detail="Origin and destination cannot be the same.")
 
-    if origin and airport_exists(db, origin) is False:
+    if origin and airport_exists(origin) is False and _exists_in_db(db, origin_code=origin_code) is False:
         raise HTTPException(status_code=422, detail=f"Unknown origin '{origin}'.")
-    if destination and airport_exists(db, destination) is False:
+    if destination and airport_exists(destination) is False and _exists_in_db(db, destination_code=destination_code) is False:
         raise HTTPException(status_code=422, detail=f"Unknown destination '{destination}'.")
 
-    origin_code = get_airport_code(db, origin)
-    destination_code = get_airport_code(db, destination)
     try:
-        log_search(db, origin_code, destination_code, date)
+        log_search(origin_code, destination_code, date)
     except Exception:
         pass
 
     q = db.query(models.Flight).filter(
-        func.lower(models.Flight.origin) == origin.lower(),
-        func.lower(models.Flight.destination) == destination.lower(),
+        models.Flight.origin_code == origin_code,
+        models.Flight.destination_code == destination_code,
     )
     if date:
         q = q.filter(models.Flight.flight_date == date)
@@ -411,77 +392,11 @@ def api_route_search(
         q = q.filter(models.Flight.price_real <= max_price)
 
     # Filter out past flights
-    now_iso = datetime.now(timezone.utc).isoformat()
-    q = q.filter(models.Flight.departure_iso > now_iso)
+    q = q.filter(models.Flight.departure_ts > now_ts())
 
-    if sort_by == "price":
-        q = q.order_by(models.Flight.price_real.asc() if order == "asc" else models.Flight.price_real.desc())
-    elif sort_by == "duration":
-        q = q.order_by(models.Flight.duration_min.asc() if order == "asc" else models.Flight.duration_min.desc())
-    else:
-        q = q.order_by(models.Flight.id.asc())
+    flights = _sorted_page(q, sort_by, order, limit, offset, cursor, response)
 
-    flights = q.offset(offset).limit(limit).all()
-
-    # batch demand load
-    flight_ids = [f.id for f in flights if getattr(f, "id", None) is not None]
-    demand_map = {}
-    if flight_ids:
-        ds_rows = db.query(models.DemandScore).filter(models.DemandScore.flight_id.in_(flight_ids)).all()
-        demand_map = {ds.flight_id: ds.score for ds in ds_rows}
-
-    results = []
-    for f in flights:
-        demand_score = float(demand_map.get(f.id, 0.0))
-        new_price_raw, breakdown = calculate_price(f, demand_score=demand_score)
-        try:
-            new_price = float(new_price_raw) if new_price_raw is not None else None
-        except Exception:
-            new_price = None
-
-        base_price = float(getattr(f, "base_price", None) or getattr(f, "price_real", 0.0) or 0.0)
-        price_increase_percent = None
-        if base_price and new_price is not None:
-            try:
-                price_increase_percent = round((new_price - base_price) / base_price * 100, 1)
-            except Exception:
-                price_increase_percent = None
-
-        computed_price = round(new_price, 2) if new_price is not None else None
-
-        if not should_update_price(getattr(f, "last_price_updated", None), DEFAULT_MIN_UPDATE_SECONDS):
-            dynamic_price = float(f.price_real)
-            price_breakdown_out = None
-            price_cached_seconds_left = max(0, DEFAULT_MIN_UPDATE_SECONDS - int(seconds_since_iso(getattr(f, "last_price_updated", None) or 0)))
-        else:
-            dynamic_price = computed_price
-            price_breakdown_out = breakdown if isinstance(breakdown, dict) else None
-            price_cached_seconds_left = 0
-
-        results.append({
-            "id": int(f.id) if f.id is not None else None,
-            "flight_number": str(f.flight_number),
-            "airline": str(f.airline),
-            "origin": str(f.origin),
-            "destination": str(f.destination),
-            # Return actual ISO format for frontend date parsing
-            "departure_iso": str(getattr(f, "departure_iso", "")),
-            "arrival_iso": str(getattr(f, "arrival_iso", "")),
-            "duration_min": int(f.duration_min),
-            "price_real": float(f.price_real),
-            "base_price": base_price,
-            "dynamic_price": dynamic_price,
-            "price_increase_percent": price_increase_percent,
-            "seats_total": int(f.seats_total),
-            "seats_available": int(f.seats_available),
-            "flight_date": str(f.flight_date),
-            "demand_score": float(demand_score),
-            "price_breakdown": price_breakdown_out,
-            "last_price_updated": _human_time_safe(getattr(f, "last_price_updated", None)),
-            "price_cached_seconds_left": int(price_cached_seconds_left),
-        })
-
-    return results
+    return _dynamic_results(db, flights)
 
 
 # =========================================================
@@ -490,47 +405,11 @@ def api_route_search(
 @router.get("/flights/popular")
 def api_popular_routes(limit: int = Query(6, ge=1, le=50), db: Session = Depends(get_db)):
     """
-    Return specific popular routes as requested:
-    HYD→BLR, HYD→DEL, HYD→MAA, BLR→DEL, BLR→BOM, DEL→BOM
+    Most searched routes (search_logs), padded with the default routes
+    HYD→BLR, HYD→DEL, HYD→MAA, BLR→DEL, BLR→BOM, DEL→BOM,
+    each with its cheapest upcoming dynamic fare. Served from memory.
     """
-    # Define the exact 6 routes to display
-    target_routes = [
-        ("HYD", "BLR"),
-        ("HYD", "DEL"),
-        ("HYD", "MAA"),
-        ("BLR", "DEL"),
-        ("BLR", "BOM"),
-        ("DEL", "BOM")
-    ]
-    
-    results = []
-    
-    for origin, destination in target_routes[:limit]:
-        # Find the CHEAPEST flight for this route with future departure
-        # Use IST time for comparison to ensure valid future flights
-        now_ist = datetime.now(ZoneInfo("Asia/Kolkata")).replace(tzinfo=None).isoformat()
-        
-        flight = db.query(models.Flight).filter(
-            models.Flight.origin == origin,
-            models.Flight.destination == destination,
-            models.Flight.departure_iso > now_ist
-        ).order_by(models.Flight.price_real.asc()).first()
-        
-        if flight:
-            results.append({
-                "origin": origin,
-                "destination": destination,
-                "dynamic_price": float(flight.price_real)
-            })
-        else:
-            # If no future flight exists, still show the route with a default price
-            results.append({
-                "origin": origin,
-                "destination": destination,
-                "dynamic_price": 2499.0
-            })
-    
-    return results
+    return popular_routes.get(db, limit)
 
 
 # =========================================================
@@ -555,9 +434,9 @@ def api_cheapest_flight(
 
     q = db.query(models.Flight)
     if origin:
-        q = q.filter(func.lower(models.Flight.origin) == origin.lower())
+        q = q.filter(models.Flight.origin_code == resolve_location_code(origin))
     if destination:
-        q = q.filter(func.lower(models.Flight.destination) == destination.lower())
+        q = q.filter(models.Flight.destination_code == resolve_location_code(destination))
     if date:
         q = q.filter(models.Flight.flight_date == date)
 
@@ -591,28 +470,8 @@ def api_cheapest_flight(
 def api_suggest(
     q: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=30),
-    db: Session = Depends(get_db),
 ):
-    term = f"%{q.strip().lower()}%"
-    rows = db.execute(
-        text(
-            """
-        SELECT city, code, airport_name
-        FROM airports
-        WHERE lower(city) LIKE :term OR lower(code) LIKE :term OR lower(airport_name) LIKE :term
-        LIMIT :limit
-        """
-        ),
-        {"term": term, "limit": limit},
-    ).fetchall()
-
-    results = []
-    for r in rows:
-        city = r[0]
-        code = r[1]
-        name = r[2] if r[2] else ""
-        results.append({"city": city, "code": code, "airport_name": name})
-    return results
+    return airports.suggest(q, limit)
 
 
 # ============================================
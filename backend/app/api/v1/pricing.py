@@ -1,14 +1,31 @@
 # app/api/v1/pricing.py
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.db import models
+from app.services.pricing import price_cache
+from app.utils.pagination import keyset_paginate, NEXT_CURSOR_HEADER
 
 router = APIRouter(tags=["pricing"])
 
 @router.get("/fare_history/{flight_id}")
-def fare_history(flight_id: int, limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
-    rows = db.query(models.FareHistory).filter(models.FareHistory.flight_id == flight_id).order_by(models.FareHistory.id.desc()).limit(limit).all()
+def fare_history(
+    flight_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_db),
+):
+    q = db.query(models.FareHistory).filter(models.FareHistory.flight_id == flight_id)
+    try:
+        rows, next_cursor = keyset_paginate(
+            q, key="id", id_column=models.FareHistory.id, descending=True, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [{"id": r.id, "old": r.old_price, "new": r.new_price, "reason": r.reason, "ts": r.changed_at} for r in rows]
 
 @router.get("/demand/{flight_id}")
@@ -18,3 +35,8 @@ def demand_score(flight_id: int, db: Session = Depends(get_db)):
         # Return default neutral score instead of 404 to avoid console errors
         return {"flight_id": flight_id, "score": 0.0, "updated_at": None}
     return {"flight_id": row.flight_id, "score": row.score, "updated_at": row.updated_at}
+
+@router.get("/pricing/cache")
+def pricing_cache_stats():
+    """Hit/miss counters for the in-process price memo cache."""
+    return price_cache.stats()
@@ -1,24 +1,34 @@
 # app/api/v1/simulator.py
-from fastapi import APIRouter
-from app.services.simulator import start, stop, tick_once, status
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from app.services.simulator import start_async, stop_async, run_db, manual_tick, status
+from app.services.simulator_lease import simulator_lease
 
 # No prefix here — main.py already adds "/api/v1/simulator"
 router = APIRouter(tags=["simulator"])
 
 @router.post("/start")
-def api_sim_start():
-    start()
-    return {"message": "Simulator started", "status": status()}
+async def api_sim_start():
+    await start_async()
+    return {"message": "Simulator started", "status": await run_db(status)}
 
 @router.post("/stop")
-def api_sim_stop():
-    stop()
-    return {"message": "Simulator stopped", "status": status()}
+async def api_sim_stop():
+    await stop_async()
+    return {"message": "Simulator stopped", "status": await run_db(status)}
 
 @router.post("/tick")
-def api_sim_tick():
-    tick_once()
-    return {"message": "Single tick executed", "status": status()}
+async def api_sim_tick():
+    repriced = await run_db(manual_tick)
+    if repriced is None:
+        lease = await run_db(simulator_lease.stats)
+        raise HTTPException(status_code=409, detail={
+            "message": "Another process holds the simulator lease; send /tick to the leader",
+            "leader": lease["leader"],
+            "expires_in_seconds": lease["expires_in_seconds"],
+        })
+    return {"message": "Single tick executed", "repriced": repriced, "status": await run_db(status)}
 
 @router.get("/status")
 def api_sim_status():
@@ -28,23 +38,39 @@ from pydantic import BaseModel
 class EventTrigger(BaseModel):
     city: str
     factor: float = 0.5
+    origin: Optional[str] = None            # route-scoped surge (origin -> city)
+    duration_minutes: Optional[int] = None  # None: until /event/reset
+    decay: str = "flat"                     # flat | linear | exponential
+    label: Optional[str] = None
 
 from app.services.simulator import trigger_surge, reset_surge
+from app.services.demand_events import demand_events
 
 @router.post("/event")
-def api_trigger_event(evt: EventTrigger):
-    count = trigger_surge(evt.city, evt.factor)
+async def api_trigger_event(evt: EventTrigger):
+    duration = evt.duration_minutes * 60 if evt.duration_minutes else None
+    try:
+        count = await run_db(trigger_surge, evt.city, evt.factor, duration, evt.decay, evt.origin, evt.label)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "message": f"Event triggered for {evt.city}", 
         "flights_affected": count,
-        "factor": evt.factor
+        "factor": evt.factor,
+        "duration_minutes": evt.duration_minutes,
+        "decay": evt.decay,
     }
 
 @router.post("/event/reset")
-def api_reset_event(evt: EventTrigger):
-    count = reset_surge(evt.city)
+async def api_reset_event(evt: EventTrigger):
+    count = await run_db(reset_surge, evt.city, evt.origin)
     return {
         "message": f"Normalcy restored for {evt.city}", 
         "flights_affected": count,
         "factor": 0.0
     }
+
+@router.get("/events")
+def api_active_events():
+    """Demand events in effect right now, with their current boost."""
+    return {"events": demand_events.active(), "index": demand_events.stats()}
@@ -4,7 +4,9 @@ WebSocket endpoint for real-time flight updates.
 Clients connect to /ws/feeds to receive live price and seat updates.
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.utils.websocket_manager import manager
+from app.utils.websocket_manager import manager, flight_topic, route_topic
+from app.utils.frame_codec import negotiate
+import json
 import logging
 import asyncio
 
@@ -18,6 +20,75 @@ def ws_debug():
     """Debug endpoint to check if websocket router is loaded"""
     return {"status": "ok", "message": "WebSocket router is mounted"}
 
+def _requested_topics(msg: dict) -> list:
+    """Topics named by a subscribe/unsubscribe message (topic strings or structured fields)."""
+    topics = []
+    if isinstance(msg.get("topics"), list):
+        topics.extend(msg["topics"])
+    if msg.get("topic"):
+        topics.append(msg["topic"])
+    if msg.get("flight_id") is not None:
+        try:
+            topics.append(flight_topic(msg["flight_id"]))
+        except (TypeError, ValueError):
+            topics.append(f"flight:{msg['flight_id']}")
+    route = msg.get("route")
+    if isinstance(route, dict) and route.get("origin") and route.get("destination"):
+        topics.append(route_topic(route["origin"], route["destination"], route.get("date")))
+    return topics
+
+
+def _resync(websocket: WebSocket, msg: dict) -> dict:
+    """
+    Answer {"action": "resume", "last_seq": N, "stream": "..."} with what the
+    client missed: "replay" (deltas from the ring buffer), "snapshot" (latest
+    state of every subscribed flight changed since N) or "full" (seq from
+    another server process - the client should refetch).
+    """
+    try:
+        last_seq = int(msg.get("last_seq"))
+    except (TypeError, ValueError):
+        last_seq = -1
+    missed = manager.missed_updates(websocket, last_seq, msg.get("stream"))
+    mode, updates = missed if missed is not None else ("full", [])
+    return {"type": "resync", "mode": mode, "seq": manager.seq, "stream": manager.stream, "updates": updates}
+
+
+def _handle_client_message(websocket: WebSocket, data: str):
+    """ping -> pong; JSON {"action": "subscribe"|"unsubscribe"|"resume", ...}."""
+    if data == "ping":
+        manager.send_personal(websocket, "pong")
+        return
+    try:
+        msg = json.loads(data)
+    except ValueError:
+        return
+    if not isinstance(msg, dict):
+        return
+
+    action = msg.get("action")
+    if action == "subscribe":
+        invalid = manager.subscribe(websocket, _requested_topics(msg))
+    elif action == "unsubscribe":
+        manager.unsubscribe(websocket, _requested_topics(msg))
+        invalid = []
+    elif action == "resume":
+        manager.send_personal(websocket, _resync(websocket, msg))
+        return
+    else:
+        return
+    reply = {"type": "subscribed", "topics": manager.subscriptions(websocket)}
+    if invalid:
+        reply["invalid"] = invalid
+    manager.send_personal(websocket, reply)
+
+
+@router.get("/ws/stats")
+def ws_stats():
+    """Connection count, topic count, send-queue depths and overflow drops"""
+    return manager.stats()
+
+
 @router.websocket("/ws/feeds")
 async def websocket_endpoint(websocket: WebSocket):
     """
@@ -28,18 +99,40 @@ async def websocket_endpoint(websocket: WebSocket):
         "type": "flight_update",
         "flight_id": 123,
         "flight_number": "AI101",
+        "origin_code": "HYD",
+        "destination_code": "BLR",
+        "flight_date": "2025-12-09",
         "price": 4200.0,
         "seats": 45,
         "timestamp": "2025-12-09T08:30:00Z"
     }
+
+    Every update is sent to all clients until they subscribe:
+        {"action": "subscribe", "topics": ["flight:123", "route:HYD:BLR:2025-12-09"]}
+        {"action": "subscribe", "route": {"origin": "Hyderabad", "destination": "Bengaluru", "date": "2025-12-09"}}
+        {"action": "unsubscribe", "flight_id": 123}
+    Each (un)subscribe is answered with {"type": "subscribed", "topics": [...]}.
+
+    Batched {"type": "flight_updates", "seq": N, "stream": "..."} frames are
+    numbered. After reconnecting (and subscribing), send
+        {"action": "resume", "last_seq": N, "stream": "..."}
+    to receive the missed updates in one {"type": "resync", ...} frame.
+
+    Connect with ?encoding=packed (column arrays of flight_id/price/seats) or
+    ?encoding=msgpack (the same, binary) for smaller flight_updates frames;
+    connection_established reports the encoding actually used.
     """
-    await manager.connect(websocket)
+    encoding = negotiate(websocket.query_params.get("encoding"))
+    await manager.connect(websocket, encoding=encoding)
     
     try:
         # Send initial connection confirmation
-        await websocket.send_json({
+        manager.send_personal(websocket, {
             "type": "connection_established",
             "message": "Connected to FlySmart real-time updates",
+            "seq": manager.seq,
+            "stream": manager.stream,
+            "encoding": encoding,
             "timestamp": asyncio.get_event_loop().time()
         })
         
@@ -48,9 +141,8 @@ async def websocket_endpoint(websocket: WebSocket):
             # Wait for any message from client (ping/pong or commands)
             try:
                 data = await websocket.receive_text()
-                # Echo back for ping/pong
-                if data == "ping":
-                    await websocket.send_text("pong")
+                # ping/pong and subscribe/unsubscribe commands
+                _handle_client_message(websocket, data)
             except WebSocketDisconnect:
                 break
             except Exception as e:
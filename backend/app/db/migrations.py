@@ -0,0 +1,50 @@
+# app/db/migrations.py
+"""
+Alembic glue.
+
+main.py still runs create_all() for fresh databases; upgrade_to_head() then
+brings existing databases up to date (new columns, indexes, backfills).
+Revisions are written to be idempotent so they are safe on both.
+"""
+import logging
+import os
+
+from sqlalchemy import inspect
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+
+
+def upgrade_to_head(engine) -> bool:
+    """Run `alembic upgrade head` in-process. Returns False (and logs) on failure."""
+    try:
+        from alembic import command
+        from alembic.config import Config
+
+        cfg = Config(ALEMBIC_INI)
+        cfg.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+        cfg.attributes["configure_logger"] = False
+        with engine.begin() as connection:
+            cfg.attributes["connection"] = connection
+            command.upgrade(cfg, "head")
+        return True
+    except Exception:
+        logger.exception("Database migration failed")
+        return False
+
+
+# ----------------------------
+# Helpers for idempotent revisions
+# ----------------------------
+def has_table(bind, table: str) -> bool:
+    return inspect(bind).has_table(table)
+
+
+def has_column(bind, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(bind).get_columns(table))
+
+
+def has_index(bind, table: str, index: str) -> bool:
+    return any(i["name"] == index for i in inspect(bind).get_indexes(table))
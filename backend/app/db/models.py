@@ -1,12 +1,18 @@
 # app/db/models.py
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Index, event, inspect
 from app.db.base import Base
 from sqlalchemy.sql import func
 from sqlalchemy import text as sa_text
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+from app.utils.epoch_utils import iso_to_ts, schedule_iso_to_ts, now_ts
+from app.utils.location_utils import location_code, airports
 
 class Flight(Base):
     __tablename__ = "flights"
+    __table_args__ = (
+        # route/date search: equality on codes + date, range on departure_ts
+        Index("idx_flights_route_date", "origin_code", "destination_code", "flight_date", "departure_ts"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     flight_number = Column(String, nullable=False, index=True)
@@ -20,20 +26,72 @@ class Flight(Base):
     base_price = Column(Float, nullable=True)
     seats_total = Column(Integer, nullable=False)
     seats_available = Column(Integer, nullable=False)
+    # seats in live 'reserved' bookings; moved only by conditional UPDATEs in booking_service
+    seats_held = Column(Integer, nullable=False, default=0, server_default="0")
     flight_date = Column(String, nullable=False)
     last_price_updated = Column(String, nullable=True)
 
+    # UTC epoch mirrors of the ISO strings above (kept in sync on assignment)
+    departure_ts = Column(Integer, nullable=True, index=True)
+    last_price_updated_ts = Column(Integer, nullable=True)
+
+    # canonical airport codes for origin/destination, filled at write time
+    origin_code = Column(String, nullable=True)
+    destination_code = Column(String, nullable=True)
+
+    @validates("departure_iso")
+    def _sync_departure_ts(self, key, value):
+        self.departure_ts = schedule_iso_to_ts(value)
+        return value
+
+    @validates("last_price_updated")
+    def _sync_last_price_updated_ts(self, key, value):
+        self.last_price_updated_ts = iso_to_ts(value)
+        return value
+
+def _airport_lookup(connection):
+    def lookup(v: str):
+        try:
+            row = connection.execute(
+                sa_text("SELECT code FROM airports WHERE lower(city) = :v OR lower(code) = :v LIMIT 1"),
+                {"v": v},
+            ).fetchone()
+        except Exception:
+            return None
+        return row[0] if row else None
+    return lookup
+
+
+@event.listens_for(Flight, "before_insert")
+@event.listens_for(Flight, "before_update")
+def _fill_route_codes(mapper, connection, target):
+    """Keep origin_code/destination_code in step with origin/destination."""
+    state = inspect(target)
+    lookup = None
+    for name, code_name in (("origin", "origin_code"), ("destination", "destination_code")):
+        if getattr(target, code_name) is None or state.attrs[name].history.has_changes():
+            lookup = lookup or (airports.code if airports.loaded else _airport_lookup(connection))
+            setattr(target, code_name, location_code(getattr(target, name), lookup))
+
+
 class FareHistory(Base):
     __tablename__ = "fare_history"
+    __table_args__ = (
+        Index("idx_fare_history_flight", "flight_id", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     flight_id = Column(Integer, nullable=False)
     old_price = Column(Float)
     new_price = Column(Float, nullable=False)
     reason = Column(String, nullable=True)
     changed_at = Column(String, server_default=func.strftime('%Y-%m-%d %H:%M:%S', 'now'))
+    changed_ts = Column(Integer, nullable=True, index=True, default=now_ts)
 
 class DemandScore(Base):
     __tablename__ = "demand_scores"
+    __table_args__ = (
+        Index("idx_demand_scores_flight", "flight_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     flight_id = Column(Integer, nullable=True)
     origin_code = Column(String, nullable=True)
@@ -41,9 +99,56 @@ class DemandScore(Base):
     score = Column(Float, nullable=False, default=0.0)
     updated_at = Column(String, server_default=func.strftime('%Y-%m-%d %H:%M:%S', 'now'))
 
+class DemandEvent(Base):
+    """
+    Calendar demand surge for a destination city or a route, applied at price time
+    (see services/demand_events.py) instead of rewriting every flight's demand score.
+    """
+    __tablename__ = "demand_events"
+    __table_args__ = (
+        Index("idx_demand_events_ends", "ends_ts"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    label = Column(String, nullable=True)
+    scope = Column(String, nullable=False, default="destination")   # destination | route
+    origin_code = Column(String, nullable=True)                     # route scope only
+    destination_code = Column(String, nullable=False)
+    starts_ts = Column(Integer, nullable=False)                     # UTC epoch
+    ends_ts = Column(Integer, nullable=True)                        # NULL: until ended
+    magnitude = Column(Float, nullable=False)                       # added to the 0..1 demand score
+    decay = Column(String, nullable=False, default="flat")          # flat | linear | exponential
+    half_life_seconds = Column(Integer, nullable=True)              # exponential decay only
+    created_ts = Column(Integer, nullable=False, default=now_ts)
+    updated_ts = Column(Integer, nullable=False, default=now_ts, onupdate=now_ts)
+
+class Airport(Base):
+    __tablename__ = "airports"
+    __table_args__ = (
+        Index("idx_airports_city", "city"),
+        Index("idx_airports_code", "code"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    code = Column(String, nullable=False, unique=True)
+    city = Column(String, nullable=False)
+    airport_name = Column(String, nullable=True)
+    country = Column(String, server_default="India")
+
+
+@event.listens_for(Airport, "after_insert")
+@event.listens_for(Airport, "after_update")
+@event.listens_for(Airport, "after_delete")
+def _invalidate_airport_registry(mapper, connection, target):
+    """Airports changed through the ORM: reload the in-memory registry on next lookup."""
+    airports.invalidate()
+
 class Booking(Base):
     __tablename__ = "bookings"
-    __table_args__ = (Index("idx_bookings_status", "status"),)
+    __table_args__ = (
+        Index("idx_bookings_status", "status"),
+        Index("idx_bookings_flight_hold", "flight_id", "status", "hold_expires_ts"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
 
@@ -72,8 +177,9 @@ class Booking(Base):
     # reserved | confirmed | cancelled | expired
     status = Column(String, nullable=False, default="reserved")
 
-    # ISO timestamp until hold expires
+    # ISO timestamp until hold expires (+ UTC epoch mirror used for comparisons)
     hold_expires_at = Column(String, nullable=True)
+    hold_expires_ts = Column(Integer, nullable=True, index=True)
 
     created_at = Column(
         String,
@@ -88,3 +194,18 @@ class Booking(Base):
     # ORM relationship to Flight (convenience)
     flight = relationship("Flight", backref="bookings", lazy="joined")
 
+    @validates("hold_expires_at")
+    def _sync_hold_expires_ts(self, key, value):
+        self.hold_expires_ts = iso_to_ts(value)
+        return value
+
+
+class SimulatorLease(Base):
+    """Leader lease: the one process allowed to run simulator ticks (see services/simulator_lease.py)."""
+    __tablename__ = "simulator_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    acquired_ts = Column(Integer, nullable=False)   # UTC epoch when the current holder took the lease
+    renewed_ts = Column(Integer, nullable=False)    # last heartbeat
+    expires_ts = Column(Integer, nullable=False)    # others may take over after this
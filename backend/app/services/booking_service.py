@@ -1,17 +1,19 @@
 # app/services/booking_service.py
 from typing import Optional, Tuple, Dict
-from datetime import datetime, timezone, timedelta
+from datetime import timedelta
 import time
 import json
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, update
+from sqlalchemy import case, update
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 from app.db.models import Flight, Booking, FareHistory
-from app.services.pricing import calculate_price
+from app.services.pricing import calculate_price, price_cache
+from app.utils import clock
 from app.utils.pnr import generate_pnr_unique
 from app.utils.price_utils import now_utc_iso
+from app.utils.epoch_utils import now_ts, iso_to_ts
 
 # Config knobs
 HOLD_SECONDS = 300
@@ -21,22 +23,63 @@ CONFIRM_RETRY = 3
 CONFIRM_RETRY_DELAY = 0.05
 
 
-def _count_active_reservations(db: Session, flight_id: int) -> int:
+# ----------------------------
+# Seat holds (flights.seats_held)
+# ----------------------------
+# seats_held always equals the seats of the flight's bookings in 'reserved' status.
+# It only moves together with a booking's status change, by conditional UPDATEs,
+# so availability is one row read and no two requests can hold the same seat.
+
+def _take_seats(db: Session, flight_id: int, seats: int) -> bool:
+    """Hold `seats` on a flight if that many are still free. Returns False when they are not."""
+    res = db.execute(
+        update(Flight)
+        .where(Flight.id == flight_id, Flight.seats_available - Flight.seats_held >= seats)
+        .values(seats_held=Flight.seats_held + seats)
+    )
+    return res.rowcount == 1
+
+
+def _release_hold(db: Session, booking: Booking, status: str, from_status: str = "reserved") -> bool:
+    """
+    Move a holding booking to `status` and give its seats back to the flight.
+    No-op (False) if the booking was already moved by someone else.
     """
-    Count seats in non-expired 'reserved' bookings for a flight using a single SQL query.
+    res = db.execute(
+        update(Booking)
+        .where(Booking.id == booking.id, Booking.status == from_status)
+        .values(status=status, updated_at=now_utc_iso())
+    )
+    if res.rowcount != 1:
+        db.refresh(booking)   # undo the in-session sync; report what the row really says
+        return False
+    seats = int(booking.seats_booked or 0)
+    db.execute(
+        update(Flight)
+        .where(Flight.id == booking.flight_id)
+        .values(seats_held=case((Flight.seats_held > seats, Flight.seats_held - seats), else_=0))
+    )
+    return True
+
 
-    Notes:
-    - We compare ISO timestamps as strings; code uses .isoformat() so string compare works.
-    - Returns an integer (0 if none).
+def expire_holds(db: Session, flight_id: Optional[int] = None, limit: int = 1000) -> int:
     """
-    now_iso = datetime.now(timezone.utc).isoformat()
-    total = db.query(func.coalesce(func.sum(Booking.seats_booked), 0)).filter(
-        Booking.flight_id == flight_id,
+    Mark reservations past their hold as 'expired' and release their seats
+    (all flights, or one). Range scan on idx_bookings_flight_hold. Caller commits.
+    Returns how many holds were released.
+    """
+    q = db.query(Booking).filter(
         Booking.status == "reserved",
-        Booking.hold_expires_at != None,
-        Booking.hold_expires_at > now_iso
-    ).scalar()
-    return int(total or 0)
+        Booking.hold_expires_ts != None,
+        Booking.hold_expires_ts <= now_ts()
+    )
+    if flight_id is not None:
+        q = q.filter(Booking.flight_id == flight_id)
+    released = 0
+    for booking in q.order_by(Booking.id).limit(limit).all():
+        if _release_hold(db, booking, "expired"):
+            released += 1
+    return released
 
 
 def reserve_seats(db: Session, flight_id: int, seats: int, passenger_name: Optional[str] = None, passenger_contact: Optional[str] = None) -> Tuple[Booking, float, dict]:
@@ -48,17 +91,17 @@ def reserve_seats(db: Session, flight_id: int, seats: int, passenger_name: Optio
     if not flight:
         raise ValueError("Flight not found")
 
-    seats_available = int(getattr(flight, "seats_available", 0))
-    reserved = _count_active_reservations(db, flight_id)
-    effective_available = max(0, seats_available - reserved)
-    if seats > effective_available:
+    # free this flight's lapsed holds, then take the seats in one conditional UPDATE
+    expire_holds(db, flight_id)
+    if not _take_seats(db, flight_id, seats):
+        db.rollback()
         raise ValueError("Not enough seats available (consider existing holds)")
 
     # snapshot dynamic price using pricing engine, with demand score if available
     price_snapshot, breakdown = calculate_price(flight, demand_score=None)
 
     # create reservation entry
-    hold_expires_at = (datetime.now(timezone.utc) + timedelta(seconds=HOLD_SECONDS)).isoformat()
+    hold_expires_at = (clock.utc_now() + timedelta(seconds=HOLD_SECONDS)).isoformat()
 
     booking = Booking(
         flight_id=flight_id,
@@ -83,11 +126,10 @@ def confirm_reservation(db: Session, reservation_id: int, payment_success: bool
     Returns booking, status_string, breakdown (when confirmed).
 
     Improvements:
-      - SQL-level active reservations counting
+      - held seats turn into sold seats with one conditional UPDATE (no SUM over bookings)
       - atomic PNR assignment attempt (reduces race)
       - retry on IntegrityError
       - store payment_meta as JSON
-      - clearer seat availability check excluding this reservation
     """
     last_exc = None
     for attempt_outer in range(CONFIRM_RETRY):
@@ -105,51 +147,56 @@ def confirm_reservation(db: Session, reservation_id: int, payment_success: bool
 
                 # expiry check
                 if booking.hold_expires_at:
-                    try:
-                        exp = datetime.fromisoformat(booking.hold_expires_at)
-                        if datetime.now(timezone.utc) > exp:
-                            booking.status = "expired"
-                            db.add(booking)
-                            return booking, "expired", None
-                    except Exception:
-                        booking.status = "expired"
-                        db.add(booking)
+                    exp_ts = booking.hold_expires_ts
+                    if exp_ts is None:
+                        exp_ts = iso_to_ts(booking.hold_expires_at)
+                    if exp_ts is None or now_ts() > exp_ts:
+                        _release_hold(db, booking, "expired")
                         return booking, "expired", None
 
                 flight = db.get(Flight, booking.flight_id)
                 if not flight:
-                    booking.status = "cancelled"
-                    db.add(booking)
+                    _release_hold(db, booking, "cancelled")
                     return booking, "flight_missing", None
 
                 seats_needed = int(booking.seats_booked or 0)
                 if seats_needed <= 0:
-                    booking.status = "cancelled"
-                    db.add(booking)
+                    _release_hold(db, booking, "cancelled")
                     return booking, "invalid_seats", None
 
-                # verify availability (consider other active reservations)
-                reserved = _count_active_reservations(db, flight.id)
-                # other reservations excluding this booking
-                other_reserved = max(0, reserved - int(booking.seats_booked or 0))
-                physical_left = int(flight.seats_available)
-                if seats_needed > physical_left - other_reserved:
-                    booking.status = "cancelled"
-                    db.add(booking)
-                    return booking, "insufficient_seats", None
-
                 if not payment_success:
-                    booking.status = "cancelled"
                     # store payment_meta as JSON string (best-effort)
                     try:
                         booking.payment_meta = json.dumps(payment_meta or {})
                     except Exception:
                         booking.payment_meta = str(payment_meta or {})
-                    db.add(booking)
+                    _release_hold(db, booking, "cancelled")
                     return booking, "payment_failed", None
 
-                # Payment success: update flight and booking atomically
-                flight.seats_available = max(0, int(flight.seats_available) - seats_needed)
+                # claim the reservation: only one confirm can move it out of 'reserved'
+                claimed = db.execute(
+                    update(Booking)
+                    .where(Booking.id == booking.id, Booking.status == "reserved")
+                    .values(status="confirmed")
+                )
+                if claimed.rowcount != 1:
+                    db.refresh(booking)
+                    status = "already_confirmed" if booking.status == "confirmed" else booking.status
+                    return booking, status, None
+
+                # Payment success: the held seats become sold seats in one conditional UPDATE
+                sold = db.execute(
+                    update(Flight)
+                    .where(Flight.id == flight.id,
+                           Flight.seats_held >= seats_needed,
+                           Flight.seats_available >= seats_needed)
+                    .values(seats_available=Flight.seats_available - seats_needed,
+                            seats_held=Flight.seats_held - seats_needed)
+                )
+                if sold.rowcount != 1:
+                    # capacity cut below the hold (e.g. admin update): give the hold back
+                    _release_hold(db, booking, "cancelled", from_status="confirmed")
+                    return booking, "insufficient_seats", None
 
                 # Prefer locked snapshot if present on the reservation (better UX)
                 if getattr(booking, "price_snapshot", None) is not None:
@@ -205,6 +252,8 @@ def confirm_reservation(db: Session, reservation_id: int, payment_success: bool
 
                 db.add(flight)
                 db.add(booking)
+                # seats and price changed: drop memoised quotes for this flight
+                price_cache.invalidate_flight(flight.id)
                 # commit at context exit of `with db.begin()`
                 return booking, "confirmed", breakdown
 
@@ -263,13 +312,34 @@ def cancel_booking(db: Session, reservation_id: Optional[int] = None, pnr: Optio
     refund_amount = None
     refund_record_meta = None
 
+    was_confirmed = b.status == "confirmed"
+    if b.status == "reserved":
+        # give the held seats back (conditional: a concurrent confirm/expiry wins)
+        if not _release_hold(db, b, "cancelled"):
+            db.rollback()   # it moved meanwhile: cancel from its current state
+            return cancel_booking(db, reservation_id=b.id, refund=refund, refund_meta=refund_meta)
+    elif was_confirmed:
+        # only one cancel can move it out of 'confirmed' and restore its seats
+        res = db.execute(
+            update(Booking)
+            .where(Booking.id == b.id, Booking.status == "confirmed")
+            .values(status="cancelled")
+        )
+        if res.rowcount != 1:
+            db.rollback()
+            db.refresh(b)
+            return b, {"status": "already_cancelled", "refunded": False}
+
     # If booking is confirmed, restore seats and optionally refund
-    if b.status == "confirmed":
+    if was_confirmed:
         flight = db.get(Flight, b.flight_id)
         if flight:
             # restore seats
-            flight.seats_available = int(flight.seats_available) + int(b.seats_booked)
-            db.add(flight)
+            db.execute(
+                update(Flight)
+                .where(Flight.id == flight.id)
+                .values(seats_available=Flight.seats_available + int(b.seats_booked))
+            )
 
         # simulate refund
         if refund:
@@ -309,6 +379,8 @@ def cancel_booking(db: Session, reservation_id: Optional[int] = None, pnr: Optio
     db.add(b)
     db.commit()
     db.refresh(b)
+    if was_confirmed:
+        price_cache.invalidate_flight(b.flight_id)
 
     result = {
         "status": "cancelled",
@@ -0,0 +1,306 @@
+# app/services/demand_aggregator.py
+"""
+Demand scores from real search traffic.
+
+A background thread follows search_logs by primary key from a high-water
+mark (only rows it has not seen yet, an index range scan; on start it warms
+up from the last WARMUP_ROWS rows instead of the whole table). Every search
+bumps two exponentially decaying counters kept in memory, weighted by its
+age (searched_ts), so warm-up rows from hours or days ago count as old
+interest, not new; rows without searched_ts are skipped:
+
+    (origin, destination)          route interest
+    (origin, destination, date)    interest in one travel date
+
+Every FLUSH_SECONDS the counters are turned into 0..1 demand scores for the
+upcoming flights of the counted routes,
+
+    interest = date_count + ROUTE_SHARE * route_count
+    score    = interest / (interest + SATURATION)
+
+and written to demand_scores in bulk (one UPDATE executemany by primary
+key + one INSERT), skipping flights whose score barely moved. Routes whose
+counters decay away are written back to 0 once and forgotten.
+
+Only the holder of the "demand_aggregator" lease runs the job, so several
+workers never write the same scores twice.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import insert, select, text, tuple_, update
+
+from app.db import models
+from app.db.base import SessionLocal
+from app.services.pricing import price_cache
+from app.services.simulator_lease import SimulatorLease
+from app.utils import clock
+from app.utils.epoch_utils import now_ts
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Config
+# ----------------------------
+HALF_LIFE_SECONDS = float(os.environ.get("SKYFLY_DEMAND_HALF_LIFE_HOURS", "6")) * 3600
+POLL_SECONDS = float(os.environ.get("SKYFLY_DEMAND_POLL_SECONDS", "5"))
+FLUSH_SECONDS = float(os.environ.get("SKYFLY_DEMAND_FLUSH_SECONDS", "60"))
+WARMUP_ROWS = 20000      # recent search_logs rows replayed when the job (re)starts
+READ_BATCH = 5000        # rows per incremental read
+ROUTE_SHARE = 0.25       # weight of route-wide interest in a single date's score
+SATURATION = 25.0        # decayed searches at which a flight's score reaches 0.5
+MIN_COUNT = 0.05         # counters below this are dropped
+WRITE_EPSILON = 0.005    # score changes smaller than this are not written
+MAX_COUNTERS = 200000    # hard cap on tracked keys (smallest dropped first)
+CHUNK = 5000             # ids per IN (...) query
+
+Route = Tuple[str, str]
+
+_READ = text(
+    "SELECT id, origin_code, destination_code, search_date, searched_ts FROM search_logs "
+    "WHERE id > :hwm ORDER BY id LIMIT :limit"
+)
+
+
+class DecayingCounter:
+    """Exponentially decaying count (half-life HALF_LIFE_SECONDS); value() is read at any time."""
+
+    __slots__ = ("count", "at")
+
+    def __init__(self, at: float):
+        self.count = 0.0
+        self.at = at
+
+    def value(self, now: float) -> float:
+        return self.count * 0.5 ** ((now - self.at) / HALF_LIFE_SECONDS)
+
+    def add(self, now: float, amount: float = 1.0):
+        self.count = self.value(now) + amount
+        self.at = now
+
+
+def saturate(interest: float) -> float:
+    return interest / (interest + SATURATION) if interest > 0 else 0.0
+
+
+class DemandAggregator:
+    def __init__(self):
+        self.lease = SimulatorLease(name="demand_aggregator")
+        self._routes: Dict[Route, DecayingCounter] = {}
+        self._dates: Dict[Tuple[str, str, str], DecayingCounter] = {}
+        self._written: Set[Route] = set()         # routes with non-zero scores in the table
+        self._hwm: Optional[int] = None           # last search_logs id counted
+        self._baselined = False                   # old scores outside the counted routes reset
+        self._last_flush = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_flag = threading.Event()
+        self._lock = threading.Lock()
+        self.ingested = 0
+        self.flushes = 0
+        self.scores_written = 0
+        self.last_flush_ms: Optional[float] = None
+        self.errors = 0
+
+    # ----------------------------
+    # Background thread
+    # ----------------------------
+    def start(self):
+        """Start the background job (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._run, name="demand-aggregator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_flag.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+        self.lease.release()
+
+    def _run(self):
+        while not self._stop_flag.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Demand aggregation failed: %r", e)
+            self._stop_flag.wait(POLL_SECONDS)
+
+    def run_once(self, force_flush: bool = False) -> bool:
+        """One step: renew the lease, read new search_logs rows, flush scores when due. False on standby."""
+        if not self.lease.renew():
+            self._reset()     # a standby keeps no state; it warms up again if it takes over
+            return False
+        with self._lock:
+            self.ingest()
+            if force_flush or time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+                self.flush()
+        return True
+
+    def _reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._dates.clear()
+            self._written.clear()
+            self._hwm = None
+            self._baselined = False
+
+    # ----------------------------
+    # Ingest (search_logs -> counters)
+    # ----------------------------
+    def ingest(self) -> int:
+        """Count search_logs rows past the high-water mark. Returns rows read."""
+        db = SessionLocal()
+        try:
+            if self._hwm is None:
+                newest = db.execute(text("SELECT COALESCE(MAX(id), 0) FROM search_logs")).scalar()
+                self._hwm = max(0, newest - WARMUP_ROWS)
+            total = 0
+            while True:
+                rows = db.execute(_READ, {"hwm": self._hwm, "limit": READ_BATCH}).fetchall()
+                if not rows:
+                    break
+                now = clock.epoch()
+                for _, origin, destination, search_date, searched_ts in rows:
+                    self._count(origin, destination, search_date, searched_ts, now)
+                self._hwm = rows[-1][0]
+                total += len(rows)
+                if len(rows) < READ_BATCH:
+                    break
+            self.ingested += total
+            return total
+        finally:
+            db.close()
+
+    def _count(self, origin: Optional[str], destination: Optional[str], search_date: Optional[str],
+               searched_ts: Optional[int], now: float):
+        if not origin or not destination or origin == destination or searched_ts is None:
+            return
+        # a search already decayed by its age when it is read
+        weight = 0.5 ** (max(0.0, now - searched_ts) / HALF_LIFE_SECONDS)
+        if weight < MIN_COUNT:
+            return
+        route = (origin, destination)
+        self._routes.setdefault(route, DecayingCounter(now)).add(now, weight)
+        if search_date:
+            self._dates.setdefault((origin, destination, search_date[:10]), DecayingCounter(now)).add(now, weight)
+
+    def _prune(self, now: float):
+        for counters in (self._routes, self._dates):
+            for key in [k for k, c in counters.items() if c.value(now) < MIN_COUNT]:
+                del counters[key]
+            if len(counters) > MAX_COUNTERS:
+                for key in sorted(counters, key=lambda k: counters[k].value(now))[:len(counters) - MAX_COUNTERS]:
+                    del counters[key]
+
+    # ----------------------------
+    # Flush (counters -> demand_scores)
+    # ----------------------------
+    def score(self, origin: str, destination: str, flight_date: Optional[str], now: Optional[float] = None) -> float:
+        now = clock.epoch() if now is None else now
+        route = self._routes.get((origin, destination))
+        date = self._dates.get((origin, destination, flight_date)) if flight_date else None
+        interest = (date.value(now) if date else 0.0) + ROUTE_SHARE * (route.value(now) if route else 0.0)
+        return saturate(interest)
+
+    def flush(self) -> int:
+        """Write the current scores of every counted (or fading) route in bulk. Returns rows written."""
+        started = time.monotonic()
+        now = clock.epoch()
+        self._prune(now)
+        routes = set(self._routes) | self._written
+        updated_at = clock.utc_now().strftime("%Y-%m-%d %H:%M:%S")
+
+        db = SessionLocal()
+        try:
+            route_list = sorted(routes)
+            flights = []
+            for i in range(0, len(route_list), CHUNK // 2):
+                flights += db.execute(
+                    select(models.Flight.id, models.Flight.origin_code, models.Flight.destination_code,
+                           models.Flight.flight_date)
+                    .where(tuple_(models.Flight.origin_code, models.Flight.destination_code).in_(route_list[i:i + CHUNK // 2]))
+                    .where(models.Flight.departure_ts > now_ts())
+                ).all()
+
+            if not self._baselined:
+                # random-walk / stale scores outside the counted routes go back to neutral
+                counted = {fid for fid, *_ in flights}
+                stale = [fid for (fid,) in db.execute(
+                    select(models.DemandScore.flight_id).where(models.DemandScore.score != 0)
+                ).all() if fid not in counted]
+                for i in range(0, len(stale), CHUNK):
+                    db.execute(
+                        update(models.DemandScore)
+                        .where(models.DemandScore.flight_id.in_(stale[i:i + CHUNK]))
+                        .values(score=0.0, updated_at=updated_at)
+                    )
+
+            existing = {}
+            ids = [fid for fid, *_ in flights]
+            for i in range(0, len(ids), CHUNK):
+                for row_id, flight_id, score in db.execute(
+                    select(models.DemandScore.id, models.DemandScore.flight_id, models.DemandScore.score)
+                    .where(models.DemandScore.flight_id.in_(ids[i:i + CHUNK]))
+                    .order_by(models.DemandScore.id)
+                ):
+                    existing.setdefault(flight_id, (row_id, score))
+
+            changed, created, touched = [], [], []
+            for fid, origin, destination, flight_date in flights:
+                target = round(self.score(origin, destination, flight_date, now), 4)
+                if fid in existing:
+                    row_id, current = existing[fid]
+                    if abs((current or 0.0) - target) < WRITE_EPSILON:
+                        continue
+                    changed.append({"id": row_id, "score": target, "updated_at": updated_at})
+                elif target >= WRITE_EPSILON:
+                    created.append({"flight_id": fid, "origin_code": origin, "destination_code": destination,
+                                    "score": target})
+                else:
+                    continue
+                touched.append(fid)
+
+            if changed:
+                db.execute(update(models.DemandScore), changed)
+            if created:
+                db.execute(insert(models.DemandScore), created)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        price_cache.invalidate_flights(touched)
+        self._written = set(self._routes)
+        self._baselined = True
+        self._last_flush = time.monotonic()
+        self.flushes += 1
+        self.scores_written += len(touched)
+        self.last_flush_ms = round((time.monotonic() - started) * 1000.0, 1)
+        return len(touched)
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "leader": self.lease.is_leader,
+            "high_water_mark": self._hwm,
+            "ingested": self.ingested,
+            "routes": len(self._routes),
+            "route_dates": len(self._dates),
+            "flushes": self.flushes,
+            "scores_written": self.scores_written,
+            "last_flush_ms": self.last_flush_ms,
+            "half_life_hours": HALF_LIFE_SECONDS / 3600,
+            "errors": self.errors,
+        }
+
+
+# Global singleton instance
+demand_aggregator = DemandAggregator()
@@ -0,0 +1,236 @@
+# app/services/demand_events.py
+"""
+Calendar demand events (surges) applied at price time.
+
+A surge is one demand_events row: a destination city (or one route), a
+[start, end) window, a magnitude added to the flights' 0..1 demand score and
+a decay curve. Pricing asks this index for the boost of each flight it prices,
+so starting or ending a surge is a single row write that moves every affected
+price at once; demand_scores rows are never rewritten for it.
+
+The active events live in memory, grouped by scope key and sorted by start
+(an interval index: a lookup bisects to the events already started and keeps
+those not yet ended). Writes through this module refresh the index straight
+away; other processes notice within REFRESH_SECONDS through a cheap
+COUNT / MAX(updated_ts) / SUM(ends_ts) check. cache_token() changes on
+every reload and whenever an event starts or ends; it is part of the
+price-cache key.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_, select, update
+
+from app.db import models
+from app.db.base import SessionLocal
+from app.utils import clock
+from app.utils.epoch_utils import now_ts
+from app.utils.location_utils import location_code
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Config
+# ----------------------------
+REFRESH_SECONDS = float(os.environ.get("SKYFLY_DEMAND_EVENTS_REFRESH", "2"))
+SCOPES = ("destination", "route")
+DECAYS = ("flat", "linear", "exponential")
+DEFAULT_HALF_LIFE = 6 * 3600
+
+Key = Tuple[Optional[str], str]   # (origin_code or None for destination scope, destination_code)
+
+
+def event_boost(event, at: float) -> float:
+    """Demand added by one event at epoch `at` (0 outside its window)."""
+    if at < event.starts_ts or (event.ends_ts is not None and at >= event.ends_ts):
+        return 0.0
+    elapsed = at - event.starts_ts
+    if event.decay == "linear" and event.ends_ts is not None:
+        return event.magnitude * (1.0 - elapsed / float(event.ends_ts - event.starts_ts))
+    if event.decay == "exponential":
+        return event.magnitude * 0.5 ** (elapsed / float(event.half_life_seconds or DEFAULT_HALF_LIFE))
+    return event.magnitude
+
+
+class _Event:
+    __slots__ = ("id", "label", "scope", "origin_code", "destination_code", "starts_ts", "ends_ts",
+                 "magnitude", "decay", "half_life_seconds")
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, getattr(row, name))
+
+    @property
+    def key(self) -> Key:
+        return (self.origin_code if self.scope == "route" else None, self.destination_code)
+
+    def as_dict(self, at: Optional[float] = None) -> dict:
+        out = {name: getattr(self, name) for name in self.__slots__}
+        if at is not None:
+            out["boost"] = round(event_boost(self, at), 4)
+        return out
+
+
+class DemandEventIndex:
+    def __init__(self):
+        self._by_key: Dict[Key, List[_Event]] = {}     # sorted by starts_ts
+        self._starts: Dict[Key, List[int]] = {}
+        self._boundaries: List[int] = []                # every start/end, sorted (see cache_token)
+        self._signature = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.version = 0
+        self.reloads = 0
+
+    # ----------------------------
+    # Loading
+    # ----------------------------
+    def refresh(self, force: bool = False):
+        """Reload if the table changed (checked at most every REFRESH_SECONDS unless forced)."""
+        if not force and time.monotonic() - self._checked < REFRESH_SECONDS:
+            return
+        self._checked = time.monotonic()
+        db = SessionLocal()
+        try:
+            table = models.DemandEvent
+            signature = tuple(db.execute(select(
+                func.count(table.id), func.max(table.updated_ts), func.sum(func.coalesce(table.ends_ts, 0)),
+            )).one())
+            if signature == self._signature and not force:
+                return
+            rows = db.execute(
+                select(table).where(or_(table.ends_ts.is_(None), table.ends_ts > now_ts()))
+                .order_by(table.starts_ts, table.id)
+            ).scalars().all()
+            events = [_Event(r) for r in rows]
+        except Exception as e:
+            logger.warning("Demand events refresh failed: %r", e)
+            return
+        finally:
+            db.close()
+
+        by_key: Dict[Key, List[_Event]] = {}
+        for ev in events:
+            by_key.setdefault(ev.key, []).append(ev)
+        with self._lock:
+            self._by_key = by_key
+            self._starts = {k: [ev.starts_ts for ev in evs] for k, evs in by_key.items()}
+            self._boundaries = sorted([ev.starts_ts for ev in events] + [ev.ends_ts for ev in events if ev.ends_ts])
+            self._signature = signature
+            self.version += 1
+            self.reloads += 1
+
+    # ----------------------------
+    # Lookups (pricing path)
+    # ----------------------------
+    def _active(self, key: Key, at: float) -> Iterable[_Event]:
+        events = self._by_key.get(key)
+        if not events:
+            return ()
+        started = bisect.bisect_right(self._starts[key], at)
+        return [ev for ev in events[:started] if ev.ends_ts is None or at < ev.ends_ts]
+
+    def cache_token(self, at: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Changes whenever the set of active events can have changed: on reload, and
+        when `at` passes a loaded event's start or end. Part of the price-cache key.
+        """
+        at = clock.epoch() if at is None else at
+        return (self.version, bisect.bisect_right(self._boundaries, at))
+
+    def boost(self, origin_code: Optional[str], destination_code: Optional[str], at: Optional[float] = None) -> float:
+        """Total demand boost for a flight on origin->destination at epoch `at` (default: now)."""
+        if not self._by_key or destination_code is None:
+            return 0.0
+        at = clock.epoch() if at is None else at
+        total = 0.0
+        keys = [(None, destination_code)] + ([(origin_code, destination_code)] if origin_code else [])
+        for key in keys:
+            for ev in self._active(key, at):
+                total += event_boost(ev, at)
+        return total
+
+    def boosts(self, flights: Sequence, at: Optional[float] = None) -> List[float]:
+        """boost() for a batch of flight rows (aligned with `flights`)."""
+        self.refresh()
+        if not self._by_key:
+            return [0.0] * len(flights)
+        at = clock.epoch() if at is None else at
+        return [
+            self.boost(getattr(f, "origin_code", None), getattr(f, "destination_code", None), at)
+            for f in flights
+        ]
+
+    def active(self, at: Optional[float] = None) -> List[dict]:
+        self.refresh()
+        at = clock.epoch() if at is None else at
+        return [ev.as_dict(at) for evs in self._by_key.values() for ev in evs
+                if ev.starts_ts <= at and (ev.ends_ts is None or at < ev.ends_ts)]
+
+    # ----------------------------
+    # Writes (one row each)
+    # ----------------------------
+    def create(self, destination: str, magnitude: float, origin: Optional[str] = None,
+               starts_ts: Optional[int] = None, duration_seconds: Optional[int] = None,
+               decay: str = "flat", half_life_seconds: Optional[int] = None, label: Optional[str] = None) -> dict:
+        """Insert an event (destination scope, or route scope when `origin` is given) and apply it now."""
+        if decay not in DECAYS:
+            raise ValueError(f"decay must be one of {', '.join(DECAYS)}")
+        starts_ts = now_ts() if starts_ts is None else int(starts_ts)
+        row = models.DemandEvent(
+            label=label,
+            scope="route" if origin else "destination",
+            origin_code=location_code(origin) if origin else None,
+            destination_code=location_code(destination),
+            starts_ts=starts_ts,
+            ends_ts=starts_ts + int(duration_seconds) if duration_seconds else None,
+            magnitude=float(magnitude),
+            decay=decay,
+            half_life_seconds=half_life_seconds,
+        )
+        db = SessionLocal()
+        try:
+            db.add(row)
+            db.commit()
+            created = _Event(row)
+        finally:
+            db.close()
+        self.refresh(force=True)
+        return created.as_dict()
+
+    def end(self, destination: str, origin: Optional[str] = None) -> int:
+        """End the active events of a destination (all its scopes, or one route) now. Returns how many."""
+        table = models.DemandEvent
+        now = now_ts()
+        stmt = (
+            update(table)
+            .where(table.destination_code == location_code(destination))
+            .where(or_(table.ends_ts.is_(None), table.ends_ts > now))
+            .values(ends_ts=now, updated_ts=now)
+        )
+        if origin:
+            stmt = stmt.where(table.origin_code == location_code(origin))
+        db = SessionLocal()
+        try:
+            count = db.execute(stmt).rowcount
+            db.commit()
+        finally:
+            db.close()
+        self.refresh(force=True)
+        return count
+
+    def stats(self) -> dict:
+        return {
+            "loaded": sum(len(evs) for evs in self._by_key.values()),
+            "keys": len(self._by_key),
+            "version": self.version,
+            "reloads": self.reloads,
+        }
+
+
+# Global singleton instance
+demand_events = DemandEventIndex()
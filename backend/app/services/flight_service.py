@@ -1,14 +1,20 @@
 # app/services/flight_service.py
-from app.services.pricing import calculate_price
-from typing import List, Optional
+from app.services.pricing import calculate_price, price_cache
+from typing import List, Optional, Tuple
 from sqlalchemy import select, asc, desc, func
 from sqlalchemy.orm import Session
 from app.db.models import Flight
 from app.schemas.flight import FlightCreate, FlightUpdate
 from app.db import models
+from app.utils.pagination import keyset_paginate
+
+
 def list_flights(db: Session, limit: int = 50, offset: int = 0) -> List[Flight]:
-    stmt = select(Flight).limit(limit).offset(offset)
-    return db.execute(stmt).scalars().all()
+    return list_flights_page(db, limit=limit, offset=offset)[0]
+
+def list_flights_page(db: Session, limit: int = 50, offset: int = 0, cursor: Optional[str] = None) -> Tuple[List[Flight], Optional[str]]:
+    """Flights ordered by id, plus the cursor for the next page (None on the last page)."""
+    return keyset_paginate(db.query(Flight), key="id", id_column=Flight.id, limit=limit, cursor=cursor, offset=offset)
 
 def get_flight(db: Session, flight_id: int) -> Optional[Flight]:
     return db.get(Flight, flight_id)
@@ -43,6 +49,7 @@ def update_flight(db: Session, flight_obj: Flight, updates: FlightUpdate) -> Fli
     db.add(flight_obj)
     db.commit()
     db.refresh(flight_obj)
+    price_cache.invalidate_flight(flight_obj.id)
     return flight_obj
 
 def delete_flight(db: Session, flight_obj: Flight) -> None:
@@ -0,0 +1,192 @@
+# app/services/popular_routes.py
+"""
+Materialized popular-routes list for the homepage.
+
+Routes are ranked by recent search_logs volume (padded with the default
+routes), and the cheapest upcoming fare for every route is found in one
+ROW_NUMBER() window query, then priced dynamically. The result lives in
+memory: /flights/popular is a list read, rebuilt when the TTL expires or
+when the simulator reprices a flight on one of the cached routes.
+"""
+import logging
+import threading
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_, text
+
+from app.db import models
+from app.services.pricing import cached_prices_for_flights
+from app.utils.epoch_utils import now_ts
+from app.utils.price_utils import should_update_price, DEFAULT_MIN_UPDATE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Config
+# ----------------------------
+DEFAULT_ROUTES = [
+    ("HYD", "BLR"),
+    ("HYD", "DEL"),
+    ("HYD", "MAA"),
+    ("BLR", "DEL"),
+    ("BLR", "BOM"),
+    ("DEL", "BOM"),
+]
+FALLBACK_PRICE = 2499.0     # shown when a route has no upcoming flight
+MAX_ROUTES = 50             # matches the endpoint's max limit
+SEARCH_WINDOW = 50000       # rank over the most recent N search_logs rows
+CANDIDATES_PER_ROUTE = 3    # cheapest-by-published-price flights re-priced per route
+TTL_SECONDS = 120
+
+Route = Tuple[str, str]
+
+
+def rank_routes(db, limit: int = MAX_ROUTES) -> List[Route]:
+    """Most searched (origin_code, destination_code) pairs, padded with DEFAULT_ROUTES."""
+    ranked: List[Route] = []
+    try:
+        rows = db.execute(
+            text(
+                """
+                SELECT origin_code, destination_code, COUNT(*) AS n
+                FROM search_logs
+                WHERE id > (SELECT COALESCE(MAX(id), 0) FROM search_logs) - :window
+                  AND origin_code IS NOT NULL AND destination_code IS NOT NULL
+                  AND origin_code != destination_code
+                GROUP BY origin_code, destination_code
+                ORDER BY n DESC, origin_code, destination_code
+                LIMIT :limit
+                """
+            ),
+            {"window": SEARCH_WINDOW, "limit": limit},
+        ).fetchall()
+        ranked = [(r[0], r[1]) for r in rows]
+    except Exception as e:
+        logger.warning("Popular routes ranking failed (using defaults): %r", e)
+
+    seen = set(ranked)
+    for route in DEFAULT_ROUTES:
+        if len(ranked) >= limit:
+            break
+        if route not in seen:
+            ranked.append(route)
+            seen.add(route)
+    return ranked[:limit]
+
+
+def cheapest_fares(db, routes: List[Route]) -> dict:
+    """
+    {route: (flight_id, price)} for the cheapest upcoming flight on each route.
+
+    One window query picks the CANDIDATES_PER_ROUTE cheapest flights by
+    published price per route; those are priced dynamically in one batch and
+    the lowest displayed price wins (published price while in cooldown, as in search).
+    """
+    if not routes:
+        return {}
+    Flight = models.Flight
+    rn = func.row_number().over(
+        partition_by=(Flight.origin_code, Flight.destination_code),
+        order_by=(Flight.price_real.asc(), Flight.id.asc()),
+    ).label("rn")
+    ranked = (
+        db.query(Flight.id.label("id"), rn)
+        .filter(
+            # OR of (origin, destination) pairs: one idx_flights_route_date seek per route
+            or_(*[and_(Flight.origin_code == o, Flight.destination_code == d) for o, d in routes]),
+            Flight.departure_ts > now_ts(),
+        )
+        .subquery()
+    )
+    flights = (
+        db.query(Flight)
+        .join(ranked, ranked.c.id == Flight.id)
+        .filter(ranked.c.rn <= CANDIDATES_PER_ROUTE)
+        .all()
+    )
+    if not flights:
+        return {}
+
+    ids = [f.id for f in flights]
+    demand_map = {
+        ds.flight_id: ds.score
+        for ds in db.query(models.DemandScore).filter(models.DemandScore.flight_id.in_(ids)).all()
+    }
+    priced = cached_prices_for_flights(flights, [float(demand_map.get(i, 0.0)) for i in ids])
+
+    best = {}
+    for f, (price, _) in zip(flights, priced):
+        if price is None or not should_update_price(f.last_price_updated_ts, DEFAULT_MIN_UPDATE_SECONDS):
+            price = float(f.price_real)
+        route = (f.origin_code, f.destination_code)
+        if route not in best or price < best[route][1]:
+            best[route] = (f.id, round(float(price), 2))
+    return best
+
+
+class PopularRoutesCache:
+    def __init__(self, ttl: float = TTL_SECONDS):
+        self.ttl = ttl
+        self._items: List[dict] = []
+        self._routes: Set[Route] = set()
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.hits = 0
+
+    def _fresh(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < self.ttl
+
+    def refresh(self, db, if_stale: bool = False) -> List[dict]:
+        """Recompute the list (two queries) and swap it in."""
+        with self._lock:
+            if if_stale and self._fresh():
+                return self._items  # another request rebuilt it while we waited
+            routes = rank_routes(db, MAX_ROUTES)
+            fares = cheapest_fares(db, routes)
+            items = []
+            for route in routes:
+                flight_id, price = fares.get(route, (None, FALLBACK_PRICE))
+                items.append({
+                    "origin": route[0],
+                    "destination": route[1],
+                    "dynamic_price": price,
+                    "flight_id": flight_id,
+                })
+            self._items = items
+            self._routes = set(routes)
+            self._built_at = time.monotonic()
+            self.refreshes += 1
+            return items
+
+    def get(self, db, limit: int) -> List[dict]:
+        """Cached list (rebuilt first if stale)."""
+        if self._fresh():
+            self.hits += 1
+            items = self._items
+        else:
+            items = self.refresh(db, if_stale=True)
+        return [dict(item) for item in items[:limit]]
+
+    def invalidate(self):
+        self._built_at = None
+
+    def refresh_if_affected(self, db, routes: Iterable[Route]) -> bool:
+        """Rebuild now if any of `routes` is on the cached list (called after simulator repricing)."""
+        if self._built_at is None or self._routes.isdisjoint(routes):
+            return False
+        try:
+            self.refresh(db)
+        except Exception as e:
+            logger.warning("Popular routes refresh failed: %r", e)
+            self.invalidate()
+        return True
+
+    def stats(self) -> dict:
+        age = None if self._built_at is None else round(time.monotonic() - self._built_at, 1)
+        return {"routes": len(self._items), "age_seconds": age, "refreshes": self.refreshes, "hits": self.hits}
+
+
+# Global singleton instance
+popular_routes = PopularRoutesCache()
@@ -1,7 +1,15 @@
 # app/services/pricing.py
+from collections import OrderedDict
 from datetime import datetime, timezone
 from math import exp, log
-from typing import Optional
+from typing import Optional, Sequence, List, Tuple, Dict, Iterable
+import threading
+
+import numpy as np
+
+from app.services.demand_events import demand_events
+from app.utils import clock
+from app.utils.epoch_utils import schedule_iso_to_ts
 
 # TUNABLE PARAMETERS (business knobs)
 TIME_MAX_MULT = 1.6        # up to +60% due to time pressure
@@ -12,18 +20,29 @@ DEMAND_WEIGHT = 0.45       # weight of demand score influence
 MIN_PRICE_FACTOR = 0.6     # floor (60% of base)
 MAX_PRICE_FACTOR = 3.0     # cap (3x base)
 
-def _hours_to_departure(departure_iso: Optional[str], now: Optional[datetime]):
-    if not departure_iso:
-        return None
-    try:
-        dep = datetime.fromisoformat(departure_iso)
-    except Exception:
-        return None
-    if dep.tzinfo is None:
-        dep = dep.replace(tzinfo=timezone.utc)
+# Price memo cache
+PRICE_BUCKET_SECONDS = 300 # sameday_factor steps every 5 minutes
+PRICE_CACHE_SIZE = 50000   # max cached (flight, bucket) entries
+
+def _departure_epoch(flight_row) -> Optional[int]:
+    """UTC departure epoch: the indexed departure_ts column, parsing departure_iso only for unsaved rows."""
+    dep_ts = getattr(flight_row, "departure_ts", None)
+    if dep_ts is not None:
+        return dep_ts
+    return schedule_iso_to_ts(getattr(flight_row, "departure_iso", None))
+
+def _now_epoch(now: Optional[datetime]) -> float:
+    if now is None:
+        now = clock.utc_now()
     if now.tzinfo is None:
         now = now.replace(tzinfo=timezone.utc)
-    return (dep - now).total_seconds() / 3600.0
+    return now.timestamp()
+
+def _hours_to_departure(departure_ts: Optional[int], now: Optional[datetime]):
+    # epoch arithmetic shared by the scalar and batch paths
+    if departure_ts is None:
+        return None
+    return (departure_ts - _now_epoch(now)) / 3600.0
 
 def time_factor(hours: Optional[float]):
     if hours is None:
@@ -43,6 +62,12 @@ def seat_factor(seats_available: int, seats_total: int):
     factor = 1.0 + SEAT_ALPHA * (1.0 - exp(-SEAT_BETA * scarcity))
     return float(factor)
 
+def with_event_boost(demand_score: Optional[float], boost: float) -> Optional[float]:
+    """Demand score plus the active demand events' boost (see demand_events), capped at 1.0."""
+    if not boost:
+        return demand_score
+    return min(1.0, (demand_score or 0.0) + boost)
+
 def demand_factor(demand_score: Optional[float]):
     if demand_score is None:
         demand_score = 0.0
@@ -75,13 +100,25 @@ def sameday_factor(hours: Optional[float]):
     # Linear approximation for predictable steps: 1 + (N * 0.005)
     return 1.0 + (intervals * 0.005)
 
+def _breakdown(base, hours, t_mult, s_mult, d_mult, sd_mult, raw, final):
+    return {
+        "base": round(base,2),
+        "hours_to_departure": None if hours is None else round(hours,2),
+        "time_mult": round(t_mult,4),
+        "seat_mult": round(s_mult,4),
+        "demand_mult": round(d_mult,4),
+        "sameday_mult": round(sd_mult,4),
+        "raw_price": round(raw,2),
+        "clamped_price": round(final,2)
+    }
+
 def calculate_price(flight_row, demand_score: Optional[float] = None, now: Optional[datetime] = None):
     """
-    flight_row: ORM obj or dict with 'base_price', 'price_real', 'seats_available', 'seats_total', 'departure_iso'
+    flight_row: ORM obj or dict with 'base_price', 'price_real', 'seats_available', 'seats_total', 'departure_ts'/'departure_iso'
     returns (new_price: float, breakdown: dict)
     """
     if now is None:
-        now = datetime.utcnow().replace(tzinfo=timezone.utc)
+        now = clock.utc_now()
 
     base = getattr(flight_row, "base_price", None) or getattr(flight_row, "price_real", 0.0)
     try:
@@ -91,25 +128,242 @@ def calculate_price(flight_row, demand_score: Optional[float] = None, now: Optio
 
     seats_available = int(getattr(flight_row, "seats_available", 0))
     seats_total = int(getattr(flight_row, "seats_total", seats_available or 1))
-    departure_iso = getattr(flight_row, "departure_iso", None)
 
-    hours = _hours_to_departure(departure_iso, now)
+    hours = _hours_to_departure(_departure_epoch(flight_row), now)
     t_mult = time_factor(hours)
     s_mult = seat_factor(seats_available, seats_total)
-    d_mult = demand_factor(demand_score)
+    d_mult = demand_factor(with_event_boost(demand_score, demand_events.boosts([flight_row], _now_epoch(now))[0]))
     sd_mult = sameday_factor(hours)  # Same-Day Surge
 
     raw = base * t_mult * s_mult * d_mult * sd_mult
     final = clamp_price(base, raw)
 
-    breakdown = {
-        "base": round(base,2),
-        "hours_to_departure": None if hours is None else round(hours,2),
-        "time_mult": round(t_mult,4),
-        "seat_mult": round(s_mult,4),
-        "demand_mult": round(d_mult,4),
-        "sameday_mult": round(sd_mult,4),
-        "raw_price": round(raw,2),
-        "clamped_price": round(final,2)
-    }
+    breakdown = _breakdown(base, hours, t_mult, s_mult, d_mult, sd_mult, raw, final)
     return round(final,2), breakdown
+
+
+# ------------------------------------------------------------
+# Batch pricing (one call per search page / simulator tick)
+# ------------------------------------------------------------
+def calculate_prices_batch(
+    base: Sequence[float],
+    seats_available: Sequence[int],
+    seats_total: Sequence[int],
+    departure_ts: Sequence[Optional[float]],
+    demand: Sequence[Optional[float]],
+    now: Optional[datetime] = None,
+    with_breakdown: bool = True,
+) -> List[Tuple[float, Optional[dict]]]:
+    """
+    Vectorised calculate_price() over column arrays (one entry per flight).
+    departure_ts is a UTC epoch (None/NaN when unknown), demand may contain None.
+    Returns [(price, breakdown)] in input order; values are identical to the scalar function.
+    """
+    now_ts = _now_epoch(now)
+
+    base = np.asarray(base, dtype=float)
+    avail = np.asarray(seats_available, dtype=float)
+    total = np.asarray(seats_total, dtype=float)
+    dep = np.asarray([np.nan if d is None else d for d in departure_ts], dtype=float)
+    ds = np.asarray([0.0 if d is None else d for d in demand], dtype=float)
+    n = base.shape[0]
+    if n == 0:
+        return []
+
+    hours = (dep - now_ts) / 3600.0
+    known = ~np.isnan(hours)
+
+    # time factor
+    t_mult = np.ones(n)
+    ahead = known & (hours > 0)
+    t_mult[known & (hours <= 0)] = TIME_MAX_MULT
+    t_mult[ahead] = 1.0 + (TIME_MAX_MULT - 1.0) * (1.0 / (1.0 + (hours[ahead] / TIME_HALF_HOURS)))
+
+    # seat factor: math.exp over the (few) distinct scarcity values keeps parity with seat_factor()
+    s_mult = np.ones(n)
+    has_total = total > 0
+    if has_total.any():
+        scarcity = np.maximum(0.0, 1.0 - avail[has_total] / total[has_total])
+        uniq, inv = np.unique(scarcity, return_inverse=True)
+        curve = np.array([exp(-SEAT_BETA * u) for u in uniq.tolist()])
+        s_mult[has_total] = 1.0 + SEAT_ALPHA * (1.0 - curve[inv])
+
+    # demand factor
+    d_mult = 1.0 + (np.clip(ds, 0.0, 1.0) * DEMAND_WEIGHT)
+
+    # same-day surge
+    sd_mult = np.ones(n)
+    sameday = known & (hours < 24.0) & (hours >= 0)
+    sd_mult[sameday] = 1.0 + (((24.0 - hours[sameday]) * 12.0) * 0.005)
+
+    raw = base * t_mult * s_mult * d_mult * sd_mult
+    final = np.maximum(base * MIN_PRICE_FACTOR, np.minimum(raw, base * MAX_PRICE_FACTOR))
+
+    finals = final.tolist()
+    if not with_breakdown:
+        return [(round(p,2), None) for p in finals]
+
+    out = []
+    cols = zip(base.tolist(), hours.tolist(), known.tolist(), t_mult.tolist(), s_mult.tolist(),
+               d_mult.tolist(), sd_mult.tolist(), raw.tolist(), finals)
+    for b, h, k, t, s, d, sd, r, f in cols:
+        out.append((round(f,2), _breakdown(b, h if k else None, t, s, d, sd, r, f)))
+    return out
+
+def calculate_prices_for_flights(
+    flights: Sequence,
+    demand_scores: Sequence[Optional[float]],
+    now: Optional[datetime] = None,
+    with_breakdown: bool = True,
+    events_at: Optional[float] = None,
+) -> List[Tuple[float, Optional[dict]]]:
+    """
+    Batch counterpart of calculate_price() for ORM rows/objects.
+    demand_scores is aligned with flights; the demand events active at
+    `events_at` (default: `now`) are added per flight.
+    """
+    boosts = demand_events.boosts(flights, _now_epoch(now) if events_at is None else events_at)
+    demand_scores = [with_event_boost(d, b) for d, b in zip(demand_scores, boosts)]
+    base, avail, total, dep = [], [], [], []
+    for f in flights:
+        b = getattr(f, "base_price", None) or getattr(f, "price_real", 0.0)
+        try:
+            b = float(b)
+        except Exception:
+            b = 0.0
+        sa = int(getattr(f, "seats_available", 0))
+        base.append(b)
+        avail.append(sa)
+        total.append(int(getattr(f, "seats_total", sa or 1)))
+        dep.append(_departure_epoch(f))
+    return calculate_prices_batch(base, avail, total, dep, demand_scores, now=now, with_breakdown=with_breakdown)
+
+
+# ------------------------------------------------------------
+# Price memo cache
+# ------------------------------------------------------------
+class PriceCache:
+    """
+    Bounded LRU of computed prices keyed by
+    (flight_id, 5-minute bucket, seats_available, demand version, demand events token).
+
+    Prices are computed at the start of their bucket, so a hit returns exactly
+    what a miss would have computed. Demand/inventory writers call
+    invalidate_flight() to bump the flight's demand version; starting or
+    ending a demand event changes demand_events.cache_token(), which covers
+    every flight (a decaying event's boost is re-read once per bucket).
+    """
+
+    def __init__(self, maxsize: int = PRICE_CACHE_SIZE, bucket_seconds: int = PRICE_BUCKET_SECONDS):
+        self.maxsize = maxsize
+        self.bucket_seconds = bucket_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def bucket(self, now_ts: float) -> int:
+        return int(now_ts // self.bucket_seconds)
+
+    def _key(self, flight_id: int, bucket: int, seats: int, events: tuple = ()) -> tuple:
+        return (flight_id, bucket, seats, self._generation, self._versions.get(flight_id, 0), events)
+
+    def get(self, flight_id: int, bucket: int, seats: int, demand_score: float, events: tuple = ()):
+        with self._lock:
+            key = self._key(flight_id, bucket, seats, events)
+            entry = self._entries.get(key)
+            # the stored score also guards against demand written by another process
+            if entry is None or entry[0] != demand_score:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, flight_id: int, bucket: int, seats: int, demand_score: float, priced: tuple, events: tuple = ()):
+        with self._lock:
+            self._entries[self._key(flight_id, bucket, seats, events)] = (demand_score, priced)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_flight(self, flight_id: Optional[int]):
+        if flight_id is None:
+            return
+        with self._lock:
+            self._versions[flight_id] = self._versions.get(flight_id, 0) + 1
+            self.invalidations += 1
+
+    def invalidate_flights(self, flight_ids: Iterable[int]):
+        for fid in flight_ids:
+            self.invalidate_flight(fid)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._versions.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bucket_seconds": self.bucket_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global singleton instance
+price_cache = PriceCache()
+
+
+def cached_prices_for_flights(
+    flights: Sequence,
+    demand_scores: Sequence[Optional[float]],
+    now: Optional[datetime] = None,
+) -> List[Tuple[float, Optional[dict]]]:
+    """
+    calculate_prices_for_flights() through price_cache.
+    Misses are priced together in one batch at the start of the current bucket.
+    """
+    now_epoch = _now_epoch(now)
+    demand_events.refresh()
+    events = demand_events.cache_token(now_epoch)
+    bucket = price_cache.bucket(now_epoch)
+    bucket_start = datetime.fromtimestamp(bucket * price_cache.bucket_seconds, tz=timezone.utc)
+
+    out: List[Optional[tuple]] = []
+    missing = []
+    for i, (f, ds) in enumerate(zip(flights, demand_scores)):
+        fid = getattr(f, "id", None)
+        hit = None
+        if fid is not None:
+            hit = price_cache.get(fid, bucket, int(getattr(f, "seats_available", 0)), ds, events)
+        out.append(hit)
+        if hit is None:
+            missing.append(i)
+
+    if missing:
+        priced = calculate_prices_for_flights(
+            [flights[i] for i in missing],
+            [demand_scores[i] for i in missing],
+            now=bucket_start,
+            events_at=now_epoch,   # an event applies as soon as it starts, not from the next bucket
+        )
+        for i, result in zip(missing, priced):
+            out[i] = result
+            fid = getattr(flights[i], "id", None)
+            if fid is not None:
+                price_cache.put(fid, bucket, int(getattr(flights[i], "seats_available", 0)), demand_scores[i], result, events)
+    return out
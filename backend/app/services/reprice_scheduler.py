@@ -0,0 +1,200 @@
+# app/services/reprice_scheduler.py
+"""
+Due-time scheduler for simulator repricing.
+
+Every upcoming flight has a next-reprice time that depends on how close it
+is to departure (5 minutes for same-day flights, hours for distant ones).
+The times live in a min-heap kept incrementally: the catalog is read once
+(id + departure_ts only), new/moved/deleted flights are tracked through ORM
+events, and each simulator tick pops only the flights that are due instead
+of loading the whole flights table and sampling it.
+
+Stale heap entries (a flight rescheduled or removed since it was pushed)
+are skipped lazily when they reach the top.
+"""
+import heapq
+import logging
+import random
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, text
+
+from app.db import models
+from app.utils.epoch_utils import now_ts
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Config: reprice cadence by time to departure
+# ----------------------------
+_CADENCE = [
+    (24 * 3600, 5 * 60),          # departs within a day   -> every 5 minutes
+    (3 * 24 * 3600, 15 * 60),     # within 3 days          -> every 15 minutes
+    (7 * 24 * 3600, 60 * 60),     # within a week          -> hourly
+    (30 * 24 * 3600, 3 * 3600),   # within a month         -> every 3 hours
+]
+_FAR_CADENCE = 6 * 3600           # further out            -> every 6 hours
+RETRY_SECONDS = 60                # a failed tick retries its flights after this
+RESYNC_SECONDS = 3600             # re-read the catalog (catches writes made outside the ORM)
+
+
+def cadence_for(seconds_to_departure: float) -> Optional[int]:
+    """Seconds until a flight departing in `seconds_to_departure` should be repriced again (None: departed)."""
+    if seconds_to_departure <= 0:
+        return None
+    for horizon, cadence in _CADENCE:
+        if seconds_to_departure < horizon:
+            return cadence
+    return _FAR_CADENCE
+
+
+class RepriceScheduler:
+    def __init__(self):
+        self._heap: List[Tuple[int, int]] = []        # (due_ts, flight_id)
+        self._due: Dict[int, int] = {}                # flight_id -> current due_ts
+        self._departures: Dict[int, int] = {}         # flight_id -> departure_ts
+        self._lock = threading.Lock()
+        self.rng = random.Random()                    # startup offsets (seeded by simulator.seed())
+        self._loaded_at: Optional[int] = None
+        self.loads = 0
+        self.popped = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def needs_load(self, now: Optional[int] = None) -> bool:
+        now = now_ts() if now is None else now
+        return self._loaded_at is None or now - self._loaded_at >= RESYNC_SECONDS
+
+    def load(self, db, now: Optional[int] = None) -> int:
+        """
+        (Re)read upcoming flights (id, departure_ts). Flights already scheduled keep
+        their due time; new ones get a random offset within their cadence so the
+        first ticks after startup aren't one giant batch. Returns the number scheduled.
+        """
+        now = now_ts() if now is None else now
+        rows = db.execute(
+            text("SELECT id, departure_ts FROM flights WHERE departure_ts > :now ORDER BY id"), {"now": now}
+        ).fetchall()
+        with self._lock:
+            seen = set()
+            for flight_id, departure_ts in rows:
+                seen.add(flight_id)
+                moved = self._departures.get(flight_id) != departure_ts
+                self._departures[flight_id] = departure_ts
+                if flight_id in self._due and not moved:
+                    continue
+                cadence = cadence_for(departure_ts - now)
+                self._push(flight_id, now + int(self.rng.uniform(0, cadence)))
+            for flight_id in [f for f in self._departures if f not in seen]:
+                self._forget(flight_id)
+            self._loaded_at = now
+            self.loads += 1
+            return len(self._due)
+
+    # ----------------------------
+    # Heap maintenance (caller holds the lock)
+    # ----------------------------
+    def _push(self, flight_id: int, due_ts: int):
+        self._due[flight_id] = due_ts
+        heapq.heappush(self._heap, (due_ts, flight_id))
+
+    def _forget(self, flight_id: int):
+        self._due.pop(flight_id, None)
+        self._departures.pop(flight_id, None)
+
+    def _compact(self):
+        """Drop stale entries once they outnumber live ones."""
+        if len(self._heap) > 2 * len(self._due) + 1024:
+            self._heap = [(due_ts, flight_id) for flight_id, due_ts in self._due.items()]
+            heapq.heapify(self._heap)
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def pop_due(self, now: Optional[int] = None, limit: int = 500) -> List[int]:
+        """Remove and return up to `limit` flight ids due by `now` (most overdue first)."""
+        now = now_ts() if now is None else now
+        out: List[int] = []
+        with self._lock:
+            while self._heap and len(out) < limit and self._heap[0][0] <= now:
+                due_ts, flight_id = heapq.heappop(self._heap)
+                if self._due.get(flight_id) != due_ts:
+                    continue  # stale entry
+                del self._due[flight_id]
+                out.append(flight_id)
+            self._compact()
+        self.popped += len(out)
+        return out
+
+    def schedule(self, flight_id: int, departure_ts: Optional[int], now: Optional[int] = None,
+                 delay: Optional[int] = None):
+        """(Re)schedule one flight: after its cadence, or after `delay` seconds. Departed flights are dropped."""
+        now = now_ts() if now is None else now
+        with self._lock:
+            if departure_ts is None:
+                departure_ts = self._departures.get(flight_id)
+            cadence = cadence_for(departure_ts - now) if departure_ts is not None else None
+            if cadence is None:
+                self._forget(flight_id)
+                return
+            self._departures[flight_id] = departure_ts
+            self._push(flight_id, now + (cadence if delay is None else delay))
+
+    def reschedule(self, departures: Iterable[Tuple[int, Optional[int]]], now: Optional[int] = None):
+        """After a tick: next reprice for each (flight_id, departure_ts) repriced, from its time to departure."""
+        now = now_ts() if now is None else now
+        for flight_id, departure_ts in departures:
+            self.schedule(flight_id, departure_ts, now)
+
+    def retry(self, flight_ids: Iterable[int], now: Optional[int] = None):
+        """Put back flights whose tick failed (due again in RETRY_SECONDS)."""
+        now = now_ts() if now is None else now
+        for flight_id in flight_ids:
+            self.schedule(flight_id, None, now, delay=RETRY_SECONDS)
+
+    def remove(self, flight_id: int):
+        with self._lock:
+            self._forget(flight_id)
+
+    def stats(self, now: Optional[int] = None) -> dict:
+        now = now_ts() if now is None else now
+        with self._lock:
+            due = [d for d in self._due.values() if d <= now]
+            upcoming = min(self._due.values(), default=None)
+        return {
+            "loaded": self.loaded,
+            "scheduled": len(self._due),
+            "heap_entries": len(self._heap),
+            "due_now": len(due),
+            "max_lag_seconds": now - min(due) if due else 0,
+            "next_due_in_seconds": None if upcoming is None else max(0, upcoming - now),
+            "popped": self.popped,
+            "loads": self.loads,
+        }
+
+
+# Global singleton instance
+reprice_scheduler = RepriceScheduler()
+
+
+# ----------------------------
+# Keep the heap in step with ORM writes
+# ----------------------------
+@event.listens_for(models.Flight, "after_insert")
+def _schedule_new_flight(mapper, connection, target):
+    if reprice_scheduler.loaded and target.departure_ts is not None:
+        reprice_scheduler.schedule(target.id, target.departure_ts, delay=0)
+
+
+@event.listens_for(models.Flight, "after_update")
+def _reschedule_moved_flight(mapper, connection, target):
+    if reprice_scheduler.loaded and inspect(target).attrs.departure_ts.history.has_changes():
+        reprice_scheduler.schedule(target.id, target.departure_ts, delay=0)
+
+
+@event.listens_for(models.Flight, "after_delete")
+def _unschedule_deleted_flight(mapper, connection, target):
+    reprice_scheduler.remove(target.id)
@@ -0,0 +1,163 @@
+# app/services/search_log_writer.py
+"""
+Asynchronous, batched writer for search_logs.
+
+Search requests only enqueue a row (never touch the database); a background
+thread drains the bounded queue and INSERTs with executemany once BATCH_SIZE
+rows are pending or FLUSH_INTERVAL seconds have passed. When the queue is
+full the row is dropped and counted, so logging can never slow searches down.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from app.utils.epoch_utils import now_ts
+
+try:
+    from zoneinfo import ZoneInfo
+    _IST = ZoneInfo("Asia/Kolkata")
+except Exception:
+    from datetime import timedelta, timezone
+    _IST = timezone(timedelta(hours=5, minutes=30))
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Config
+# ----------------------------
+QUEUE_SIZE = 10000      # pending rows before new ones are dropped
+BATCH_SIZE = 500        # flush when this many rows are pending
+FLUSH_INTERVAL = 2.0    # ... or when the oldest pending row is this old (seconds)
+
+_INSERT = text(
+    """
+    INSERT INTO search_logs (origin_code, destination_code, search_date, searched_at, searched_ts)
+    VALUES (:o, :d, :dt, :ts, :st)
+    """
+)
+
+
+class SearchLogWriter:
+    def __init__(self, maxsize: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._engine = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_flag = threading.Event()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    # ----------------------------
+    # Producer side (request path)
+    # ----------------------------
+    def log(self, origin_code: Optional[str], destination_code: Optional[str], search_date: Optional[str]) -> bool:
+        """Queue one search_logs row. Returns False if it was dropped."""
+        row = {
+            "o": origin_code,
+            "d": destination_code,
+            "dt": search_date,
+            "ts": datetime.now(_IST).strftime("%A %d %B %Y"),
+            "st": now_ts(),   # epoch of the search: demand decays from here
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    # ----------------------------
+    # Consumer side (background thread)
+    # ----------------------------
+    def start(self, engine):
+        """Start the background writer (idempotent)."""
+        self._engine = engine
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._run, name="search-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the writer, flushing whatever is still queued."""
+        self._stop_flag.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def _take(self, batch: List[dict], deadline: float) -> None:
+        while len(batch) < self.batch_size and not self._stop_flag.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+            except queue.Empty:
+                continue
+
+    def _run(self):
+        while not self._stop_flag.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = [first]
+            self._take(batch, time.monotonic() + self.flush_interval)
+            self._write(batch)
+
+    def _drain(self) -> List[dict]:
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def flush(self) -> int:
+        """Synchronously write everything queued (used at shutdown). Returns rows written."""
+        total = 0
+        batch = self._drain()
+        for i in range(0, len(batch), self.batch_size):
+            total += self._write(batch[i:i + self.batch_size])
+        return total
+
+    def _write(self, batch: List[dict]) -> int:
+        if not batch or self._engine is None:
+            return 0
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(_INSERT, batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning("search_logs batch write failed (%d rows): %r", len(batch), e)
+            return 0
+        self.written += len(batch)
+        self.flushes += 1
+        return len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+
+# Global singleton instance
+search_log_writer = SearchLogWriter()
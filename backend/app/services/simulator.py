@@ -1,20 +1,34 @@
 # app/services/simulator.py
+import logging
 import threading
 import time
-import random
-from app.utils.price_utils import should_update_price, now_utc_iso, DEFAULT_MIN_UPDATE_SECONDS, seconds_since_iso
+from app.utils.price_utils import should_update_price, DEFAULT_MIN_UPDATE_SECONDS
 from datetime import datetime, timezone, timedelta
 try:
     from zoneinfo import ZoneInfo
     _HAS_ZONEINFO = True
 except Exception:
     _HAS_ZONEINFO = False
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Set
 import asyncio
 
 from app.db.base import SessionLocal
 from app.db import models
-from app.services.pricing import calculate_price
+from app.services.booking_service import expire_holds
+from app.services.demand_aggregator import demand_aggregator
+from app.services.demand_events import demand_events
+from app.services.pricing import calculate_prices_for_flights, price_cache
+from app.services.popular_routes import popular_routes
+from app.services.reprice_scheduler import reprice_scheduler
+from app.services.simulator_lease import HEARTBEAT_SECONDS, simulator_lease
+from app.services.tick_cadence import TickCadence
+from app.utils import clock
+from app.utils.epoch_utils import iso_to_ts, now_ts
+from app.utils.location_utils import location_code
+from sqlalchemy import insert, select, text, update
+
+logger = logging.getLogger(__name__)
 
 # ----------------------------
 # Config: schedule (IST)
@@ -32,12 +46,33 @@ _SCHEDULE = [
 _FALLBACK_INTERVAL = 90      # 06:00 - 08:59 -> 1.5 minutes
 
 # Behavior knobs
-BATCH_SIZE = 6      # how many flights to sample per tick
+BATCH_SIZE = 500    # starting batch (tick_cadence adapts it; the rest stay queued, most overdue first)
 
 # Internal control
-_stop_flag = False
-_thread: Optional[threading.Thread] = None
+DB_WORKERS = 1      # executor threads for simulator DB work (1 = ticks and surges never overlap)
+_task: Optional[asyncio.Task] = None
+_app_loop: Optional[asyncio.AbstractEventLoop] = None
+_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="simulator")
+_inflight: Set[Future] = set()            # executor jobs not finished yet (stop waits for them)
+_tick_lock = threading.Lock()             # guards direct tick_once() callers against overlapping ticks
 _override_interval: Optional[int] = None  # if set, always use this interval (seconds)
+tick_cadence = TickCadence(BATCH_SIZE)     # adaptive batch size / interval (see tick_cadence.py)
+
+# Health counters (reported by status())
+_stats = {
+    "ticks": 0,
+    "last_tick_at": None,          # UTC ISO of the last finished tick
+    "last_tick_finished": None,    # monotonic, for the staleness check
+    "started": None,               # monotonic, when the task was (re)started
+    "last_tick_ms": None,
+    "last_repriced": None,
+    "last_error": None,
+    "lag_seconds": 0.0,            # how late the last scheduled tick started
+    "max_lag_seconds": 0.0,
+    "overruns": 0,                 # ticks that took longer than the interval
+    "overlaps_skipped": 0,         # tick_once() calls refused because a tick was running
+    "holds_expired": 0,            # lapsed reservations released by the tick's sweep
+}
 
 
 # ----------------------------
@@ -50,14 +85,15 @@ def _interval_for_now_ist(now: Optional[datetime] = None) -> int:
     """
     # compute current IST time
     if now is None:
+        now = clock.utc_now()
         if _HAS_ZONEINFO:
             try:
-                now = datetime.now(ZoneInfo("Asia/Kolkata"))
+                now = now.astimezone(ZoneInfo("Asia/Kolkata"))
             except Exception:
                 # fallback to manual offset if ZoneInfo fails unexpectedly
-                now = datetime.utcnow() + timedelta(hours=5, minutes=30)
+                now = now + timedelta(hours=5, minutes=30)
         else:
-            now = datetime.utcnow() + timedelta(hours=5, minutes=30)
+            now = now + timedelta(hours=5, minutes=30)
 
     hour = now.hour
     for (start, end), seconds in _SCHEDULE:
@@ -73,25 +109,32 @@ def current_interval_preview() -> int:
     return _interval_for_now_ist()
 
 
-def _broadcast_flight_update(flight, timestamp: str):
+def _flight_update(flight, timestamp: str, price: Optional[float] = None) -> dict:
+    """One entry of a `flight_updates` frame (price defaults to the published price_real)."""
+    return {
+        "flight_id": flight.id,
+        "flight_number": flight.flight_number,
+        "origin_code": flight.origin_code,
+        "destination_code": flight.destination_code,
+        "flight_date": flight.flight_date,
+        "price": float(flight.price_real if price is None else price),
+        "seats": flight.seats_available,
+        "timestamp": timestamp
+    }
+
+
+def _broadcast_flight_updates(updates):
     """
-    Safely broadcast flight update via WebSocket.
+    Safely broadcast a tick's (or surge's) updates via WebSocket as one batched frame.
     This is called from synchronous code, so we need to handle async carefully.
     """
+    if not updates:
+        return
     try:
         from app.utils.websocket_manager import manager
-        
-        message = {
-            "type": "flight_update",
-            "flight_id": flight.id,
-            "flight_number": flight.flight_number,
-            "price": float(flight.price_real),
-            "seats": flight.seats_available,
-            "timestamp": timestamp
-        }
-        
-        # Use thread-safe sync method
-        manager.broadcast_sync(message)
+
+        # Use thread-safe sync method (one loop wakeup per batch)
+        manager.broadcast_updates_sync(updates)
 
     except Exception:
         # Silently fail - don't break simulator if WebSocket fails
@@ -101,221 +144,324 @@ def _broadcast_flight_update(flight, timestamp: str):
 # ----------------------------
 # DB update logic
 # ----------------------------
-def _update_one(db, flight):
+SIGNIFICANCE_PCT = 0.01   # a price change is persisted if >= 1% ...
+SIGNIFICANCE_ABS = 50.0   # ... or >= this many currency units
+
+
+def _load_demand(db, flights) -> list:
     """
-    Single-flight update:
-      - small random bookings (persist to bookings)
-      - random-walk demand score (persist to demand_scores)
-      - recalculate dynamic price via calculate_price(), persist to fare_history if changed
-      - enforce cooldown using last_price_updated and DEFAULT_MIN_UPDATE_SECONDS
-      - broadcast updates via WebSocket
+    Current demand scores for a batch (one SELECT; batch order, 0.0 when a flight has none).
+    Scores come from search traffic (see demand_aggregator); surges are added at price time.
     """
-    update_occurred = False
-    now_utc = datetime.now(timezone.utc)
-    timestamp_iso = now_utc.isoformat()
-    
-    try:
-        # Determine urgency (hours to departure)
-        departure = None
-        is_urgent = False
-        try:
-           if flight.departure_iso:
-               departure = datetime.fromisoformat(flight.departure_iso.replace("Z", "+00:00"))
-               delta = departure - now_utc
-               hours_until = delta.total_seconds() / 3600.0
-               if 0 < hours_until < 48:
-                   is_urgent = True
-        except:
-             pass
-
-        # Booking Logic: Aggressive if urgent (75% chance, 5-10 seats)
-        booking_prob = 0.75 if is_urgent else 0.25
-        max_seats = 10 if is_urgent else 3
-        
-        # Booking Logic: DISABLED (User Request - Price increase only)
-        # if flight.seats_available > 0 and random.random() < booking_prob:
-        #     taken = random.randint(1, min(max_seats, int(flight.seats_available)))
-        #     flight.seats_available = max(0, flight.seats_available - taken)
-        #     b = models.Booking(flight_id=flight.id, seats_booked=taken, price_paid=flight.price_real)
-        #     db.add(b)
-        #     update_occurred = True
-
-        # demand score update (small random walk)
-        ds = db.query(models.DemandScore).filter(models.DemandScore.flight_id == flight.id).first()
-        if not ds:
-            ds_val = random.random() * 0.15
-            ds = models.DemandScore(
-                flight_id=flight.id,
-                origin_code=flight.origin,
-                destination_code=flight.destination,
-                score=ds_val
-            )
-            db.add(ds)
-        else:
-            ds.score = min(1.0, max(0.0, ds.score + random.uniform(-0.03, 0.12)))
-            ds.updated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-
-        # -------------------------
-        # dynamic pricing calculation
-        # -------------------------
-        new_price, breakdown = calculate_price(flight, demand_score=ds.score, now=now_utc)
-        old_price = float(getattr(flight, "price_real", 0.0))
-
-        # if no candidate price, skip
-        if new_price is None:
-            # Broadcast if seats changed even without price change
-            if update_occurred:
-                _broadcast_flight_update(flight, timestamp_iso)
-            return
-
-        # Check cooldown: only persist if cooldown elapsed
-        try:
-            can_update = should_update_price(flight.last_price_updated, min_update_seconds=DEFAULT_MIN_UPDATE_SECONDS)
-        except Exception:
-            # conservative fallback — allow update if helper fails
-            can_update = True
-
-        if can_update:
-            # significance threshold: require either >=1% relative change or >= absolute small delta (₹50)
-            rel_change = abs(new_price - old_price) / (old_price if old_price else (flight.base_price or 1.0))
-            abs_delta = abs(new_price - old_price)
-            SIGNIFICANCE_PCT = 0.01   # 1%
-            SIGNIFICANCE_ABS = 50.0   # currency units
-
-            if rel_change >= SIGNIFICANCE_PCT or abs_delta >= SIGNIFICANCE_ABS:
-                fh = models.FareHistory(flight_id=flight.id, old_price=old_price, new_price=new_price, reason="simulator")
-                db.add(fh)
-                flight.price_real = float(new_price)
-                flight.last_price_updated = now_utc_iso()
-                update_occurred = True
-            else:
-                # change too small — skip price update but STILL update timestamp
-                flight.last_price_updated = now_utc_iso()
-        else:
-            # cooldown active — skip persistence
-            pass
-        
-        # Broadcast update if any change occurred
-        if update_occurred:
-            _broadcast_flight_update(flight, timestamp_iso)
+    existing = {}
+    for flight_id, score in db.execute(
+        select(models.DemandScore.flight_id, models.DemandScore.score)
+        .where(models.DemandScore.flight_id.in_([f.id for f in flights]))
+        .order_by(models.DemandScore.id)
+    ):
+        existing.setdefault(flight_id, score)   # first row wins (as .first() did)
+    return [float(existing.get(f.id) or 0.0) for f in flights]
 
-    except Exception as e:
-        # don't raise — caller will handle rollback
-        # print(f"Update failed: {e}")
-        pass
 
+def _price_decision(flight, new_price, can_update: bool) -> Optional[str]:
+    """
+    What a tick does with one flight's candidate price:
+      "update"  cooldown elapsed and the change is significant -> new price + fare_history row
+      "touch"   cooldown elapsed, change too small -> only last_price_updated moves
+      None      no candidate price, or cooldown still active
+    """
+    # Booking Logic: DISABLED (User Request - Price increase only)
+    # Urgent flights (<48h) used to take 5-10 seats at 75% odds, others 1-3 seats at 25%.
+    if new_price is None or not can_update:
+        return None
+    old_price = float(flight.price_real or 0.0)
+    rel_change = abs(new_price - old_price) / (old_price if old_price else (flight.base_price or 1.0))
+    if rel_change >= SIGNIFICANCE_PCT or abs(new_price - old_price) >= SIGNIFICANCE_ABS:
+        return "update"
+    return "touch"
+
+
+def _acquire_write_lock(db) -> float:
+    """
+    Take SQLite's write lock up front with a no-op write and return how long
+    that waited (seconds), so lock wait and lock hold are measured apart.
+    Other databases lock per row: nothing to wait for here.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return 0.0
+    started = time.monotonic()
+    db.execute(text("UPDATE flights SET id = id WHERE 0"))
+    return time.monotonic() - started
 
-def tick_once():
+
+def _reprice(db, flights, timing: Optional[dict] = None) -> list:
+    """
+    Reprice a batch with set-based writes: demand scores are preloaded in one
+    query, prices come from one vectorised pricing call, flight rows
+    are updated with one executemany and fare history is inserted in one
+    statement. Returns the WebSocket updates to broadcast once the tick has committed.
+    `timing` (optional) receives the write-lock wait and the time writing started.
+    """
+    if not flights:
+        return []
+    now_utc = clock.utc_now()
+    now_iso = now_utc.isoformat()
+    try:
+        scores = _load_demand(db, flights)
+    except Exception as e:
+        # _tick rolls back and re-queues the batch; never reschedule flights that were not repriced
+        logger.warning("Demand lookup failed: %r", e)
+        raise
+    priced = calculate_prices_for_flights(flights, scores, now=now_utc, with_breakdown=False)
+
+    flight_rows, history_rows, updates = [], [], []
+    for fl, (new_price, _) in zip(flights, priced):
+        try:
+            can_update = should_update_price(fl.last_price_updated_ts, min_update_seconds=DEFAULT_MIN_UPDATE_SECONDS)
+        except Exception:
+            can_update = True   # conservative fallback — allow update if helper fails
+        decision = _price_decision(fl, new_price, can_update)
+        if decision is None:
+            continue
+        old_price = float(fl.price_real or 0.0)
+        price = float(new_price) if decision == "update" else old_price
+        flight_rows.append({
+            "id": fl.id,
+            "price_real": price,
+            "last_price_updated": now_iso,
+            "last_price_updated_ts": iso_to_ts(now_iso),   # bulk UPDATE skips the @validates mirror
+        })
+        if decision == "update":
+            history_rows.append({"flight_id": fl.id, "old_price": old_price, "new_price": price, "reason": "simulator"})
+            updates.append(_flight_update(fl, now_iso, price))
+
+    if timing is not None and (flight_rows or history_rows):
+        timing["lock_wait"] = _acquire_write_lock(db)
+        timing["write_start"] = time.monotonic()
+    if flight_rows:
+        db.execute(update(models.Flight), flight_rows)
+    if history_rows:
+        db.execute(insert(models.FareHistory), history_rows)
+    price_cache.invalidate_flights(f.id for f in flights)
+    return updates
+
+
+def tick_once(observe: bool = True):
     """
     Public: run a single simulation cycle (useful for manual testing).
-    This will open a DB session, update a sampled batch and commit.
+    Reprices the flights whose due time has come (see reprice_scheduler):
+    same-day flights every few minutes, distant ones every few hours.
+    Returns 0 without doing anything if another tick is still running.
+    observe=False keeps the tick out of tick_cadence (manual ticks are off-schedule).
     """
+    if not _tick_lock.acquire(blocking=False):
+        _stats["overlaps_skipped"] += 1
+        return 0
+    started = time.monotonic()
+    timing = {}
+    try:
+        repriced = _tick(timing)
+    finally:
+        _tick_lock.release()
+    tick_ms = (time.monotonic() - started) * 1000.0
+    if observe:
+        queue = reprice_scheduler.stats()
+        tick_cadence.observe(
+            repriced, tick_ms,
+            lock_wait_ms=timing.get("lock_wait", 0.0) * 1000.0,
+            lock_hold_ms=timing.get("lock_hold", 0.0) * 1000.0,
+            backlog=queue["due_now"], lag_seconds=queue["max_lag_seconds"],
+            base=current_interval_preview(),
+        )
+    _stats["ticks"] += 1
+    _stats["last_tick_ms"] = round(tick_ms, 1)
+    _stats["last_tick_finished"] = time.monotonic()
+    _stats["last_tick_at"] = datetime.now(timezone.utc).isoformat()
+    _stats["last_repriced"] = repriced
+    return repriced
+
+
+def manual_tick() -> Optional[int]:
+    """
+    One tick on request (/tick), only in the lease holder: returns None without
+    ticking when another process leads, so standbys never reprice the same flights.
+    With no simulator task running here the lease is taken just for this tick.
+    """
+    if not simulator_lease.renew():
+        return None
+    try:
+        return tick_once(observe=False)
+    finally:
+        if not (_task and not _task.done()):
+            simulator_lease.release()
+
+
+def _tick(timing: dict) -> int:
     db = SessionLocal()
+    ids = []
     try:
-        flights = db.query(models.Flight).all()
-        if not flights:
+        now = now_ts()
+        released = expire_holds(db)   # lapsed holds give their seats back (flights.seats_held)
+        if released:
+            db.commit()
+            _stats["holds_expired"] += released
+        if reprice_scheduler.needs_load(now):
+            reprice_scheduler.load(db, now)
+        ids = reprice_scheduler.pop_due(now, tick_cadence.next_batch())
+        if not ids:
             return 0
-            
-        # Prioritize urgent flights (departing < 48h)
-        now = datetime.now(timezone.utc)
-        urgent_flights = []
-        other_flights = []
-        
-        for f in flights:
-            try:
-                # Parse ISO date safely
-                if f.departure_iso:
-                    dep = datetime.fromisoformat(f.departure_iso.replace("Z", "+00:00"))
-                    delta = (dep - now).total_seconds() / 3600.0
-                    if 0 < delta < 48:
-                        urgent_flights.append(f)
-                    else:
-                        other_flights.append(f)
-                else:
-                    other_flights.append(f)
-            except:
-                other_flights.append(f)
-        
-        # Mix samples: 70% urgent, 30% others
-        sample = []
-        if urgent_flights:
-            k_urgent = min(len(urgent_flights), int(BATCH_SIZE * 0.7) or 1)
-            # Ensure we don't sample more than available
-            sample.extend(random.sample(urgent_flights, min(len(urgent_flights), k_urgent)))
-            
-        remaining_slots = BATCH_SIZE - len(sample)
-        if remaining_slots > 0 and other_flights:
-            # Ensure we don't sample more than available
-            sample.extend(random.sample(other_flights, min(remaining_slots, len(other_flights))))
-            
-        # Fallback if both lists empty (unlikely if flights exist)
-        if not sample and flights: 
-             sample = random.sample(flights, min(BATCH_SIZE, len(flights)))
-
-        for fl in sample:
-            _update_one(db, fl)
+        sample = db.query(models.Flight).filter(models.Flight.id.in_(ids)).order_by(models.Flight.id).all()
+
+        routes = {(f.origin_code, f.destination_code) for f in sample}
+        departures = [(f.id, f.departure_ts) for f in sample]   # read before commit expires the rows
+        updates = _reprice(db, sample, timing)
         db.commit()
+        if "write_start" in timing:
+            timing["lock_hold"] = time.monotonic() - timing["write_start"]
+        reprice_scheduler.reschedule(departures, now)
+        ids = []
+        _broadcast_flight_updates(updates)
+        # homepage cache: rebuild only if a repriced flight is on a listed route
+        popular_routes.refresh_if_affected(db, routes)
         return len(sample)
     except Exception as e:
         print(f"Tick error: {e}")
+        _stats["last_error"] = f"{datetime.now(timezone.utc).isoformat()} {e!r}"
         db.rollback()
+        reprice_scheduler.retry(ids)
         return 0
     finally:
         db.close()
 
 
 # ----------------------------
-# Background loop
+# Background task (asyncio)
 # ----------------------------
-def _loop():
-    global _stop_flag
-    while not _stop_flag:
-        try:
-            tick_once()
-        except Exception:
-            pass
+async def run_db(fn, *args):
+    """
+    Run simulator DB work on the bounded executor. The job is shielded: cancelling
+    the caller (stop, shutdown) never abandons a tick halfway through its commit.
+    """
+    return await asyncio.shield(asyncio.wrap_future(_submit(fn, *args)))
+
+
+def _submit(fn, *args) -> Future:
+    job = _executor.submit(fn, *args)
+    _inflight.add(job)
+    job.add_done_callback(_inflight.discard)
+    return job
 
-        # choose interval: override has priority, otherwise time-of-day schedule
-        if _override_interval is not None:
-            sleep_seconds = _override_interval
-        else:
-            sleep_seconds = _interval_for_now_ist()
 
-        # sleep in short chunks so stop() responds quickly
-        slept = 0
-        while slept < sleep_seconds and not _stop_flag:
-            to_sleep = min(5, sleep_seconds - slept)
-            time.sleep(to_sleep)
-            slept += to_sleep
+def _record_lag(lag: float):
+    _stats["lag_seconds"] = round(lag, 3)
+    _stats["max_lag_seconds"] = round(max(_stats["max_lag_seconds"], lag), 3)
+
+
+async def _run():
+    """
+    Fixed-rate tick loop: lateness is reported as lag, overrun slots are skipped (never queued).
+    Wakes at least every HEARTBEAT_SECONDS to renew the leader lease; only the lease holder
+    ticks, standbys keep retrying and tick straight away once they take over.
+    """
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    try:
+        while True:
+            leader = await run_db(simulator_lease.renew)
+            if not leader:
+                next_at = loop.time()
+            elif loop.time() >= next_at:
+                scheduled = next_at
+                try:
+                    await run_db(_timed_tick, scheduled)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    _stats["last_error"] = f"{datetime.now(timezone.utc).isoformat()} {e!r}"
+                    logger.exception("Simulator tick failed")
+
+                next_at += tick_cadence.next_interval(current_interval_preview())
+                if next_at < loop.time():
+                    _stats["overruns"] += 1
+                    next_at = loop.time()
+            wake = min(next_at, loop.time() + HEARTBEAT_SECONDS) if leader else loop.time() + HEARTBEAT_SECONDS
+            await asyncio.sleep(max(0.0, wake - loop.time()))
+    finally:
+        if simulator_lease.is_leader:
+            _submit(simulator_lease.release)   # queued behind an in-flight tick; stop_async waits for it
+
+
+def _timed_tick(scheduled: float):
+    # loop.time() is time.monotonic(), so lag includes executor queueing (e.g. behind a surge)
+    _record_lag(max(0.0, time.monotonic() - scheduled))
+    return tick_once()
 
 
 # ----------------------------
 # Control API
 # ----------------------------
-def start(interval: Optional[int] = None):
+async def start_async(interval: Optional[int] = None):
     """
-    Start background simulator thread.
+    Start the simulator task on the running loop.
       - interval (seconds) optional override for development/testing.
-      - If already running, function returns silently.
+      - If already running, only the interval override is updated.
     """
-    global _thread, _stop_flag, _override_interval
-    if interval is not None:
-        _override_interval = int(interval)
-    else:
-        _override_interval = None
-
-    if _thread and _thread.is_alive():
+    global _task, _app_loop, _override_interval
+    _override_interval = int(interval) if interval is not None else None
+    if _task and not _task.done():
         return
+    _app_loop = asyncio.get_running_loop()
+    _stats["max_lag_seconds"] = 0.0
+    _stats["started"] = time.monotonic()
+    _task = asyncio.create_task(_run(), name="simulator")
+
+
+async def stop_async(timeout: float = 30.0):
+    """Cancel the loop and wait (up to `timeout`) for in-flight ticks/surges to finish."""
+    global _task
+    task, _task = _task, None
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    pending = [asyncio.wrap_future(job) for job in list(_inflight)]
+    if pending:
+        done, not_done = await asyncio.wait(pending, timeout=timeout)
+        if not_done:
+            logger.warning("Simulator stop: %d job(s) still running after %ss", len(not_done), timeout)
+
+
+def seed(value: int):
+    """Seed the simulator's randomness (reprice offsets) for a reproducible run."""
+    reprice_scheduler.rng.seed(value)
+
 
-    _stop_flag = False
-    _thread = threading.Thread(target=_loop, daemon=True)
-    _thread.start()
+def bind_loop(loop: asyncio.AbstractEventLoop):
+    """Remember the app's event loop so the sync start() works from worker threads."""
+    global _app_loop
+    _app_loop = loop
+
+
+def start(interval: Optional[int] = None):
+    """Sync wrapper for start_async (call from the event loop thread, or from a worker thread once started)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        if _app_loop is None:
+            raise RuntimeError("simulator.start() needs the app's event loop; use start_async()")
+        asyncio.run_coroutine_threadsafe(start_async(interval), _app_loop).result(5)
+        return
+    asyncio.ensure_future(start_async(interval))
 
 
 def stop():
-    """Signal the background thread to stop. It will exit at the next checkpoint."""
-    global _stop_flag
-    _stop_flag = True
+    """Signal the simulator task to stop (non-blocking; use stop_async to wait for in-flight ticks)."""
+    task = _task
+    if task is None or task.done():
+        return
+    loop = task.get_loop()
+    if loop.is_closed():
+        return
+    loop.call_soon_threadsafe(task.cancel)
 
 
 def status() -> dict:
@@ -324,74 +470,120 @@ def status() -> dict:
     # Calculate crude acceleration: if 1 hour (3600s) is "1x", then 60s is "60x".
     acc = 3600.0 / (interval if interval > 0 else 3600)
     
+    running = bool(_task and not _task.done())
+    last_seen = max(_stats["last_tick_finished"] or 0.0, _stats["started"] or 0.0)
+    stale = time.monotonic() - last_seen > 3 * max(interval, tick_cadence.next_interval(interval)) + 30
+    leader = simulator_lease.is_leader
     return {
-        "running": bool(_thread and _thread.is_alive()),
+        "running": running,
+        "role": ("leader" if leader else "standby") if running else "stopped",
+        "healthy": (not stale or not leader) if running else None,
+        "in_flight": len(_inflight),
+        "ticks": _stats["ticks"],
+        "last_tick_at": _stats["last_tick_at"],
+        "last_tick_ms": _stats["last_tick_ms"],
+        "last_repriced": _stats["last_repriced"],
+        "last_error": _stats["last_error"],
+        "lag_seconds": _stats["lag_seconds"],
+        "max_lag_seconds": _stats["max_lag_seconds"],
+        "overruns": _stats["overruns"],
+        "overlaps_skipped": _stats["overlaps_skipped"],
+        "holds_expired": _stats["holds_expired"],
         "override_interval": _override_interval,
         "current_interval_seconds": interval,
         "time_acceleration": round(acc, 1),
-        "current_time": datetime.now(timezone.utc).isoformat()
+        "current_time": clock.utc_now().isoformat(),
+        "clock": clock.get_clock().name,
+        "reprice_queue": reprice_scheduler.stats(),
+        "lease": simulator_lease.stats(),
+        "demand_events": demand_events.stats(),
+        "demand_pipeline": demand_aggregator.stats(),
+        "cadence": tick_cadence.stats(interval),
     }
 
 
-def trigger_surge(city_code: str, factor: float = 0.5):
+def _destination_flight_ids(db, city_code: str, origin: Optional[str] = None) -> list:
+    """Upcoming flights into a city (optionally from one origin) -- the flights a surge reprices."""
+    q = select(models.Flight.id).where(
+        models.Flight.destination_code == location_code(city_code),
+        models.Flight.departure_ts > now_ts(),
+    )
+    if origin:
+        q = q.where(models.Flight.origin_code == location_code(origin))
+    return list(db.execute(q).scalars())
+
+
+def _surge_updates(db, flight_ids) -> list:
     """
-    Manually trigger a demand spike for a specific destination.
-    e.g. 'BLR' with factor 0.5 adds +50% to current demand scores.
+    WebSocket updates for the upcoming flights whose demand a surge changed,
+    re-priced in one batch (flights in price cooldown keep showing price_real, as in search).
+    """
+    ids = [i for i in flight_ids if i is not None]
+    if not ids:
+        return []
+    try:
+        flights = db.query(models.Flight).filter(models.Flight.id.in_(ids), models.Flight.departure_ts > now_ts()).all()
+        if not flights:
+            return []
+        scores = {
+            ds.flight_id: ds.score
+            for ds in db.query(models.DemandScore).filter(models.DemandScore.flight_id.in_([f.id for f in flights])).all()
+        }
+        priced = calculate_prices_for_flights(flights, [scores.get(f.id, 0.0) for f in flights], with_breakdown=False)
+    except Exception:
+        logger.exception("Surge broadcast skipped")
+        return []
+    timestamp_iso = clock.utc_now().isoformat()
+    return [
+        _flight_update(f, timestamp_iso, price)
+        for f, (price, _) in zip(flights, priced)
+        if price is not None and should_update_price(f.last_price_updated_ts, DEFAULT_MIN_UPDATE_SECONDS)
+    ]
+
+
+def trigger_surge(city_code: str, factor: float = 0.5, duration_seconds: Optional[int] = None,
+                  decay: str = "flat", origin: Optional[str] = None, label: Optional[str] = None):
+    """
+    Start a demand surge for a destination (or one route when `origin` is given).
+    e.g. 'BLR' with factor 0.5 adds +0.5 to the demand score of every flight into BLR.
+    The surge is one demand_events row applied at price time (see demand_events);
+    it lasts `duration_seconds` (None: until reset_surge) and fades per `decay`.
+    Returns the number of upcoming flights affected.
     """
     db = SessionLocal()
     try:
-        # Find all demand scores for this destination
-        # We search by destination_code (which should be normalized, e.g. uppercase)
-        city = city_code.strip().upper()
-        
-        scores = db.query(models.DemandScore).filter(models.DemandScore.destination_code == city).all()
-        
-        count = 0
-        now_str = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-
-        for ds in scores:
-            # Boost score, cap at 1.0
-            old = ds.score
-            new_score = min(1.0, old + factor)
-            if new_score != old:
-                ds.score = new_score
-                ds.updated_at = now_str
-                count += 1
-        
-        db.commit()
-        return count
-        return count
+        # ('BLR', 'Bengaluru' or 'Bangalore' all resolve to the flights.destination_code key)
+        demand_events.create(city_code, factor, origin=origin, duration_seconds=duration_seconds,
+                             decay=decay, label=label)
+        affected = _destination_flight_ids(db, city_code, origin)
+        popular_routes.invalidate()
+        _broadcast_flight_updates(_surge_updates(db, affected))
+        return len(affected)
+    except ValueError:
+        raise
     except Exception as e:
         print(f"Surge trigger failed: {e}")
-        db.rollback()
         return 0
     finally:
         db.close()
 
 
-def reset_surge(city_code: str):
+def reset_surge(city_code: str, origin: Optional[str] = None):
     """
-    Reset demand score to baseline (0.0) for a city.
-    Stops any active "High Demand" or "Crisis" effects.
+    End the active demand events for a city (or one route): one UPDATE,
+    prices fall back to the flights' own demand scores straight away.
+    Returns the number of upcoming flights affected (0 if no event was active).
     """
     db = SessionLocal()
     try:
-        city = city_code.strip().upper()
-        scores = db.query(models.DemandScore).filter(models.DemandScore.destination_code == city).all()
-        
-        count = 0
-        now_str = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-
-        for ds in scores:
-            ds.score = 0.0  # Reset to neutral/baseline
-            ds.updated_at = now_str
-            count += 1
-        
-        db.commit()
-        return count
+        if not demand_events.end(city_code, origin=origin):
+            return 0
+        affected = _destination_flight_ids(db, city_code, origin)
+        popular_routes.invalidate()
+        _broadcast_flight_updates(_surge_updates(db, affected))
+        return len(affected)
     except Exception as e:
         print(f"Surge reset failed: {e}")
-        db.rollback()
         return 0
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
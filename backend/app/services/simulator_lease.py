@@ -0,0 +1,157 @@
+# app/services/simulator_lease.py
+"""
+Database lease that elects a single simulator leader.
+
+Every API process (uvicorn worker, Render instance) may have its simulator
+task started, but only the holder of the "simulator" lease runs ticks; the
+others stay on standby and keep trying. The holder renews the lease on every
+heartbeat; if it dies, the lease expires after LEASE_TTL seconds and the next
+standby to check takes over.
+
+Acquire and renew are one conditional UPDATE (row held by us, or expired),
+so two processes can never both win the same lease; the first acquisition
+ever is an INSERT, and a duplicate-key error simply means someone else won.
+Lease times are UTC epoch seconds from each host's real clock (never the
+injectable app clock: a replay's virtual time must not steal or drop the
+lease), so hosts need roughly synchronised clocks (well under LEASE_TTL apart).
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db import models
+from app.db.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Config
+# ----------------------------
+LEASE_NAME = "simulator"
+LEASE_TTL = int(os.environ.get("SKYFLY_SIMULATOR_LEASE_TTL", "30"))            # seconds
+HEARTBEAT_SECONDS = int(os.environ.get("SKYFLY_SIMULATOR_HEARTBEAT", "10"))    # renew this often
+
+_table = models.SimulatorLease.__table__
+
+
+def _wall_ts() -> int:
+    return int(time.time())
+
+
+class SimulatorLease:
+    def __init__(self, name: str = LEASE_NAME, ttl: int = LEASE_TTL, holder: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self.leader_since: Optional[int] = None     # when this process last became leader
+        self.last_renewed_ts: Optional[int] = None
+        self.takeovers = 0      # times this process became leader
+        self.lost = 0           # times a heartbeat found the lease taken by someone else
+        self.errors = 0
+
+    def renew(self, now: Optional[int] = None) -> bool:
+        """Acquire or renew the lease (one heartbeat). Returns True while this process is leader."""
+        now = _wall_ts() if now is None else now
+        db = SessionLocal()
+        try:
+            ours = _table.c.holder == self.holder
+            result = db.execute(
+                update(_table)
+                .where(_table.c.name == self.name, ours | (_table.c.expires_ts < now))
+                .values(
+                    holder=self.holder,
+                    acquired_ts=case((ours, _table.c.acquired_ts), else_=now),
+                    renewed_ts=now,
+                    expires_ts=now + self.ttl,
+                )
+            )
+            won = result.rowcount == 1
+            if not won and db.execute(select(_table.c.name).where(_table.c.name == self.name)).first() is None:
+                db.execute(insert(_table).values(
+                    name=self.name, holder=self.holder, acquired_ts=now, renewed_ts=now, expires_ts=now + self.ttl,
+                ))
+                won = True
+            db.commit()
+        except IntegrityError:
+            db.rollback()   # another process inserted the first lease row at the same time
+            won = False
+        except Exception as e:
+            db.rollback()
+            self.errors += 1
+            logger.warning("Simulator lease heartbeat failed: %r", e)
+            won = False
+        finally:
+            db.close()
+        self._set_leader(won, now)
+        return won
+
+    def release(self):
+        """Give the lease up (stop/shutdown) so a standby takes over without waiting for expiry."""
+        if not self.is_leader:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(_table)
+                .where(_table.c.name == self.name, _table.c.holder == self.holder)
+                .values(expires_ts=0)
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning("Simulator lease release failed: %r", e)
+        finally:
+            db.close()
+        self._set_leader(False, _wall_ts())
+
+    def _set_leader(self, leader: bool, now: int):
+        if leader and not self.is_leader:
+            self.takeovers += 1
+            self.leader_since = now
+            logger.info("Simulator lease acquired by %s", self.holder)
+        elif not leader and self.is_leader:
+            self.lost += 1
+            self.leader_since = None
+            logger.info("Simulator lease no longer held by %s", self.holder)
+        if leader:
+            self.last_renewed_ts = now
+        self.is_leader = leader
+
+    def current(self) -> Optional[dict]:
+        """The lease row as stored (whoever holds it), or None before the first election."""
+        db = SessionLocal()
+        try:
+            row = db.execute(select(_table).where(_table.c.name == self.name)).mappings().first()
+            return dict(row) if row else None
+        except Exception:
+            return None
+        finally:
+            db.close()
+
+    def stats(self, now: Optional[int] = None) -> dict:
+        now = _wall_ts() if now is None else now
+        row = self.current()
+        live = bool(row and row["expires_ts"] >= now)
+        return {
+            "holder": self.holder,
+            "is_leader": self.is_leader,
+            "leader": row["holder"] if live else None,
+            "lease_age_seconds": now - row["acquired_ts"] if live else None,
+            "heartbeat_age_seconds": now - row["renewed_ts"] if live else None,
+            "expires_in_seconds": row["expires_ts"] - now if live else None,
+            "ttl_seconds": self.ttl,
+            "takeovers": self.takeovers,
+            "lost": self.lost,
+            "errors": self.errors,
+        }
+
+
+# Global singleton instance
+simulator_lease = SimulatorLease()
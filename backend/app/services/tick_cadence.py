@@ -0,0 +1,124 @@
+# app/services/tick_cadence.py
+"""
+Adaptive batch size and interval for simulator ticks.
+
+After every tick the simulator reports what it measured: flights repriced,
+tick duration, how long it waited for SQLite's write lock and how long it
+then held it (first write -> commit), plus the reprice queue's backlog and
+lag. From that the controller picks the next tick's
+
+  batch size   the most flights whose writes fit in LOCK_BUDGET_MS, from a
+               moving average of the write-lock cost per flight; halved
+               while the lock is contended (long waits)
+  interval     halved (down to MIN_INTERVAL) while due flights are older
+               than the freshness SLO, relaxed back toward the IST schedule
+               once caught up, and never so short that lock-hold time
+               exceeds WRITE_BUDGET of the wall clock
+
+Every choice is recorded with a human-readable reason for status().
+Set SKYFLY_SIMULATOR_ADAPTIVE=0 to fall back to BATCH_SIZE and the schedule.
+"""
+import os
+import threading
+from typing import List, Optional
+
+# ----------------------------
+# Config
+# ----------------------------
+ENABLED = os.environ.get("SKYFLY_SIMULATOR_ADAPTIVE", "1") != "0"
+FRESHNESS_SLO_SECONDS = float(os.environ.get("SKYFLY_FRESHNESS_SLO_SECONDS", "60"))   # max overdue reprice
+LOCK_BUDGET_MS = float(os.environ.get("SKYFLY_LOCK_BUDGET_MS", "200"))                # write-lock hold per tick
+WRITE_BUDGET = float(os.environ.get("SKYFLY_WRITE_BUDGET", "0.05"))                   # share of wall time holding it
+LOCK_WAIT_HIGH_MS = 100.0    # waits longer than this count as contention
+MIN_BATCH = 50
+MAX_BATCH = 5000
+MIN_INTERVAL = 5.0           # seconds
+RELAX_FACTOR = 1.25          # interval growth per caught-up tick
+COST_SMOOTHING = 0.3         # EWMA weight of the newest per-flight cost
+
+
+class TickCadence:
+    def __init__(self, batch_size: int, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.default_batch = batch_size
+        self.batch_size = batch_size
+        self.interval: Optional[float] = None      # None: follow the schedule
+        self.cost_ms_per_flight: Optional[float] = None
+        self.reasons: List[str] = []
+        self.last: dict = {}
+        self.contended_ticks = 0
+        self._lock = threading.Lock()
+
+    def next_batch(self) -> int:
+        return self.batch_size if self.enabled else self.default_batch
+
+    def next_interval(self, base: float) -> float:
+        """Seconds until the next tick, given the schedule's (or override's) interval."""
+        if not self.enabled or self.interval is None:
+            return base
+        return self.interval
+
+    def observe(self, repriced: int, tick_ms: float, lock_wait_ms: float, lock_hold_ms: float,
+                backlog: int, lag_seconds: float, base: float):
+        """Feed one tick's measurements; updates batch_size, interval and reasons."""
+        with self._lock:
+            self.last = {
+                "repriced": repriced,
+                "tick_ms": round(tick_ms, 1),
+                "lock_wait_ms": round(lock_wait_ms, 1),
+                "lock_hold_ms": round(lock_hold_ms, 1),
+                "backlog": backlog,
+                "lag_seconds": lag_seconds,
+            }
+            if not self.enabled:
+                return
+            reasons = []
+
+            # batch size: what fits in the lock budget, halved under contention
+            if repriced >= MIN_BATCH and lock_hold_ms > 0:   # tiny ticks are mostly fixed commit cost
+                per = lock_hold_ms / repriced
+                prev = self.cost_ms_per_flight
+                self.cost_ms_per_flight = per if prev is None else prev + COST_SMOOTHING * (per - prev)
+            batch = self.batch_size
+            if self.cost_ms_per_flight:
+                batch = int(LOCK_BUDGET_MS / self.cost_ms_per_flight)
+                reasons.append(f"batch fits {LOCK_BUDGET_MS:.0f} ms lock budget at "
+                               f"{self.cost_ms_per_flight:.3f} ms/flight")
+            contended = lock_wait_ms > LOCK_WAIT_HIGH_MS
+            if contended:
+                self.contended_ticks += 1
+                batch = min(batch, self.batch_size // 2)
+                reasons.append(f"write lock contended (waited {lock_wait_ms:.0f} ms): batch halved")
+            self.batch_size = max(MIN_BATCH, min(MAX_BATCH, batch))
+
+            # interval: chase the freshness SLO, relax when caught up, respect the write budget
+            interval = min(self.interval if self.interval is not None else base, base)
+            if lag_seconds > FRESHNESS_SLO_SECONDS and backlog > 0 and not contended:
+                interval = max(MIN_INTERVAL, interval / 2)
+                reasons.append(f"behind freshness SLO ({lag_seconds:.0f}s > {FRESHNESS_SLO_SECONDS:.0f}s, "
+                               f"{backlog} due): interval halved")
+            elif backlog == 0 and interval < base:
+                interval = min(base, interval * RELAX_FACTOR)
+                reasons.append("caught up: interval relaxing toward schedule")
+            floor = max(lock_hold_ms / 1000.0 / WRITE_BUDGET, tick_ms / 1000.0)
+            if interval < floor:
+                interval = floor
+                reasons.append(f"write budget: {lock_hold_ms:.0f} ms lock hold needs >= {floor:.1f}s between ticks")
+            self.interval = round(interval, 2)
+            self.reasons = reasons or ["on schedule"]
+
+    def stats(self, base: Optional[float] = None) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "batch_size": self.next_batch(),
+                "interval_seconds": self.next_interval(base) if base is not None else self.interval,
+                "schedule_interval_seconds": base,
+                "cost_ms_per_flight": None if self.cost_ms_per_flight is None else round(self.cost_ms_per_flight, 4),
+                "reasons": list(self.reasons),
+                "last_tick": dict(self.last),
+                "contended_ticks": self.contended_ticks,
+                "freshness_slo_seconds": FRESHNESS_SLO_SECONDS,
+                "lock_budget_ms": LOCK_BUDGET_MS,
+                "write_budget": WRITE_BUDGET,
+            }
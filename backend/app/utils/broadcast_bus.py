@@ -0,0 +1,272 @@
+# app/utils/broadcast_bus.py
+"""
+Cross-process broadcast bus for WebSocket fan-out.
+
+With `uvicorn --workers N` every worker holds its own sockets, so a price
+change published in one worker must reach the others. The ConnectionManager
+publishes every broadcast as a small JSON event on a bus; each worker
+subscribes and fans the event out to its own clients.
+
+Backends (SKYFLY_BROADCAST_BACKEND):
+  local   single process, delivers in-process (default)
+  unix    workers on one host: each binds a datagram socket in
+          SKYFLY_BROADCAST_DIR and publishing sends to every peer socket there
+  redis   workers on any host: Redis pub/sub on SKYFLY_BROADCAST_CHANNEL
+          (SKYFLY_REDIS_URL; needs the optional `redis` package, or pass any
+          client exposing publish() and pubsub())
+
+Events are delivered locally straight away and tagged with the publishing
+bus id, so a worker never fans out its own event twice.
+"""
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import uuid
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Config
+# ----------------------------
+BACKEND = os.environ.get("SKYFLY_BROADCAST_BACKEND", "local").lower()
+SOCKET_DIR = os.environ.get("SKYFLY_BROADCAST_DIR", os.path.join(tempfile.gettempdir(), "skyfly-broadcast"))
+REDIS_URL = os.environ.get("SKYFLY_REDIS_URL", "redis://localhost:6379/0")
+CHANNEL = os.environ.get("SKYFLY_BROADCAST_CHANNEL", "skyfly:broadcast")
+MAX_DATAGRAM = 60000     # bytes; larger update batches are split across datagrams
+POLL_INTERVAL = 0.5      # listener threads check their stop flag this often (seconds)
+
+Deliver = Callable[[dict], None]
+
+
+def _chunks(event: dict, limit: int) -> List[bytes]:
+    """Encode an event, splitting an "updates" batch until every piece fits in `limit` bytes."""
+    raw = json.dumps(event, separators=(",", ":")).encode("utf-8")
+    updates = event.get("updates")
+    if len(raw) <= limit or not updates or len(updates) < 2:
+        return [raw]
+    half = len(updates) // 2
+    return (
+        _chunks(dict(event, updates=updates[:half]), limit)
+        + _chunks(dict(event, updates=updates[half:]), limit)
+    )
+
+
+class LocalBus:
+    """In-process bus: publish() delivers straight to this worker's clients."""
+
+    name = "local"
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self._deliver: Optional[Deliver] = None
+        self.published = 0
+        self.received = 0     # events from other workers
+        self.errors = 0
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def stop(self):
+        pass
+
+    def _local(self, event: dict):
+        if self._deliver is not None:
+            self._deliver(event)
+
+    def _remote(self, event: dict):
+        """Event read from the transport: skip our own, hand the rest to the manager."""
+        if event.get("origin") == self.id:
+            return
+        self.received += 1
+        self._local(event)
+
+    def publish(self, event: dict):
+        event = dict(event, origin=self.id)
+        self.published += 1
+        self._local(event)
+        try:
+            self._send(event)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Broadcast bus (%s) publish failed: %r", self.name, e)
+
+    def _send(self, event: dict):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "id": self.id,
+            "published": self.published,
+            "received": self.received,
+            "errors": self.errors,
+        }
+
+
+class UnixSocketBus(LocalBus):
+    """Workers on one host: one datagram socket per worker in a shared directory."""
+
+    name = "unix"
+
+    def __init__(self, directory: str = SOCKET_DIR):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{self.id}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_flag = threading.Event()
+        self.dropped = 0      # peer buffer full
+        self.stale_peers = 0  # sockets left behind by dead workers (removed)
+
+    def start(self, deliver: Deliver):
+        super().start(deliver)
+        os.makedirs(self.directory, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.settimeout(POLL_INTERVAL)
+        self._sock = sock
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._listen, name="broadcast-bus-unix", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_flag.set()
+        if self._thread:
+            self._thread.join(POLL_INTERVAL * 4)
+        self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _listen(self):
+        while not self._stop_flag.is_set():
+            try:
+                raw = self._sock.recv(MAX_DATAGRAM + 1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # socket closed by stop()
+            try:
+                self._remote(json.loads(raw))
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Broadcast bus (unix) dropped a bad event: %r", e)
+
+    def _peers(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, n) for n in names if n.endswith(".sock")]
+
+    def _send(self, event: dict):
+        peers = [p for p in self._peers() if p != self.path]
+        if not peers or self._sock is None:
+            return
+        payloads = _chunks(event, MAX_DATAGRAM)
+        for peer in peers:
+            for payload in payloads:
+                try:
+                    self._sock.sendto(payload, socket.MSG_DONTWAIT, peer)
+                except BlockingIOError:
+                    self.dropped += 1
+                except (ConnectionRefusedError, FileNotFoundError):
+                    self.stale_peers += 1
+                    try:
+                        os.unlink(peer)
+                    except OSError:
+                        pass
+                    break
+
+    def stats(self) -> dict:
+        out = super().stats()
+        out.update({"path": self.path, "peers": max(len(self._peers()) - 1, 0),
+                    "dropped": self.dropped, "stale_peers": self.stale_peers})
+        return out
+
+
+class RedisBus(LocalBus):
+    """Workers on any host: Redis pub/sub. `client` may be any object with publish() and pubsub()."""
+
+    name = "redis"
+
+    def __init__(self, client=None, url: str = REDIS_URL, channel: str = CHANNEL):
+        super().__init__()
+        if client is None:
+            try:
+                import redis  # optional dependency
+            except ImportError:
+                raise RuntimeError("SKYFLY_BROADCAST_BACKEND=redis needs the 'redis' package")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.channel = channel
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_flag = threading.Event()
+
+    def start(self, deliver: Deliver):
+        super().start(deliver)
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._listen, name="broadcast-bus-redis", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_flag.set()
+        if self._thread:
+            self._thread.join(POLL_INTERVAL * 4)
+        self._thread = None
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    def _listen(self):
+        while not self._stop_flag.is_set():
+            try:
+                msg = self._pubsub.get_message(timeout=POLL_INTERVAL)
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Broadcast bus (redis) read failed: %r", e)
+                self._stop_flag.wait(POLL_INTERVAL)
+                continue
+            if not msg or msg.get("type") != "message":
+                continue
+            try:
+                self._remote(json.loads(msg["data"]))
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Broadcast bus (redis) dropped a bad event: %r", e)
+
+    def _send(self, event: dict):
+        self.client.publish(self.channel, json.dumps(event, separators=(",", ":")))
+
+    def stats(self) -> dict:
+        out = super().stats()
+        out["channel"] = self.channel
+        return out
+
+
+def create_bus(backend: str = BACKEND) -> LocalBus:
+    """Bus for SKYFLY_BROADCAST_BACKEND; falls back to local (logged) when it can't be built."""
+    try:
+        if backend == "unix":
+            return UnixSocketBus()
+        if backend == "redis":
+            return RedisBus()
+        if backend != "local":
+            logger.warning("Unknown SKYFLY_BROADCAST_BACKEND=%r, using local", backend)
+    except Exception as e:
+        logger.warning("Broadcast bus %r unavailable, using local: %r", backend, e)
+    return LocalBus()
@@ -0,0 +1,89 @@
+# app/utils/clock.py
+"""
+Shared, injectable clock.
+
+Everything that decides something from "now" (pricing time-to-departure and
+same-day surge, price cooldowns, booking holds, the simulator schedule,
+fare-history timestamps) reads the time through utc_now()/epoch() instead of
+datetime.now(), so a run can be pinned to a VirtualClock and replayed:
+
+    from app.utils import clock
+    vc = clock.VirtualClock(datetime(2026, 1, 5, tzinfo=timezone.utc))
+    with clock.use_clock(vc):
+        ...
+        vc.advance(300)
+
+Operational timestamps (logs, health counters, the simulator and demand
+aggregator leases) keep using the real time. Note that epoch_utils.now_ts()
+reads this clock, so operational code must not use it.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+
+class SystemClock:
+    """Wall-clock time (the default)."""
+
+    name = "system"
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+
+class VirtualClock(SystemClock):
+    """Time that only moves when told to (replays, benchmarks)."""
+
+    name = "virtual"
+
+    def __init__(self, start: Optional[datetime] = None):
+        start = start or datetime.now(timezone.utc)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        self._now = start.astimezone(timezone.utc)
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, when: datetime):
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        self._now = when.astimezone(timezone.utc)
+
+    def advance(self, seconds: float) -> datetime:
+        self._now += timedelta(seconds=seconds)
+        return self._now
+
+
+_SYSTEM = SystemClock()
+_active: SystemClock = _SYSTEM
+
+
+def get_clock() -> SystemClock:
+    return _active
+
+
+def set_clock(clock: Optional[SystemClock]):
+    """Install `clock` process-wide (None restores the system clock)."""
+    global _active
+    _active = clock or _SYSTEM
+
+
+@contextmanager
+def use_clock(clock: SystemClock):
+    previous = _active
+    set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
+
+
+def utc_now() -> datetime:
+    """Current time (aware UTC) from the active clock."""
+    return _active.now()
+
+
+def epoch() -> float:
+    """Current UTC epoch seconds (float) from the active clock."""
+    return _active.now().timestamp()
@@ -0,0 +1,48 @@
+# app/utils/epoch_utils.py
+"""
+Integer UTC epoch helpers backing the indexed *_ts columns.
+
+Flight schedule strings (departure_iso / arrival_iso) are written as naive
+local IST times by the catalog CSVs and the admin upload, while system
+timestamps (holds, price updates, fare history) are UTC.
+"""
+from datetime import datetime, timezone, tzinfo
+from typing import Optional, Union
+
+from app.utils import clock
+
+try:
+    from zoneinfo import ZoneInfo
+    IST = ZoneInfo("Asia/Kolkata")
+except Exception:
+    from datetime import timedelta
+    IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def now_ts() -> int:
+    """Current UTC epoch seconds (from the shared clock, see app/utils/clock.py)."""
+    return int(clock.epoch())
+
+
+def iso_to_ts(value: Optional[Union[str, datetime]], naive_tz: tzinfo = timezone.utc) -> Optional[int]:
+    """
+    Convert an ISO string or datetime to UTC epoch seconds.
+    Naive values are interpreted in `naive_tz`. Returns None if missing/unparseable.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except Exception:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=naive_tz)
+    return int(dt.timestamp())
+
+
+def schedule_iso_to_ts(value: Optional[Union[str, datetime]]) -> Optional[int]:
+    """Flight schedule times: naive values are IST."""
+    return iso_to_ts(value, naive_tz=IST)
@@ -0,0 +1,67 @@
+# app/utils/frame_codec.py
+"""
+Wire encodings for batched flight_updates frames.
+
+Clients pick one when connecting (/ws/feeds?encoding=...):
+  json     {"type": "flight_updates", "seq", "stream", "updates": [{...}, ...]}   (default)
+  packed   JSON text, column-oriented:
+           {"type": "flight_updates", "encoding": "packed", "seq", "stream",
+            "flight_id": [...], "price": [...], "seats": [...]}
+  msgpack  the packed object as a binary MessagePack frame (needs the
+           optional `msgpack` package; falls back to packed without it)
+
+Packed frames drop the per-update route/date/timestamp fields: subscribers
+already hold those from the search results they are watching. Control
+messages (connection_established, subscribed, resync) stay JSON text.
+"""
+import json
+from typing import List, Union
+
+try:
+    import msgpack  # optional
+except ImportError:
+    msgpack = None
+
+ENCODINGS = ("json", "packed", "msgpack")
+PACKED_FIELDS = ("flight_id", "price", "seats")
+
+Frame = Union[str, bytes]
+
+
+def negotiate(requested) -> str:
+    """Encoding to use for a client's request (unknown -> json, msgpack unavailable -> packed)."""
+    value = (requested or "json").strip().lower()
+    if value not in ENCODINGS:
+        return "json"
+    if value == "msgpack" and msgpack is None:
+        return "packed"
+    return value
+
+
+def packed_frame(seq: int, stream: str, updates: List[dict]) -> dict:
+    frame = {"type": "flight_updates", "encoding": "packed", "seq": seq, "stream": stream}
+    for field in PACKED_FIELDS:
+        frame[field] = [u.get(field) for u in updates]
+    return frame
+
+
+def encode_updates(seq: int, stream: str, updates: List[dict], encoding: str = "json") -> Frame:
+    """One flight_updates frame in `encoding` (str for text frames, bytes for msgpack)."""
+    if encoding == "json":
+        return json.dumps({"type": "flight_updates", "seq": seq, "stream": stream, "updates": updates})
+    frame = packed_frame(seq, stream, updates)
+    if encoding == "msgpack":
+        return msgpack.packb(frame, use_bin_type=True)
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def decode_updates(frame: Frame) -> List[dict]:
+    """Inverse of encode_updates (any encoding) -> list of update dicts."""
+    if isinstance(frame, bytes):
+        data = msgpack.unpackb(frame, raw=False)
+    else:
+        data = json.loads(frame)
+    if data.get("encoding") != "packed":
+        return data.get("updates", [])
+    columns = [data[field] for field in PACKED_FIELDS]
+    return [dict(zip(PACKED_FIELDS, row)) for row in zip(*columns)]
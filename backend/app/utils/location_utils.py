@@ -1,25 +1,190 @@
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Well-known airports: code -> (city as stored in flights, extra aliases).
+# Covers every code used by the catalog generators, so flights can be keyed
+# by airport code even when the airports table is missing a city.
+KNOWN_AIRPORTS = {
+    "DEL": ("Delhi", ["new delhi"]),
+    "BOM": ("Mumbai", ["bombay"]),
+    "BLR": ("Bengaluru", ["bangalore"]),
+    "MAA": ("Chennai", ["madras"]),
+    "HYD": ("Hyderabad", []),
+    "CCU": ("Kolkata", ["calcutta"]),
+    "AMD": ("Ahmedabad", []),
+    "PNQ": ("Pune", ["poona"]),
+    "GOI": ("Goa", []),
+    "COK": ("Kochi", ["cochin"]),
+    "JAI": ("Jaipur", []),
+    "LKO": ("Lucknow", []),
+    "GAU": ("Guwahati", []),
+    "IXC": ("Chandigarh", []),
+    "VTZ": ("Visakhapatnam", ["vizag"]),
+    "NAG": ("Nagpur", []),
+    "PAT": ("Patna", []),
+    "IXR": ("Ranchi", []),
+    "STV": ("Surat", []),
+    "IXL": ("Leh", []),
+    "DED": ("Dehradun", []),
+    "TRV": ("Thiruvananthapuram", ["trivandrum"]),
+    "VNS": ("Varanasi", ["banaras", "benares"]),
+    "SXR": ("Srinagar", []),
+}
+
+_BUILTIN_CODES = {}
+for _code, (_city, _aliases) in KNOWN_AIRPORTS.items():
+    _BUILTIN_CODES[_code.lower()] = _code
+    _BUILTIN_CODES[_city.lower()] = _code
+    for _alias in _aliases:
+        _BUILTIN_CODES[_alias] = _code
+
+
 def normalize_city(city: str) -> str:
     """
     Clean city names:
       - Remove spaces
-      - Convert to proper title case
-      - Fix common abbreviations
+      - Resolve codes and aliases through the airport registry ('blr', 'Bangalore' -> 'Bengaluru')
+      - Otherwise convert to proper title case
     """
     if not city:
         return city
 
-    city = city.strip().lower()
+    city = city.strip()
+    known = airports.city(city)
+    if known:
+        return known
+    return city.lower().title()
+
+
+def location_code(value: Optional[str], lookup: Optional[Callable[[str], Optional[str]]] = None) -> Optional[str]:
+    """
+    Canonical location key stored in flights.origin_code / destination_code.
+
+    Resolution order: `lookup` (airports table; called with the lower-cased value),
+    then the built-in KNOWN_AIRPORTS aliases, else the upper-cased value itself
+    so unknown cities still compare consistently on write and on search.
+    """
+    if not value:
+        return None
+    v = value.strip().lower()
+    if not v:
+        return None
+    if lookup is None and airports.loaded:
+        lookup = airports.code
+    if lookup is not None:
+        code = lookup(v)
+        if code:
+            return code.upper()
+    return _BUILTIN_CODES.get(v, v.upper())
+
+
+# ----------------------------
+# Airport registry
+# ----------------------------
+class AirportRegistry:
+    """
+    In-process copy of the (tiny, rarely changing) airports table.
+
+    Resolves city names, codes and aliases with dict lookups so the search
+    path never queries `airports`. Built-in KNOWN_AIRPORTS aliases are layered
+    under the table rows. Call invalidate() when the table changes; the next
+    lookup reloads it from the engine used by load().
+    """
+
+    def __init__(self):
+        self._codes: Dict[str, str] = {}     # lower(city | code | alias) -> code
+        self._cities: Dict[str, str] = {}    # code -> display city
+        self._rows: List[dict] = []          # airports table rows (for suggestions)
+        self._bind = None
+        self._stale = False
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.reloads = 0
+
+    def load(self, bind) -> int:
+        """(Re)load from the airports table. Returns the number of table rows."""
+        try:
+            with bind.connect() as conn:
+                rows = conn.execute(text("SELECT code, city, airport_name FROM airports ORDER BY id")).fetchall()
+        except Exception as e:
+            logger.warning("Airport registry load failed (using built-ins only): %s", e)
+            rows = []
+
+        codes: Dict[str, str] = {}
+        cities: Dict[str, str] = {}
+        for code, (city, aliases) in KNOWN_AIRPORTS.items():
+            cities[code] = city
+            for key in [code, city] + aliases:
+                codes[key.lower()] = code
+        table_rows = []
+        for code, city, name in rows:
+            code = code.strip().upper()
+            table_rows.append({"city": city, "code": code, "airport_name": name or ""})
+            cities[code] = city
+            codes[code.lower()] = code
+            if city:
+                codes[city.strip().lower()] = code
+
+        with self._lock:
+            self._codes, self._cities, self._rows = codes, cities, table_rows
+            self._bind = bind
+            self._stale = False
+            self.loaded = True
+            self.reloads += 1
+        return len(table_rows)
+
+    def invalidate(self):
+        """Mark the registry stale; it reloads on next use."""
+        self._stale = True
+
+    def _maybe_reload(self):
+        if self._stale and self._bind is not None:
+            self.load(self._bind)
+
+    def code(self, value: Optional[str]) -> Optional[str]:
+        """Airport code for a city, code or alias; None if unknown."""
+        if not value:
+            return None
+        self._maybe_reload()
+        return self._codes.get(value.strip().lower())
+
+    def exists(self, value: Optional[str]) -> bool:
+        return self.code(value) is not None
+
+    def city(self, value: Optional[str]) -> Optional[str]:
+        """Display city for a city, code or alias; None if unknown."""
+        code = self.code(value)
+        return self._cities.get(code) if code else None
+
+    def location_code(self, value: Optional[str]) -> Optional[str]:
+        """Same key as location_code(), resolved from memory."""
+        return location_code(value, self.code)
+
+    def suggest(self, term: str, limit: int = 10) -> List[dict]:
+        self._maybe_reload()
+        t = term.strip().lower()
+        out = []
+        for row in self._rows:
+            if t in row["city"].lower() or t in row["code"].lower() or t in row["airport_name"].lower():
+                out.append(dict(row))
+                if len(out) >= limit:
+                    break
+        return out
 
-    # Common shortcuts
-    replacements = {
-        "hyd": "Hyderabad",
-        "blr": "Bengaluru",
-        "del": "Delhi",
-        "bom": "Mumbai",
-        "maa": "Chennai",
-    }
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "airports": len(self._rows),
+            "keys": len(self._codes),
+            "reloads": self.reloads,
+            "stale": self._stale,
+        }
 
-    if city in replacements:
-        return replacements[city]
 
-    return city.title()
+# Global singleton instance
+airports = AirportRegistry()
@@ -0,0 +1,79 @@
+# app/utils/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque url-safe token encoding the sort key name, the last
+row's sort value and its id. The next page filters `(sort, id) > (value, id)`
+(or `<` when descending) instead of OFFSET, so page N costs the same index
+seek as page 1. Endpoints return the token in the X-Next-Cursor header.
+"""
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: str, value: Any, row_id: int) -> str:
+    raw = json.dumps([key, value, int(row_id)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, key: str) -> Tuple[Any, int]:
+    """Return (sort value, id). Raises ValueError for malformed tokens or a different sort key."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cur_key, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        row_id = int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cur_key != key:
+        raise ValueError(f"Cursor was issued for sort '{cur_key}', not '{key}'")
+    return value, row_id
+
+
+def keyset_paginate(
+    q,
+    *,
+    key: str,
+    id_column,
+    column=None,
+    descending: bool = False,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Order `q` by (column, id) and return (rows, next_cursor).
+
+    `column` None means the id alone is the sort key. With a cursor, offset is
+    ignored. next_cursor is None on the last page.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, key)
+        if column is None:
+            q = q.filter(id_column < last_id if descending else id_column > last_id)
+        elif descending:
+            q = q.filter(or_(column < value, and_(column == value, id_column < last_id)))
+        else:
+            q = q.filter(or_(column > value, and_(column == value, id_column > last_id)))
+        offset = 0
+
+    direction = (lambda c: c.desc()) if descending else (lambda c: c.asc())
+    if column is not None:
+        q = q.order_by(direction(column), direction(id_column))
+    else:
+        q = q.order_by(direction(id_column))
+
+    if offset:
+        q = q.offset(offset)
+    rows = q.limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    value = getattr(last, column.key) if column is not None else last.id
+    return rows, encode_cursor(key, value, last.id)
@@ -3,6 +3,8 @@ from datetime import datetime, timezone
 from typing import Optional, Union
 from zoneinfo import ZoneInfo
 
+from app.utils import clock
+
 # -------------------------------
 # Human-friendly IST time helpers
 # -------------------------------
@@ -76,24 +78,29 @@ DEFAULT_MIN_UPDATE_SECONDS = 60  # 1 minute
 # -------------------------------
 def now_utc_iso() -> str:
     """Return current UTC time in ISO format with timezone."""
-    return datetime.now(timezone.utc).isoformat()
+    return clock.utc_now().isoformat()
 
 
 # -------------------------------
 # Time difference helper
 # -------------------------------
-def seconds_since_iso(ts_iso: Optional[Union[str, datetime]]) -> float:
+def seconds_since_iso(ts_iso: Optional[Union[str, datetime, int, float]]) -> float:
     """
     Return seconds passed since the timestamp.
     If missing/invalid → return +inf so that should_update_price() returns True (allow update).
-    Accepts either ISO string or datetime.
+    Accepts an ISO string, a datetime or a UTC epoch (the *_ts columns; no parsing needed).
     """
+    if isinstance(ts_iso, (int, float)) and not isinstance(ts_iso, bool):
+        if not ts_iso:
+            return float("inf")
+        return clock.epoch() - ts_iso
+
     dt = _parse_iso_to_dt(ts_iso)
     if not dt:
         return float("inf")
 
     try:
-        now = datetime.now(timezone.utc)
+        now = clock.utc_now()
         delta = now - dt
         return delta.total_seconds()
     except Exception:
@@ -103,7 +110,7 @@ def seconds_since_iso(ts_iso: Optional[Union[str, datetime]]) -> float:
 # -------------------------------
 # Cooldown checker
 # -------------------------------
-def should_update_price(last_price_updated_iso: Optional[Union[str, datetime]],
+def should_update_price(last_price_updated_iso: Optional[Union[str, datetime, int, float]],
                         min_update_seconds: int = DEFAULT_MIN_UPDATE_SECONDS) -> bool:
     """
     True  => allowed to update the price.
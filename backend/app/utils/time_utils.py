@@ -2,6 +2,8 @@ from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 import pytz
 
+from app.utils import clock
+
 def human_time_ist(dt_value):
     """
     Convert ISO or datetime into clean IST human-readable time.
@@ -142,7 +144,7 @@ def get_ist_time():
     Returns:
         Current datetime in IST timezone
     """
-    current_utc = datetime.now(timezone.utc)
+    current_utc = clock.utc_now()
     
     # Try different methods in order of preference
     try:
@@ -2,84 +2,666 @@
 """
 WebSocket Connection Manager for Real-Time Flight Updates
 Handles multiple client connections and broadcasts flight updates.
+
+Clients subscribe to topics and only receive updates for those:
+  "all"                         every flight update
+  "flight:<id>"                 one flight
+  "route:<ORIG>:<DEST>"         every date on a route
+  "route:<ORIG>:<DEST>:<date>"  one route/date (date YYYY-MM-DD)
+New connections start on "all" until their first subscribe, so older
+clients keep receiving everything.
+
+Fan-out never awaits a client: every connection has a bounded outbound
+queue drained by its own writer task, so one slow socket cannot delay the
+rest. When a queue is full the overflow policy applies (SKYFLY_WS_OVERFLOW):
+  coalesce     replace the queued single flight_update for the same flight
+               (batches and other messages: drop the oldest)
+  drop_oldest  drop the oldest queued message
+  disconnect   close the slow client (code 1013, try again later)
+A client that lost a flight_updates batch to overflow gets a `resync` frame
+(replay or snapshot of what it missed, as on resume) in place of its next
+batch, so it never keeps showing prices from the dropped one.
+
+Batches carry a monotonic `seq` (scoped by a per-process `stream` id). The
+manager keeps a ring buffer of recent batches plus the latest update per
+flight, so a reconnecting client that sends its last_seq gets only what it
+missed (see missed_updates()) instead of refetching its search results.
+
+broadcast_sync()/broadcast_updates_sync() publish through a broadcast bus
+(app/utils/broadcast_bus.py), so with several uvicorn workers every worker
+fans the event out to its own sockets. seq/stream stay per worker.
+
+Server-Sent Events subscribers (/api/v1/feeds/stream) share the same topic
+index and queues: a StreamClient takes a socket's place and the response
+body pulls from its queue. Frames carry `id: <stream>:<seq>` so browsers
+resume with Last-Event-ID, and one shared ticker sends keep-alive comments.
+
+WebSocket clients may negotiate a compact frame encoding at connect time
+(?encoding=packed|msgpack, see app/utils/frame_codec.py); each frame is
+encoded once per (subscriber subset, encoding).
 """
-from typing import List
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
 from fastapi import WebSocket
 import json
 import logging
+import os
+import time
+import uuid
+
+from app.utils.broadcast_bus import LocalBus
+from app.utils.date_utils import normalize_date
+from app.utils.frame_codec import encode_updates
+from app.utils.location_utils import location_code
 
 logger = logging.getLogger(__name__)
 
 
 import asyncio
 
+TOPIC_ALL = "all"
+
+# ----------------------------
+# Per-client send queues
+# ----------------------------
+OVERFLOW_POLICIES = ("coalesce", "drop_oldest", "disconnect")
+SEND_QUEUE_SIZE = int(os.environ.get("SKYFLY_WS_QUEUE_SIZE", "256"))
+OVERFLOW_POLICY = os.environ.get("SKYFLY_WS_OVERFLOW", "coalesce")
+if OVERFLOW_POLICY not in OVERFLOW_POLICIES:
+    OVERFLOW_POLICY = "coalesce"
+SEND_TIMEOUT = 10.0   # a send stuck longer than this marks the client dead (checked on fan-out)
+
+# Resume after reconnect
+HISTORY_SIZE = int(os.environ.get("SKYFLY_WS_HISTORY", "512"))   # recent batches kept for replay
+
+# Server-Sent Events
+SSE_HEARTBEAT = 15.0   # keep-alive comment interval for idle streams (seconds); proxies time out at ~60s
+SSE_RETRY_MS = 3000    # reconnect delay suggested to EventSource clients
+
+
+def flight_topic(flight_id) -> str:
+    return f"flight:{int(flight_id)}"
+
+
+def route_topic(origin_code: str, destination_code: str, date: Optional[str] = None) -> str:
+    base = f"route:{origin_code}:{destination_code}"
+    return f"{base}:{date}" if date else base
+
+
+def normalize_topic(topic: str) -> Optional[str]:
+    """
+    Canonical form of a client topic, or None if it is invalid.
+    Route endpoints may be cities, codes or aliases ('Bangalore' -> 'BLR').
+    """
+    if not isinstance(topic, str):
+        return None
+    parts = [p.strip() for p in topic.strip().split(":")]
+    kind = parts[0].lower()
+    try:
+        if kind == TOPIC_ALL and len(parts) == 1:
+            return TOPIC_ALL
+        if kind == "flight" and len(parts) == 2:
+            return flight_topic(parts[1])
+        if kind == "route" and len(parts) in (3, 4) and parts[1] and parts[2]:
+            date = normalize_date(parts[3]) if len(parts) == 4 and parts[3] else None
+            return route_topic(location_code(parts[1]), location_code(parts[2]), date)
+    except (ValueError, TypeError):
+        return None
+    return None
+
+
+def message_topics(message: dict) -> List[str]:
+    """Topics a flight_update reaches: all, its flight, its route and its route/date."""
+    topics = [TOPIC_ALL]
+    if message.get("flight_id") is not None:
+        topics.append(flight_topic(message["flight_id"]))
+    origin, destination = message.get("origin_code"), message.get("destination_code")
+    if origin and destination:
+        topics.append(route_topic(origin, destination))
+        if message.get("flight_date"):
+            topics.append(route_topic(origin, destination, message["flight_date"]))
+    return topics
+
+
+def sse_event(data: str, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """One text/event-stream event (`data` is single-line JSON)."""
+    head = ""
+    if event_id is not None:
+        head += f"id: {event_id}\n"
+    if event:
+        head += f"event: {event}\n"
+    return f"{head}data: {data}\n\n"
+
+
+def parse_event_id(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """'<stream>:<seq>' (our SSE ids) -> (stream, seq); None if malformed."""
+    if not value:
+        return None
+    stream, _, seq = value.strip().rpartition(":")
+    try:
+        return stream, int(seq)
+    except ValueError:
+        return None
+
+
+class StreamClient:
+    """An SSE subscriber. Stands in for a WebSocket in the topic index (hashable by identity)."""
+
+    async def close(self, code: Optional[int] = None):
+        pass  # the response generator ends once its queue is closed
+
+
+class ClientQueue:
+    """Bounded outbound queue plus writer task for one connection (SSE clients pull with get())."""
+
+    def __init__(self, websocket: WebSocket, maxsize: int = SEND_QUEUE_SIZE, policy: str = OVERFLOW_POLICY,
+                 encoding: str = "json"):
+        self.websocket = websocket
+        self.sse = isinstance(websocket, StreamClient)
+        self.encoding = encoding   # flight_updates frame encoding (frame_codec)
+        self.maxsize = maxsize
+        self.policy = policy
+        # (coalesce key, payload, oldest batch seq the payload carries)
+        self._items: Deque[Tuple[Optional[str], Union[str, bytes], Optional[int]]] = deque()
+        self._ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sending_since: Optional[float] = None
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.gap_from: Optional[int] = None   # oldest flight_updates seq dropped since the last resync
+
+    def __len__(self):
+        return len(self._items)
+
+    def offer(self, payload: Union[str, bytes], key: Optional[str] = None, seq: Optional[int] = None) -> bool:
+        """
+        Queue a payload without blocking. Returns False if the client must be disconnected.
+        `seq` marks a flight_updates batch: dropping it records a gap (see gap_from).
+        """
+        if len(self._items) >= self.maxsize:
+            if self.policy == "disconnect":
+                return False
+            if self.policy == "coalesce" and key is not None and self._remove_key(key):
+                self.coalesced += 1
+            else:
+                _, _, dropped_seq = self._items.popleft()
+                self.dropped += 1
+                if dropped_seq is not None:
+                    self.gap_from = dropped_seq if self.gap_from is None else min(self.gap_from, dropped_seq)
+        self._items.append((key, payload, seq))
+        self._ready.set()
+        return True
+
+    def _remove_key(self, key: str) -> bool:
+        for i, (k, _, _) in enumerate(self._items):
+            if k == key:
+                del self._items[i]
+                return True
+        return False
+
+    async def run(self, on_dead):
+        """Writer loop: send queued payloads in order; report the socket dead on failure/timeout."""
+        try:
+            while not self.closed:
+                if not self._items:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, payload, _ = self._items.popleft()
+                self.sending_since = time.monotonic()
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+                self.sending_since = None
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to send message to client: {e!r}")
+            on_dead(self.websocket)
+
+    async def get(self) -> Optional[str]:
+        """
+        Next payload for a pull-based (SSE) client. Returns None when woken with
+        nothing queued (heartbeat poke, or closed). The time until the next call
+        is the time the response spent sending, so it counts towards stalled().
+        """
+        self.sending_since = None
+        if not self._items and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+        if not self._items:
+            return None
+        _, payload, _ = self._items.popleft()
+        self.sending_since = time.monotonic()
+        self.sent += 1
+        return payload
+
+    def poke(self):
+        """Wake a waiting get() (heartbeat)."""
+        self._ready.set()
+
+    def stalled(self, now: float) -> bool:
+        return self.sending_since is not None and now - self.sending_since > SEND_TIMEOUT
+
+    def close(self):
+        """Stop the writer (cancels an in-flight send)."""
+        self.closed = True
+        self._items.clear()
+        self._ready.set()
+        if self.task is not None:
+            self.task.cancel()
+
+
 class ConnectionManager:
-    """Manages WebSocket connections and broadcasts messages to all connected clients."""
-    
+    """Manages WebSocket connections and their topic subscriptions; broadcasts to interested clients."""
+
     def __init__(self):
         self.active_connections: List[WebSocket] = []
         self._main_loop = None
+        # topic -> connections, and the reverse (connection -> topics).
+        # Only touched from the event loop, so no locking is needed.
+        self._subscribers: Dict[str, Set[WebSocket]] = {}
+        self._topics: Dict[WebSocket, Set[str]] = {}
+        self._explicit: Set[WebSocket] = set()   # has sent at least one subscribe
+        self._clients: Dict[WebSocket, ClientQueue] = {}
+        # overflow counters carried over from closed clients
+        self.sent_total = 0
+        self.dropped_total = 0
+        self.coalesced_total = 0
+        self.overflow_disconnects = 0
+        self.seq = 0                    # flight_updates batch sequence number
+        self.stream = uuid.uuid4().hex[:12]   # seq numbers are only comparable within one process
+        self._history: Deque[Tuple[int, List[dict]]] = deque(maxlen=HISTORY_SIZE)
+        self._latest: Dict[int, Tuple[int, dict]] = {}   # flight_id -> (seq, latest update)
+        self.frames_serialized = 0
+        self.resyncs = 0                # resync frames sent in place of a batch after an overflow drop
+        self._streams: Set[StreamClient] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.bus = LocalBus()
+        self.bus.start(self._dispatch)
 
     def set_loop(self, loop):
         """Set the main event loop for thread-safe broadcasting."""
         self._main_loop = loop
-    
-    async def connect(self, websocket: WebSocket):
-        """Accept and register a new WebSocket connection."""
+
+    # ----------------------------
+    # Broadcast bus
+    # ----------------------------
+    def start_bus(self, bus):
+        """Swap in a cross-worker bus (see broadcast_bus.create_bus); stays local if it fails to start."""
+        try:
+            bus.start(self._dispatch)
+        except Exception as e:
+            logger.warning("Broadcast bus %s failed to start, staying local: %r", bus.name, e)
+            return
+        old, self.bus = self.bus, bus
+        old.stop()
+        logger.info("Broadcast bus: %s", bus.name)
+
+    def stop_bus(self):
+        self.bus.stop()
+        self.bus = LocalBus()
+        self.bus.start(self._dispatch)
+
+    def _dispatch(self, event: dict):
+        """Bus delivery (any thread): fan the event out to this worker's clients."""
+        if not self._main_loop or self._main_loop.is_closed():
+            return
+        if event.get("kind") == "updates":
+            coro = self.broadcast_updates(event.get("updates") or [])
+        elif event.get("kind") == "message":
+            coro = self.broadcast(event.get("message") or {}, event.get("topics"))
+        else:
+            return
+        asyncio.run_coroutine_threadsafe(coro, self._main_loop)
+
+    async def connect(self, websocket: WebSocket, encoding: str = "json"):
+        """Accept and register a new WebSocket connection (implicitly subscribed to "all")."""
         await websocket.accept()
         self.active_connections.append(websocket)
+        client = ClientQueue(websocket, encoding=encoding)
+        client.task = asyncio.create_task(client.run(self.disconnect))
+        self._clients[websocket] = client
+        self._topics[websocket] = set()
+        self._add(websocket, TOPIC_ALL)
         logger.info(f"New WebSocket connection. Total connections: {len(self.active_connections)}")
-    
+
     def disconnect(self, websocket: WebSocket):
-        """Remove a WebSocket connection from active connections."""
+        """Remove a WebSocket connection from active connections and every topic."""
+        for topic in self._topics.pop(websocket, set()):
+            self._discard(websocket, topic)
+        self._explicit.discard(websocket)
+        client = self._clients.pop(websocket, None)
+        if client is not None:
+            self.sent_total += client.sent
+            self.dropped_total += client.dropped
+            self.coalesced_total += client.coalesced
+            client.close()
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
             logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def broadcast(self, message: dict):
+
+    # ----------------------------
+    # Server-Sent Events subscribers
+    # ----------------------------
+    def attach_stream(self, topics: Optional[Iterable[str]] = None) -> Tuple[StreamClient, List[str]]:
+        """Register an SSE subscriber on `topics` (default "all"). Returns (client, invalid topics)."""
+        client = StreamClient()
+        self._clients[client] = ClientQueue(client)
+        self._topics[client] = set()
+        self._streams.add(client)
+        self._add(client, TOPIC_ALL)
+        invalid = self.subscribe(client, topics) if topics else []
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.ensure_future(self._heartbeat())
+        return client, invalid
+
+    def detach_stream(self, client: StreamClient):
+        self._streams.discard(client)
+        self.disconnect(client)
+
+    async def next_event(self, client: StreamClient) -> Optional[str]:
+        """Next SSE event text for `client`, ":" keep-alive comment when idle, None once it is dropped."""
+        queue = self._clients.get(client)
+        if queue is None:
+            return None
+        payload = await queue.get()
+        if payload is None:
+            return None if queue.closed else ": ping\n\n"
+        return payload
+
+    async def _heartbeat(self):
+        """One ticker for every SSE subscriber (instead of a timer per idle connection)."""
+        while self._streams:
+            await asyncio.sleep(SSE_HEARTBEAT)
+            for client in list(self._streams):
+                queue = self._clients.get(client)
+                if queue is not None:
+                    queue.poke()
+
+    def stream_hello(self, client: StreamClient) -> str:
+        """First event of a stream; its id lets the client resume from here."""
+        data = json.dumps({"seq": self.seq, "stream": self.stream, "topics": self.subscriptions(client)})
+        return f"retry: {SSE_RETRY_MS}\n" + sse_event(data, "connection_established", f"{self.stream}:{self.seq}")
+
+    # ----------------------------
+    # Subscriptions
+    # ----------------------------
+    def _add(self, websocket: WebSocket, topic: str):
+        self._subscribers.setdefault(topic, set()).add(websocket)
+        self._topics[websocket].add(topic)
+
+    def _discard(self, websocket: WebSocket, topic: str):
+        subs = self._subscribers.get(topic)
+        if subs is not None:
+            subs.discard(websocket)
+            if not subs:
+                del self._subscribers[topic]
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        """
+        Add topics for a connection. The first explicit subscribe replaces the
+        implicit "all". Returns the invalid topics (ignored).
+        """
+        if websocket not in self._topics:
+            return list(topics)
+        if websocket not in self._explicit:
+            self._explicit.add(websocket)
+            self._topics[websocket].discard(TOPIC_ALL)
+            self._discard(websocket, TOPIC_ALL)
+        invalid = []
+        for raw in topics:
+            topic = normalize_topic(raw)
+            if topic is None:
+                invalid.append(raw)
+            else:
+                self._add(websocket, topic)
+        return invalid
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        """Remove topics from a connection (unknown topics are ignored)."""
+        current = self._topics.get(websocket)
+        if current is None:
+            return
+        self._explicit.add(websocket)
+        for raw in topics:
+            topic = normalize_topic(raw)
+            if topic in current:
+                current.discard(topic)
+                self._discard(websocket, topic)
+
+    def subscriptions(self, websocket: WebSocket) -> List[str]:
+        return sorted(self._topics.get(websocket, ()))
+
+    def recipients(self, topics: Iterable[str]) -> Set[WebSocket]:
+        out: Set[WebSocket] = set()
+        for topic in topics:
+            out |= self._subscribers.get(topic, set())
+        return out
+
+    # ----------------------------
+    # Broadcasting
+    # ----------------------------
+    def send_personal(self, websocket: WebSocket, message) -> bool:
+        """Queue a reply (dict as JSON, or raw text) for one client, behind its pending updates."""
+        client = self._clients.get(websocket)
+        if client is None:
+            return False
+        payload = message if isinstance(message, str) else json.dumps(message)
+        if not client.offer(payload):
+            self._overflow(websocket)
+            return False
+        return True
+
+    def _deliver(self, websocket: WebSocket, payload: Union[str, bytes], key: Optional[str], now: float,
+                 seq: Optional[int] = None):
+        """Enqueue for one client; drop it if its writer is stuck or (disconnect policy) its queue is full."""
+        client = self._clients.get(websocket)
+        if client is None:
+            return
+        if client.stalled(now):
+            logger.warning("WebSocket send stalled for over %ss; dropping client", SEND_TIMEOUT)
+            self.disconnect(websocket)
+            asyncio.ensure_future(self._close(websocket))
+        elif not client.offer(payload, key, seq):
+            self._overflow(websocket)
+
+    def _overflow(self, websocket: WebSocket):
+        """'disconnect' policy: drop a client whose queue is full."""
+        self.overflow_disconnects += 1
+        self.disconnect(websocket)
+        asyncio.ensure_future(self._close(websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
+    async def broadcast(self, message: dict, topics: Optional[Iterable[str]] = None):
         """
-        Broadcast a message to all connected clients.
-        Automatically removes dead connections.
-        
+        Queue a message for the clients subscribed to any of `topics`.
+        Defaults to the message's own topics for flight updates, else every client.
+        Never waits on a client: each connection's writer task does the sending.
+
         Args:
-            message: Dictionary to be sent as JSON to all clients
+            message: Dictionary to be sent as JSON
+            topics: Optional explicit topic list
         """
-        if not self.active_connections:
+        if not self._clients:
             return
-        
-        # Convert message to JSON string
+
+        if topics is None and message.get("type") == "flight_update":
+            topics = message_topics(message)
+        targets = list(self.recipients(topics)) if topics is not None else list(self._clients)
+        if not targets:
+            return
+
+        # Convert message to JSON string (once, whatever the number of recipients)
         try:
             message_json = json.dumps(message)
         except Exception as e:
             logger.error(f"Failed to serialize message: {e}")
             return
-        
-        # Track dead connections to remove
-        dead_connections = []
-        
-        # Broadcast to all active connections
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception as e:
-                logger.warning(f"Failed to send message to client: {e}")
-                dead_connections.append(connection)
-        
-        # Clean up dead connections
-        for dead in dead_connections:
-            self.disconnect(dead)
-
-    def broadcast_sync(self, message: dict):
+
+        # updates for the same flight may replace each other in a full queue
+        key = flight_topic(message["flight_id"]) if message.get("flight_id") is not None else None
+        event_text = None
+        now = time.monotonic()
+        for connection in targets:
+            if connection in self._streams:
+                if event_text is None:
+                    event_text = sse_event(message_json, message.get("type") or "message")
+                self._deliver(connection, event_text, key, now)
+            else:
+                self._deliver(connection, message_json, key, now)
+
+    async def broadcast_updates(self, updates: List[dict]):
         """
-        Thread-safe wrapper for broadcast.
-        Call this from background threads (like simulator).
+        Fan out a batch of flight updates as one `flight_updates` frame per client:
+            {"type": "flight_updates", "seq": 42, "updates": [{...flight_update fields...}, ...]}
+        (or its packed/msgpack form). Each client gets only the updates matching its
+        topics. Clients wanting the same subset in the same encoding share one
+        serialized frame (all "all" subscribers share one).
         """
-        if self._main_loop and not self._main_loop.is_closed():
-            asyncio.run_coroutine_threadsafe(self.broadcast(message), self._main_loop)
+        if not updates:
+            return
+        seq = self._record(updates)
+        if not self._clients:
+            return
+
+        wanted: Dict[WebSocket, List[int]] = {}
+        for i, update in enumerate(updates):
+            for connection in self.recipients(message_topics(update)):
+                wanted.setdefault(connection, []).append(i)
+
+        # one encoded frame per (subset, encoding); SSE events wrap the JSON frame
+        frames: Dict[Tuple[Tuple[int, ...], str], Union[str, bytes]] = {}
+        now = time.monotonic()
+        for connection, indexes in wanted.items():
+            client = self._clients.get(connection)
+            if client is None:
+                continue
+            if client.gap_from is not None:
+                # it lost a batch to overflow: this frame carries everything it missed instead
+                gap, client.gap_from = client.gap_from, None
+                self._deliver(connection, self._resync_frame(connection, client, gap), None, now, gap)
+                self.resyncs += 1
+                continue
+            subset = tuple(indexes)
+            encoding = "sse" if client.sse else client.encoding
+            payload = frames.get((subset, encoding))
+            if payload is None:
+                try:
+                    payload = self._frame(frames, subset, encoding, seq, updates)
+                except Exception as e:
+                    logger.error(f"Failed to serialize message: {e}")
+                    return
+            self._deliver(connection, payload, None, now, seq)
+        self.frames_serialized += len(frames)
+
+    def _resync_frame(self, websocket: WebSocket, client: ClientQueue, gap: int) -> str:
+        """`resync` frame (JSON; SSE event) with the client's updates from batch `gap` onwards."""
+        mode, updates = self.missed_updates(websocket, gap - 1, self.stream) or ("full", [])
+        data = json.dumps({"type": "resync", "mode": mode, "seq": self.seq, "stream": self.stream, "updates": updates})
+        return sse_event(data, "resync", f"{self.stream}:{self.seq}") if client.sse else data
+
+    def _frame(self, frames: dict, subset: Tuple[int, ...], encoding: str, seq: int, updates: List[dict]):
+        """Encode (and cache in `frames`) the flight_updates frame for one subset/encoding."""
+        if encoding == "sse":
+            data = frames.get((subset, "json")) or self._frame(frames, subset, "json", seq, updates)
+            payload = sse_event(data, "flight_updates", f"{self.stream}:{seq}")
         else:
-            # Fallback (risky if loop is different, but keeps old behavior if loop not set)
-            # Actually, doing nothing is safer than crashing main thread.
-            pass
+            payload = encode_updates(seq, self.stream, [updates[i] for i in subset], encoding)
+        frames[(subset, encoding)] = payload
+        return payload
+
+    # ----------------------------
+    # Sequence history / resume
+    # ----------------------------
+    def _record(self, updates: List[dict]) -> int:
+        """Assign the next seq to a batch and remember it for reconnecting clients."""
+        self.seq += 1
+        self._history.append((self.seq, updates))
+        for update in updates:
+            if update.get("flight_id") is not None:
+                self._latest[update["flight_id"]] = (self.seq, update)
+        return self.seq
+
+    def wants(self, websocket: WebSocket, update: dict) -> bool:
+        """Would this client receive `update` under its current topics?"""
+        topics = self._topics.get(websocket, ())
+        return any(t in topics for t in message_topics(update))
+
+    def missed_updates(self, websocket: WebSocket, last_seq: int, stream: Optional[str]):
+        """
+        (mode, updates) a client missed after `last_seq`, filtered by its topics:
+          "replay"    the gap is still in the ring buffer (latest delta per flight)
+          "snapshot"  too far behind: latest known state of every flight changed since last_seq
+        Returns None when the seq is from another process (restart/deploy) and can't be compared.
+        """
+        if stream != self.stream or last_seq < 0 or last_seq > self.seq:
+            return None
+        oldest = self._history[0][0] if self._history else self.seq + 1
+        merged: Dict[int, dict] = {}
+        if last_seq + 1 >= oldest:
+            mode = "replay"
+            for seq, updates in self._history:
+                if seq > last_seq:
+                    for update in updates:
+                        merged[update["flight_id"]] = update
+        else:
+            mode = "snapshot"
+            merged = {fid: update for fid, (seq, update) in self._latest.items() if seq > last_seq}
+        return mode, [u for u in merged.values() if self.wants(websocket, u)]
+
+    def latest_update(self, flight_id: int) -> Optional[dict]:
+        entry = self._latest.get(flight_id)
+        return entry[1] if entry else None
+
+    def broadcast_updates_sync(self, updates: List[dict]):
+        """Thread-safe: publish a batch on the bus (one loop wakeup per batch in every worker)."""
+        if updates:
+            self.bus.publish({"kind": "updates", "updates": updates})
+
+    def broadcast_sync(self, message: dict, topics: Optional[Iterable[str]] = None):
+        """
+        Thread-safe wrapper for broadcast, published on the bus so every worker sends it.
+        Call this from background threads (like simulator).
+        """
+        self.bus.publish({"kind": "message", "message": message, "topics": list(topics) if topics is not None else None})
+
+    def stats(self) -> dict:
+        depths = [len(c) for c in self._clients.values()]
+        return {
+            "connections": len(self.active_connections),
+            "streams": len(self._streams),
+            "encodings": {e: sum(1 for c in self._clients.values() if not c.sse and c.encoding == e)
+                          for e in sorted({c.encoding for c in self._clients.values() if not c.sse})},
+            "topics": len(self._subscribers),
+            "subscribers_all": len(self._subscribers.get(TOPIC_ALL, ())),
+            "overflow_policy": OVERFLOW_POLICY,
+            "queue_capacity": SEND_QUEUE_SIZE,
+            "queued_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "sent": self.sent_total + sum(c.sent for c in self._clients.values()),
+            "dropped": self.dropped_total + sum(c.dropped for c in self._clients.values()),
+            "coalesced": self.coalesced_total + sum(c.coalesced for c in self._clients.values()),
+            "overflow_disconnects": self.overflow_disconnects,
+            "seq": self.seq,
+            "stream": self.stream,
+            "history_batches": len(self._history),
+            "history_oldest_seq": self._history[0][0] if self._history else None,
+            "latest_flights": len(self._latest),
+            "frames_serialized": self.frames_serialized,
+            "overflow_resyncs": self.resyncs,
+            "bus": self.bus.stats(),
+        }
 
 
 # Global singleton instance
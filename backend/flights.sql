@@ -96,7 +96,8 @@ CREATE TABLE IF NOT EXISTS search_logs (
     origin_code TEXT,
     destination_code TEXT,
     search_date TEXT,
-    searched_at TEXT DEFAULT (datetime('now'))
+    searched_at TEXT DEFAULT (datetime('now')),
+    searched_ts INTEGER             -- UTC epoch of the search (demand aggregator decays by it)
 );
 
 CREATE INDEX IF NOT EXISTS idx_search_logs_route ON search_logs(origin_code, destination_code);
@@ -11,6 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.db import models
 from app.db.base import engine
+from app.db.migrations import upgrade_to_head
 
 # ----------------------------------------------------
 # CONFIG
@@ -32,6 +33,8 @@ requests_logger = logging.getLogger("skyfly.requests")
 # DATABASE INIT (idempotent)
 # ----------------------------------------------------
 models.Base.metadata.create_all(bind=engine)
+# bring existing databases up to date (new columns/indexes/backfills; see migrations/)
+upgrade_to_head(engine)
 
 # ----------------------------------------------------
 # APP
@@ -78,6 +81,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ----------------------------------------------------
@@ -107,6 +111,7 @@ def safe_include(module_path: str, router_attr: str = "router", prefix: Optional
 safe_include("app.api.v1.admin")
 safe_include("app.api.v1.flights")
 safe_include("app.api.v1.feeds")
+safe_include("app.api.v1.websocket")                       # /ws/feeds real-time updates
 
 # Optional routers
 safe_include("app.api.v1.bookings")                        # bookings (M3)
@@ -140,9 +145,40 @@ def on_startup():
     try:
         loop = asyncio.get_running_loop()
         manager.set_loop(loop)
+        if _simulator and callable(getattr(_simulator, "bind_loop", None)):
+            _simulator.bind_loop(loop)
     except Exception as e:
         logger.error(f"Failed to capture event loop for WebSocket manager: {e}")
 
+    # Broadcast bus: fan updates out across uvicorn workers (SKYFLY_BROADCAST_BACKEND)
+    try:
+        from app.utils.broadcast_bus import create_bus
+        manager.start_bus(create_bus())
+    except Exception:
+        logger.exception("Failed to start broadcast bus")
+
+    # Airport registry: resolve cities/codes in memory instead of per-search SQL
+    try:
+        from app.utils.location_utils import airports
+        count = airports.load(engine)
+        logger.info("Airport registry loaded (%d airports).", count)
+    except Exception:
+        logger.exception("Failed to load airport registry")
+
+    # Background writer for search_logs (searches only enqueue)
+    try:
+        from app.services.search_log_writer import search_log_writer
+        search_log_writer.start(engine)
+    except Exception:
+        logger.exception("Failed to start search log writer")
+
+    # Demand scores from search traffic (one leader across workers, see demand_aggregator)
+    try:
+        from app.services.demand_aggregator import demand_aggregator
+        demand_aggregator.start()
+    except Exception:
+        logger.exception("Failed to start demand aggregator")
+
     # SIMULATOR AUTO-START DISABLED (Manual start via /admin only)
     # if _simulator and callable(getattr(_simulator, "start", None)):
     #     try:
@@ -154,14 +190,33 @@ def on_startup():
     logger.info("SkyFly API started and ready.")
 
 @app.on_event("shutdown")
-def on_shutdown():
+async def on_shutdown():
     logger.info("SkyFly API shutdown initiated.")
-    if _simulator and callable(getattr(_simulator, "stop", None)):
+    # Stop the simulator first and wait for an in-flight tick to commit before the engine goes away
+    if _simulator and callable(getattr(_simulator, "stop_async", None)):
         try:
-            _simulator.stop()
-            logger.info("Simulator stop requested.")
+            await _simulator.stop_async()
+            logger.info("Simulator stopped.")
         except Exception:
             logger.exception("Failed to stop simulator")
+    try:
+        from app.services.search_log_writer import search_log_writer
+        search_log_writer.stop()
+    except Exception:
+        logger.exception("Failed to flush search log writer")
+    try:
+        from app.services.demand_aggregator import demand_aggregator
+        demand_aggregator.stop()
+    except Exception:
+        logger.exception("Failed to stop demand aggregator")
+    try:
+        manager.stop_bus()
+    except Exception:
+        logger.exception("Failed to stop broadcast bus")
+    try:
+        engine.dispose()
+    except Exception:
+        logger.exception("Failed to dispose database engine")
     logger.info("SkyFly API shutdown complete.")
 
 # ----------------------------------------------------
@@ -179,4 +234,9 @@ def health():
             payload["simulator"] = _simulator.status()
     except Exception:
         payload["simulator"] = {"error": "failed to read simulator status"}
+    try:
+        from app.services.search_log_writer import search_log_writer
+        payload["search_log"] = search_log_writer.stats()
+    except Exception:
+        payload["search_log"] = {"error": "failed to read search log writer"}
     return payload
\ No newline at end of file
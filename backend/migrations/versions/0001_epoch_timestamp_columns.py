@@ -0,0 +1,94 @@
+"""epoch timestamp columns
+
+Adds integer UTC epoch mirrors of the ISO string timestamps so hot paths can
+range-scan indexes instead of parsing/comparing strings:
+  flights.departure_ts, flights.last_price_updated_ts,
+  bookings.hold_expires_ts, fare_history.changed_ts
+
+Revision ID: 0001_epoch_ts
+Revises:
+Create Date: 2026-10-16
+"""
+from datetime import datetime, timezone, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import has_column, has_index
+
+revision = "0001_epoch_ts"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+IST = timezone(timedelta(hours=5, minutes=30))
+BATCH = 1000
+
+COLUMNS = [
+    # table, column, source ISO column, timezone for naive values
+    ("flights", "departure_ts", "departure_iso", IST),
+    ("flights", "last_price_updated_ts", "last_price_updated", timezone.utc),
+    ("bookings", "hold_expires_ts", "hold_expires_at", timezone.utc),
+    ("fare_history", "changed_ts", "changed_at", timezone.utc),
+]
+
+INDEXES = [
+    ("ix_flights_departure_ts", "flights", ["departure_ts"]),
+    ("ix_bookings_hold_expires_ts", "bookings", ["hold_expires_ts"]),
+    ("idx_bookings_flight_hold", "bookings", ["flight_id", "status", "hold_expires_ts"]),
+    ("ix_fare_history_changed_ts", "fare_history", ["changed_ts"]),
+]
+
+
+def _to_ts(value, naive_tz):
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except Exception:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=naive_tz)
+    return int(dt.timestamp())
+
+
+def _backfill(bind, table, column, source, naive_tz):
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                f"SELECT id, {source} FROM {table} "
+                f"WHERE id > :last AND {column} IS NULL AND {source} IS NOT NULL "
+                f"ORDER BY id LIMIT :n"
+            ),
+            {"last": last_id, "n": BATCH},
+        ).fetchall()
+        if not rows:
+            return
+        params = [{"id": r[0], "ts": _to_ts(r[1], naive_tz)} for r in rows]
+        params = [p for p in params if p["ts"] is not None]
+        if params:
+            bind.execute(sa.text(f"UPDATE {table} SET {column} = :ts WHERE id = :id"), params)
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, column, source, naive_tz in COLUMNS:
+        if not has_column(bind, table, column):
+            op.add_column(table, sa.Column(column, sa.Integer(), nullable=True))
+        _backfill(bind, table, column, source, naive_tz)
+    for name, table, cols in INDEXES:
+        if not has_index(bind, table, name):
+            op.create_index(name, table, cols)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for name, table, _ in INDEXES:
+        if has_index(bind, table, name):
+            op.drop_index(name, table_name=table)
+    for table, column, _, _ in COLUMNS:
+        if has_column(bind, table, column):
+            with op.batch_alter_table(table) as batch:
+                batch.drop_column(column)
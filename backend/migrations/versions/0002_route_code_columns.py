@@ -0,0 +1,87 @@
+"""route code columns
+
+Adds flights.origin_code / destination_code (canonical airport codes resolved
+from the airports table) and the composite search index
+idx_flights_route_date (origin_code, destination_code, flight_date, departure_ts).
+
+Revision ID: 0002_route_codes
+Revises: 0001_epoch_ts
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import has_table, has_column, has_index
+from app.utils.location_utils import location_code
+
+revision = "0002_route_codes"
+down_revision = "0001_epoch_ts"
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+ROUTE_INDEX = "idx_flights_route_date"
+
+
+def _airport_map(bind):
+    rows = bind.execute(sa.text("SELECT code, city FROM airports")).fetchall()
+    out = {}
+    for code, city in rows:
+        if city:
+            out.setdefault(city.strip().lower(), code)
+        out[code.strip().lower()] = code
+    return out
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not has_table(bind, "airports"):
+        op.create_table(
+            "airports",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("code", sa.String(), nullable=False, unique=True),
+            sa.Column("city", sa.String(), nullable=False),
+            sa.Column("airport_name", sa.String(), nullable=True),
+            sa.Column("country", sa.String(), server_default="India"),
+        )
+        op.create_index("idx_airports_city", "airports", ["city"])
+        op.create_index("idx_airports_code", "airports", ["code"])
+
+    for column in ("origin_code", "destination_code"):
+        if not has_column(bind, "flights", column):
+            op.add_column("flights", sa.Column(column, sa.String(), nullable=True))
+
+    airports = _airport_map(bind)
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, origin, destination FROM flights "
+                "WHERE id > :last AND (origin_code IS NULL OR destination_code IS NULL) "
+                "ORDER BY id LIMIT :n"
+            ),
+            {"last": last_id, "n": BATCH},
+        ).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE flights SET origin_code = :o, destination_code = :d WHERE id = :id"),
+            [
+                {"id": r[0], "o": location_code(r[1], airports.get), "d": location_code(r[2], airports.get)}
+                for r in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    if not has_index(bind, "flights", ROUTE_INDEX):
+        op.create_index(ROUTE_INDEX, "flights", ["origin_code", "destination_code", "flight_date", "departure_ts"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if has_index(bind, "flights", ROUTE_INDEX):
+        op.drop_index(ROUTE_INDEX, table_name="flights")
+    with op.batch_alter_table("flights") as batch:
+        for column in ("origin_code", "destination_code"):
+            if has_column(bind, "flights", column):
+                batch.drop_column(column)
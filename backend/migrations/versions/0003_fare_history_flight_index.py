@@ -0,0 +1,31 @@
+"""fare history flight index
+
+Adds idx_fare_history_flight (flight_id, id) so keyset pages of
+/fare_history/{flight_id} are a single index seek.
+
+Revision ID: 0003_fare_history_flight
+Revises: 0002_route_codes
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+from app.db.migrations import has_index
+
+revision = "0003_fare_history_flight"
+down_revision = "0002_route_codes"
+branch_labels = None
+depends_on = None
+
+INDEX = "idx_fare_history_flight"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not has_index(bind, "fare_history", INDEX):
+        op.create_index(INDEX, "fare_history", ["flight_id", "id"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if has_index(bind, "fare_history", INDEX):
+        op.drop_index(INDEX, table_name="fare_history")
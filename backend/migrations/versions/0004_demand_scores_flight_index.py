@@ -0,0 +1,32 @@
+"""demand scores flight index
+
+Adds idx_demand_scores_flight (flight_id): simulator ticks preload a whole
+batch's demand rows with flight_id IN (...), and surges look rows up by
+flight, so these become index seeks instead of table scans.
+
+Revision ID: 0004_demand_flight
+Revises: 0003_fare_history_flight
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+from app.db.migrations import has_index
+
+revision = "0004_demand_flight"
+down_revision = "0003_fare_history_flight"
+branch_labels = None
+depends_on = None
+
+INDEX = "idx_demand_scores_flight"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not has_index(bind, "demand_scores", INDEX):
+        op.create_index(INDEX, "demand_scores", ["flight_id"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if has_index(bind, "demand_scores", INDEX):
+        op.drop_index(INDEX, table_name="demand_scores")
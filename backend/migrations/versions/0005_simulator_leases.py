@@ -0,0 +1,39 @@
+"""simulator leases
+
+Adds the simulator_leases table: a single row per lease name records which
+process currently runs simulator ticks and until when its lease holds.
+
+Revision ID: 0005_simulator_leases
+Revises: 0004_demand_flight
+Create Date: 2026-10-16
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from app.db.migrations import has_table
+
+revision = "0005_simulator_leases"
+down_revision = "0004_demand_flight"
+branch_labels = None
+depends_on = None
+
+TABLE = "simulator_leases"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not has_table(bind, TABLE):
+        op.create_table(
+            TABLE,
+            sa.Column("name", sa.String(), primary_key=True),
+            sa.Column("holder", sa.String(), nullable=False),
+            sa.Column("acquired_ts", sa.Integer(), nullable=False),
+            sa.Column("renewed_ts", sa.Integer(), nullable=False),
+            sa.Column("expires_ts", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if has_table(bind, TABLE):
+        op.drop_table(TABLE)
@@ -0,0 +1,50 @@
+"""demand events
+
+Adds the demand_events table: calendar surges (destination or route scope,
+start/end, magnitude, decay curve) that pricing applies at read time, so a
+surge is a single row write instead of an update per flight.
+
+Revision ID: 0006_demand_events
+Revises: 0005_simulator_leases
+Create Date: 2026-10-16
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from app.db.migrations import has_index, has_table
+
+revision = "0006_demand_events"
+down_revision = "0005_simulator_leases"
+branch_labels = None
+depends_on = None
+
+TABLE = "demand_events"
+INDEX = "idx_demand_events_ends"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not has_table(bind, TABLE):
+        op.create_table(
+            TABLE,
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("label", sa.String(), nullable=True),
+            sa.Column("scope", sa.String(), nullable=False),
+            sa.Column("origin_code", sa.String(), nullable=True),
+            sa.Column("destination_code", sa.String(), nullable=False),
+            sa.Column("starts_ts", sa.Integer(), nullable=False),
+            sa.Column("ends_ts", sa.Integer(), nullable=True),
+            sa.Column("magnitude", sa.Float(), nullable=False),
+            sa.Column("decay", sa.String(), nullable=False),
+            sa.Column("half_life_seconds", sa.Integer(), nullable=True),
+            sa.Column("created_ts", sa.Integer(), nullable=False),
+            sa.Column("updated_ts", sa.Integer(), nullable=False),
+        )
+    if not has_index(bind, TABLE, INDEX):
+        op.create_index(INDEX, TABLE, ["ends_ts"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if has_table(bind, TABLE):
+        op.drop_table(TABLE)
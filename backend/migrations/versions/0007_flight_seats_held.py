@@ -0,0 +1,42 @@
+"""flight seats_held counter
+
+Adds flights.seats_held: seats in 'reserved' bookings, kept by conditional
+UPDATEs on reserve/confirm/cancel/expiry so availability is a column read
+instead of a SUM over bookings. Backfilled from the bookings still in
+'reserved' status (expired holds are released by the next sweep).
+
+Revision ID: 0007_flight_seats_held
+Revises: 0006_demand_events
+Create Date: 2026-10-16
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from app.db.migrations import has_column
+
+revision = "0007_flight_seats_held"
+down_revision = "0006_demand_events"
+branch_labels = None
+depends_on = None
+
+TABLE = "flights"
+COLUMN = "seats_held"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not has_column(bind, TABLE, COLUMN):
+        op.add_column(TABLE, sa.Column(COLUMN, sa.Integer(), nullable=False, server_default="0"))
+    bind.execute(sa.text(
+        "UPDATE flights SET seats_held = COALESCE(("
+        "  SELECT SUM(b.seats_booked) FROM bookings b"
+        "  WHERE b.flight_id = flights.id AND b.status = 'reserved'"
+        "), 0)"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if has_column(bind, TABLE, COLUMN):
+        with op.batch_alter_table(TABLE) as batch:
+            batch.drop_column(COLUMN)
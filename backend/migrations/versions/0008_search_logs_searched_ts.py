@@ -0,0 +1,88 @@
+"""search_logs searched_ts
+
+Adds search_logs.searched_ts (UTC epoch of the search). searched_at is only
+the IST calendar day ('Saturday 30 November 2025'), so the demand
+aggregator could not tell a days-old search from a new one when warming
+up. Existing rows are backfilled with the start of their IST day; rows
+whose searched_at does not parse stay NULL and are not counted.
+
+Creates search_logs (schema from flights.sql) if the database lacks it.
+
+Revision ID: 0008_search_logs_searched_ts
+Revises: 0007_flight_seats_held
+Create Date: 2026-10-16
+"""
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.db.migrations import has_column, has_table
+
+revision = "0008_search_logs_searched_ts"
+down_revision = "0007_flight_seats_held"
+branch_labels = None
+depends_on = None
+
+TABLE = "search_logs"
+COLUMN = "searched_ts"
+IST = timezone(timedelta(hours=5, minutes=30))
+FORMATS = ("%A %d %B %Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")   # writer format, SQLite default, bare date
+BATCH = 1000
+
+
+def _to_ts(value):
+    if not value:
+        return None
+    for fmt in FORMATS:
+        try:
+            dt = datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+        # the writer stores IST days; datetime('now') defaults are UTC
+        return int(dt.replace(tzinfo=IST if fmt == FORMATS[0] else timezone.utc).timestamp())
+    return None
+
+
+def _backfill(bind):
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                f"SELECT id, searched_at FROM {TABLE} "
+                f"WHERE id > :last AND {COLUMN} IS NULL ORDER BY id LIMIT :n"
+            ),
+            {"last": last_id, "n": BATCH},
+        ).fetchall()
+        if not rows:
+            return
+        params = [{"id": r[0], "ts": _to_ts(r[1])} for r in rows]
+        params = [p for p in params if p["ts"] is not None]
+        if params:
+            bind.execute(sa.text(f"UPDATE {TABLE} SET {COLUMN} = :ts WHERE id = :id"), params)
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not has_table(bind, TABLE):
+        op.create_table(
+            TABLE,
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("origin_code", sa.Text(), nullable=True),
+            sa.Column("destination_code", sa.Text(), nullable=True),
+            sa.Column("search_date", sa.Text(), nullable=True),
+            sa.Column("searched_at", sa.Text(), nullable=True, server_default=sa.text("(datetime('now'))")),
+            sa.Column(COLUMN, sa.Integer(), nullable=True),
+        )
+        return
+    if not has_column(bind, TABLE, COLUMN):
+        op.add_column(TABLE, sa.Column(COLUMN, sa.Integer(), nullable=True))
+    _backfill(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if has_table(bind, TABLE) and has_column(bind, TABLE, COLUMN):
+        with op.batch_alter_table(TABLE) as batch:
+            batch.drop_column(COLUMN)
@@ -0,0 +1,84 @@
+"""
+Benchmark flight_updates frame encodings (json / packed / msgpack).
+
+Encodes synthetic batches shaped like the simulator's updates and reports,
+per batch size and encoding, the encode time per frame and the frame size
+(raw, and deflated as permessage-deflate would send it).
+
+    python scripts/bench_frame_encoding.py
+    python scripts/bench_frame_encoding.py --sizes 1 50 500 --repeat 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+# Add backend directory to path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.frame_codec import ENCODINGS, decode_updates, encode_updates, msgpack
+
+CODES = ["DEL", "BOM", "BLR", "MAA", "HYD", "CCU", "GOI", "PNQ"]
+
+
+def make_updates(n: int, rnd: random.Random) -> list:
+    now = datetime.now(timezone.utc)
+    out = []
+    for i in range(n):
+        o, d = rnd.sample(CODES, 2)
+        out.append({
+            "flight_id": rnd.randint(1, 200000),
+            "flight_number": f"{rnd.choice(['AI', '6E', 'SG', 'UK'])}{rnd.randint(100, 9999)}",
+            "origin_code": o,
+            "destination_code": d,
+            "flight_date": (now + timedelta(days=rnd.randint(0, 60))).strftime("%Y-%m-%d"),
+            "price": round(rnd.uniform(2000, 15000), 2),
+            "seats": rnd.randint(0, 180),
+            "timestamp": (now + timedelta(microseconds=i)).isoformat(),
+        })
+    return out
+
+
+def bench(updates: list, encoding: str, repeat: int) -> dict:
+    frame = encode_updates(1, "bench", updates, encoding)
+    assert [u["flight_id"] for u in decode_updates(frame)] == [u["flight_id"] for u in updates]
+    start = time.perf_counter()
+    for seq in range(repeat):
+        encode_updates(seq, "bench", updates, encoding)
+    elapsed = time.perf_counter() - start
+    raw = frame if isinstance(frame, bytes) else frame.encode("utf-8")
+    return {
+        "encode_us": elapsed / repeat * 1e6,
+        "bytes": len(raw),
+        "deflated": len(zlib.compress(raw, 6)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    encodings = [e for e in ENCODINGS if e != "msgpack" or msgpack is not None]
+    if msgpack is None:
+        print("msgpack not installed: skipping it (pip install msgpack)")
+
+    rnd = random.Random(args.seed)
+    print(f"{'batch':>6} {'encoding':>9} {'encode us':>10} {'bytes':>9} {'deflated':>9} {'vs json':>8}")
+    for size in args.sizes:
+        updates = make_updates(size, rnd)
+        base = None
+        for encoding in encodings:
+            r = bench(updates, encoding, max(1, args.repeat // max(1, size // 10)))
+            base = base or r
+            ratio = r["bytes"] / base["bytes"]
+            print(f"{size:>6} {encoding:>9} {r['encode_us']:>10.1f} {r['bytes']:>9} {r['deflated']:>9} {ratio:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
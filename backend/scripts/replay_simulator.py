@@ -0,0 +1,155 @@
+"""
+Deterministic, accelerated simulator replay.
+
+Copies a database, pins the app to a virtual clock and a seeded RNG, and runs
+the simulator's ticks back to back over a simulated period (a week by default)
+as fast as the CPU allows. Writes the fare-history rows the run produced as a
+CSV trace and prints throughput figures.
+
+Same database + seed + start + interval => byte-identical trace, so two
+versions of the pricing/simulator code can be compared with a plain diff:
+
+    python scripts/replay_simulator.py --db flights_new.db --seed 7 --out before.csv
+    (check out the other version)
+    python scripts/replay_simulator.py --db flights_new.db --seed 7 --out after.csv
+    diff before.csv after.csv
+
+The source database is never modified. Price cooldown state in the copy is
+cleared so the replay depends only on the catalog and the seed.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BACKEND_DIR)
+
+
+def parse_start(value):
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def git_describe():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default=os.path.join(BACKEND_DIR, "flights_new.db"), help="source SQLite database")
+    parser.add_argument("--days", type=float, default=7.0, help="simulated period")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--start", type=parse_start, default=None,
+                        help="virtual start (ISO, UTC if naive); default: midnight UTC of the earliest departure")
+    parser.add_argument("--interval", type=int, default=None,
+                        help="simulated seconds between ticks; default: the simulator's IST schedule")
+    parser.add_argument("--out", default="fare_trace.csv", help="fare-history trace (CSV)")
+    parser.add_argument("--report", default=None, help="also write the throughput figures as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="skyfly-replay-")
+    db_path = os.path.join(workdir, "replay.db")
+    shutil.copyfile(args.db, db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    # app imports read DATABASE_URL, so they come after the copy
+    from sqlalchemy import func, select, update
+
+    from app.db import models
+    from app.db.base import SessionLocal, engine
+    from app.db.migrations import upgrade_to_head
+    from app.services import simulator
+    from app.utils import clock
+
+    models.Base.metadata.create_all(bind=engine)
+    upgrade_to_head(engine)
+
+    db = SessionLocal()
+    try:
+        db.execute(update(models.Flight).values(last_price_updated=None, last_price_updated_ts=None))
+        db.commit()
+        first_departure = db.execute(select(func.min(models.Flight.departure_ts))).scalar()
+        history_mark = db.execute(select(func.max(models.FareHistory.id))).scalar() or 0
+    finally:
+        db.close()
+    if args.start is None:
+        if first_departure is None:
+            sys.exit("No flights in the database; pass --start")
+        day = 86400
+        args.start = datetime.fromtimestamp(first_departure // day * day, tz=timezone.utc)
+
+    vc = clock.VirtualClock(args.start)
+    end = args.start.timestamp() + args.days * 86400
+    simulator.seed(args.seed)
+    simulator.tick_cadence.enabled = False   # adaptive batches follow wall-clock timings: not reproducible
+
+    ticks = repriced = 0
+    started = time.perf_counter()
+    with clock.use_clock(vc):
+        while vc.now().timestamp() < end:
+            repriced += simulator.tick_once()
+            ticks += 1
+            vc.advance(args.interval or simulator.current_interval_preview())
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(models.FareHistory.changed_ts, models.FareHistory.flight_id, models.Flight.flight_number,
+                   models.FareHistory.old_price, models.FareHistory.new_price)
+            .join(models.Flight, models.Flight.id == models.FareHistory.flight_id, isouter=True)
+            .where(models.FareHistory.id > history_mark)
+            .order_by(models.FareHistory.id)
+        ).all()
+    finally:
+        db.close()
+    engine.dispose()
+
+    digest = hashlib.sha256()
+    with open(args.out, "w", newline="") as fh:
+        writer = csv.writer(fh, lineterminator="\n")
+        writer.writerow(["changed_at", "flight_id", "flight_number", "old_price", "new_price"])
+        for changed_ts, flight_id, number, old_price, new_price in rows:
+            row = [datetime.fromtimestamp(changed_ts, tz=timezone.utc).isoformat(), flight_id, number,
+                   f"{old_price:.2f}", f"{new_price:.2f}"]
+            writer.writerow(row)
+            digest.update(",".join(map(str, row)).encode())
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "version": git_describe(),
+        "seed": args.seed,
+        "start": args.start.isoformat(),
+        "simulated_days": args.days,
+        "interval": args.interval or "schedule",
+        "ticks": ticks,
+        "flights_repriced": repriced,
+        "fare_history_rows": len(rows),
+        "trace_sha256": digest.hexdigest(),
+        "wall_seconds": round(elapsed, 3),
+        "ticks_per_second": round(ticks / elapsed, 1) if elapsed else None,
+        "repriced_per_second": round(repriced / elapsed, 1) if elapsed else None,
+        "speedup": round(args.days * 86400 / elapsed) if elapsed else None,
+    }
+    print(json.dumps(report, indent=2))
+    print(f"trace: {args.out} ({len(rows)} rows)")
+    if args.report:
+        with open(args.report, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
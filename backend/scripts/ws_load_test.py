@@ -0,0 +1,379 @@
+"""
+Load test for /ws/feeds.
+
+Opens N WebSocket connections to a local server, subscribes them to a mix of
+topics, drives the simulator through its API (tick_once via
+POST /simulator/tick, trigger_surge via POST /simulator/event) and writes a
+JSON report: delivery latency percentiles, server memory per connection,
+and dropped/missing messages (client- and server-side). Compare reports
+across versions to catch regressions.
+
+    # against a running server (pass its pid to get memory figures)
+    python scripts/ws_load_test.py --connections 2000 --ticks 20 --server-pid 1234 --out report.json
+
+    # or let the tool start uvicorn itself (uses DATABASE_URL from the environment)
+    python scripts/ws_load_test.py --spawn --connections 2000 --surges 2 --out report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def percentiles(values, points=(50, 90, 99)):
+    if not values:
+        return {f"p{p}": None for p in points} | {"max": None, "count": 0}
+    ordered = sorted(values)
+    out = {f"p{p}": round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 2) for p in points}
+    out["max"] = round(ordered[-1], 2)
+    out["count"] = len(ordered)
+    return out
+
+
+def rss_kb(pid):
+    """Resident memory of `pid` in KB (Linux /proc), None if unavailable."""
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def git_version():
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def parse_mix(value):
+    """'all=0.2,route=0.6,flight=0.2' -> [("all", 0.2), ...]"""
+    mix = []
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in ("all", "route", "flight"):
+            raise argparse.ArgumentTypeError(f"unknown topic kind {kind!r}")
+        mix.append((kind.strip(), float(weight or 1)))
+    return mix
+
+
+def parse_ts(value):
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except Exception:
+        return None
+
+
+# ----------------------------
+# Client
+# ----------------------------
+class Subscriber:
+    def __init__(self, index, topics, slow_delay=0.0):
+        self.index = index
+        self.topics = topics
+        self.slow_delay = slow_delay
+        self.connected = False
+        self.closed_early = False
+        self.error = None
+        self.frames = 0
+        self.updates = 0
+        self.seqs = []
+        self.latencies_ms = []        # receive time - update timestamp
+        self.request_latencies_ms = []  # receive time - time the driving request was sent
+
+    async def run(self, url, ready, stop, driver):
+        try:
+            async with websockets.connect(url, max_queue=None, open_timeout=30) as ws:
+                await ws.recv()  # connection_established
+                if self.topics != ["all"]:
+                    await ws.send(json.dumps({"action": "subscribe", "topics": self.topics}))
+                    while json.loads(await ws.recv()).get("type") != "subscribed":
+                        pass
+                self.connected = True
+                ready()
+                while not stop.is_set():
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), 0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    now = time.time()
+                    self._record(raw, now, driver.last_request_at)
+                    if self.slow_delay:
+                        await asyncio.sleep(self.slow_delay)
+        except websockets.ConnectionClosed as e:
+            self.closed_early = not stop.is_set()
+            self.error = f"closed {e.code}"
+        except Exception as e:
+            self.error = repr(e)
+        finally:
+            if not self.connected:
+                ready()
+
+    def _record(self, raw, now, request_at):
+        if isinstance(raw, bytes):
+            return  # msgpack frames are not decoded here; use json/packed for latency
+        msg = json.loads(raw)
+        if msg.get("type") != "flight_updates":
+            return
+        self.frames += 1
+        self.seqs.append(msg.get("seq"))
+        updates = msg.get("updates") or [None] * len(msg.get("flight_id") or [])
+        self.updates += len(updates)
+        if request_at:
+            self.request_latencies_ms.append((now - request_at) * 1000.0)
+        for update in updates:
+            ts = parse_ts(update.get("timestamp")) if update else None
+            if ts is not None:
+                self.latencies_ms.append((now - ts) * 1000.0)
+
+
+class Driver:
+    """Drives the simulator over HTTP and remembers when the last request went out."""
+
+    def __init__(self, base):
+        self.base = base
+        self.last_request_at = None
+        self.requests = []
+
+    async def call(self, http, path, body=None):
+        self.last_request_at = time.time()
+        start = time.perf_counter()
+        r = await http.post(self.base + path, json=body)
+        self.requests.append({"path": path, "status": r.status_code, "ms": round((time.perf_counter() - start) * 1000, 1)})
+        return r
+
+
+# ----------------------------
+# Scenario
+# ----------------------------
+async def pick_topics(http, base, count, mix, rnd):
+    r = await http.get(base + "/api/v1/flights", params={"limit": 1000})
+    flights = r.json() if r.status_code == 200 else []
+    if not flights:
+        mix = [("all", 1.0)]
+    kinds, weights = zip(*mix)
+    out = []
+    for _ in range(count):
+        kind = rnd.choices(kinds, weights)[0]
+        if kind == "all":
+            out.append(["all"])
+            continue
+        f = rnd.choice(flights)
+        if kind == "flight":
+            out.append([f"flight:{f['id']}"])
+        else:
+            out.append([f"route:{f['origin']}:{f['destination']}"])
+    return out
+
+
+async def run(args):
+    base = args.url.rstrip("/")
+    ws_url = base.replace("http", "ws", 1) + "/ws/feeds" + (f"?encoding={args.encoding}" if args.encoding != "json" else "")
+    rnd = random.Random(args.seed)
+    report = {
+        "version": git_version(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out",)},
+    }
+
+    async with httpx.AsyncClient(timeout=60) as http:
+        stats_before = (await http.get(base + "/ws/stats")).json()
+        rss_before = rss_kb(args.server_pid)
+
+        topics = await pick_topics(http, base, args.connections, args.mix, rnd)
+        driver = Driver(base + "/api/v1/simulator")
+        stop = asyncio.Event()
+        subs = [
+            Subscriber(i, t, args.slow_delay if rnd.random() < args.slow_fraction else 0.0)
+            for i, t in enumerate(topics)
+        ]
+
+        # Connect (bounded concurrency so the accept queue isn't flooded)
+        pending = len(subs)
+        all_ready = asyncio.Event()
+
+        def ready():
+            nonlocal pending
+            pending -= 1
+            if pending <= 0:
+                all_ready.set()
+
+        gate = asyncio.Semaphore(args.connect_concurrency)
+        connect_start = time.perf_counter()
+
+        async def start(sub):
+            async with gate:
+                task = asyncio.create_task(sub.run(ws_url, ready, stop, driver))
+                while not sub.connected and not task.done():
+                    await asyncio.sleep(0.01)
+                return task
+
+        tasks = await asyncio.gather(*(start(s) for s in subs))
+        await asyncio.wait_for(all_ready.wait(), 120)
+        connect_seconds = time.perf_counter() - connect_start
+        await asyncio.sleep(1.0)
+        rss_connected = rss_kb(args.server_pid)
+        seq_before = (await http.get(base + "/ws/stats")).json().get("seq", 0)
+
+        # Drive the simulator
+        for i in range(args.ticks):
+            await driver.call(http, "/tick")
+            await asyncio.sleep(args.interval)
+        for i in range(args.surges):
+            city = args.surge_city or rnd.choice(["Delhi", "Mumbai", "Bengaluru", "Hyderabad", "Chennai"])
+            await driver.call(http, "/event", {"city": city, "factor": 0.5})
+            await asyncio.sleep(args.interval)
+            await driver.call(http, "/event/reset", {"city": city, "factor": 0.5})
+            await asyncio.sleep(args.interval)
+
+        await asyncio.sleep(args.drain)
+        stats_after = (await http.get(base + "/ws/stats")).json()
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ----------------------------
+    # Report
+    # ----------------------------
+    connected = [s for s in subs if s.connected]
+    batches = stats_after.get("seq", 0) - seq_before
+    all_subs = [s for s in connected if s.topics == ["all"]]
+    missing_all = sum(max(0, batches - s.frames) for s in all_subs)
+    latencies = [v for s in connected for v in s.latencies_ms]
+    request_latencies = [v for s in connected for v in s.request_latencies_ms]
+
+    def delta(key):
+        return (stats_after.get(key) or 0) - (stats_before.get(key) or 0)
+
+    report.update({
+        "connections": {
+            "requested": len(subs),
+            "connected": len(connected),
+            "failed": len(subs) - len(connected),
+            "closed_early": sum(1 for s in subs if s.closed_early),
+            "connect_seconds": round(connect_seconds, 2),
+            "errors": sorted({s.error for s in subs if s.error})[:10],
+        },
+        "memory": {
+            "server_rss_before_kb": rss_before,
+            "server_rss_connected_kb": rss_connected,
+            "kb_per_connection": round((rss_connected - rss_before) / max(1, len(connected)), 2)
+            if rss_before and rss_connected else None,
+        },
+        "traffic": {
+            "batches_broadcast": batches,
+            "frames_received": sum(s.frames for s in connected),
+            "updates_received": sum(s.updates for s in connected),
+            "requests": driver.requests,
+        },
+        "latency_ms": percentiles(latencies),
+        "latency_from_request_ms": percentiles(request_latencies),
+        "drops": {
+            "all_subscribers": len(all_subs),
+            "missing_frames_all_subscribers": missing_all,
+            "server_dropped": delta("dropped"),
+            "server_coalesced": delta("coalesced"),
+            "server_overflow_disconnects": delta("overflow_disconnects"),
+        },
+    })
+    return report
+
+
+def spawn_server(port, log_path=None):
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=dict(os.environ), stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    proc.kill()
+    raise SystemExit("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for /ws/feeds (JSON report)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="server base URL")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn from this checkout (port from --url)")
+    parser.add_argument("--server-pid", type=int, help="server pid for memory figures (implied by --spawn)")
+    parser.add_argument("--server-log", help="with --spawn: write the server's output here (default: discard)")
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("all=0.2,route=0.6,flight=0.2"),
+                        help="topic mix, e.g. all=0.2,route=0.6,flight=0.2")
+    parser.add_argument("--encoding", choices=["json", "packed", "msgpack"], default="json",
+                        help="frame encoding (latency from update timestamps needs json)")
+    parser.add_argument("--ticks", type=int, default=10, help="simulator ticks to drive")
+    parser.add_argument("--surges", type=int, default=1, help="trigger_surge/reset_surge pairs to drive")
+    parser.add_argument("--surge-city", help="city for surges (default: random)")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between simulator calls")
+    parser.add_argument("--drain", type=float, default=3.0, help="seconds to wait for frames after the last call")
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="fraction of clients that read slowly")
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="read delay of slow clients (seconds)")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    fd_limit = raise_fd_limit()
+    if args.connections + 50 > fd_limit:
+        print(f"warning: open-file limit is {fd_limit}; raise it (ulimit -n) for {args.connections} connections",
+              file=sys.stderr)
+
+    server = None
+    if args.spawn:
+        port = httpx.URL(args.url).port or 8000
+        server = spawn_server(port, args.server_log)
+        args.server_pid = server.pid
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+        print(f"Report written to {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
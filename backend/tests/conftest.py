@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# app.db.base builds its engine from DATABASE_URL at import time; keep tests off ./flights_new.db
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='skyfly-tests-'), 'app.db')}")
@@ -0,0 +1,154 @@
+import json
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from app.utils.broadcast_bus import RedisBus, UnixSocketBus, _chunks
+
+
+# ----------------------------
+# Local stand-in for a Redis client (publish() + pubsub())
+# ----------------------------
+class FakeRedis:
+    """Pub/sub broker shared by every bus built on it, as one Redis server would be."""
+
+    def __init__(self):
+        self._subscribers = {}   # channel -> [FakePubSub]
+        self._lock = threading.Lock()
+        self.published = []
+
+    def publish(self, channel, data):
+        self.published.append((channel, data))
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        for sub in subs:
+            sub.messages.put({"type": "message", "channel": channel, "data": data})
+        return len(subs)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        with self.broker._lock:
+            self.broker._subscribers.setdefault(channel, []).append(self)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self.broker._lock:
+            for subs in self.broker._subscribers.values():
+                if self in subs:
+                    subs.remove(self)
+
+
+class Inbox:
+    def __init__(self):
+        self.events = []
+        self._cond = threading.Condition()
+
+    def __call__(self, event):
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def wait_for(self, count, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self.events) < count and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+        return self.events
+
+
+def _start_pair(make):
+    a, b = make(), make()
+    inbox_a, inbox_b = Inbox(), Inbox()
+    a.start(inbox_a)
+    b.start(inbox_b)
+    return (a, inbox_a), (b, inbox_b)
+
+
+# ----------------------------
+# Redis backend
+# ----------------------------
+def test_redis_bus_delivers_to_other_instance():
+    broker = FakeRedis()
+    (a, inbox_a), (b, inbox_b) = _start_pair(lambda: RedisBus(client=broker, channel="test"))
+    try:
+        a.publish({"kind": "updates", "updates": [{"flight_id": 1, "price": 4999.0}]})
+        received = inbox_b.wait_for(1)
+        assert len(received) == 1
+        assert received[0]["updates"] == [{"flight_id": 1, "price": 4999.0}]
+        assert received[0]["origin"] == a.id
+        assert b.received == 1
+        assert len(broker.published) == 1
+    finally:
+        a.stop()
+        b.stop()
+
+
+def test_redis_bus_suppresses_own_events():
+    broker = FakeRedis()
+    (a, inbox_a), (b, inbox_b) = _start_pair(lambda: RedisBus(client=broker, channel="test"))
+    try:
+        a.publish({"kind": "message", "message": {"type": "ping"}, "topics": None})
+        inbox_b.wait_for(1)
+        time.sleep(0.2)   # let a's listener read its own copy back from the channel
+        assert len(inbox_a.events) == 1     # delivered locally once, echo ignored
+        assert a.received == 0
+        assert len(inbox_b.events) == 1
+    finally:
+        a.stop()
+        b.stop()
+
+
+# ----------------------------
+# Unix datagram backend
+# ----------------------------
+def test_unix_bus_delivers_across_instances():
+    directory = tempfile.mkdtemp(prefix="skyfly-bus-")   # short path: AF_UNIX names are limited
+    (a, inbox_a), (b, inbox_b) = _start_pair(lambda: UnixSocketBus(directory))
+    try:
+        a.publish({"kind": "updates", "updates": [{"flight_id": 7}]})
+        assert [e["updates"] for e in inbox_b.wait_for(1)] == [[{"flight_id": 7}]]
+        time.sleep(0.1)
+        assert len(inbox_a.events) == 1
+    finally:
+        a.stop()
+        b.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_chunks_split_large_batches_under_limit():
+    updates = [{"flight_id": i, "price": 1000.0 + i, "note": "x" * 50} for i in range(200)]
+    event = {"kind": "updates", "origin": "abc", "updates": updates}
+    limit = 2000
+    chunks = _chunks(event, limit)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= limit for c in chunks)
+    decoded = [json.loads(c) for c in chunks]
+    assert all(d["kind"] == "updates" and d["origin"] == "abc" for d in decoded)
+    assert [u for d in decoded for u in d["updates"]] == updates
+
+
+def test_chunks_keep_small_or_unsplittable_events_whole():
+    small = {"kind": "updates", "updates": [{"flight_id": 1}]}
+    assert [json.loads(c) for c in _chunks(small, 60000)] == [small]
+
+    single = {"kind": "updates", "updates": [{"flight_id": 1, "note": "x" * 500}]}
+    assert len(_chunks(single, 100)) == 1
+
+    message = {"kind": "message", "message": {"text": "y" * 500}}
+    assert len(_chunks(message, 100)) == 1
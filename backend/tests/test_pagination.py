@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_db
+from app.api.v1.flights import router
+from app.db.models import Base, Flight
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+FLIGHTS = 23
+PAGE = 4
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pagination") / "flights.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    departure = datetime.now() + timedelta(days=5)
+    with Session() as db:
+        for i in range(FLIGHTS):
+            db.add(Flight(
+                flight_number=f"SF{i:03d}", airline="SkyFly", origin="Bengaluru", destination="Delhi",
+                departure_iso=(departure + timedelta(minutes=i)).isoformat(timespec="seconds"),
+                arrival_iso=(departure + timedelta(hours=3)).isoformat(timespec="seconds"),
+                duration_min=(90, 120, 150)[i % 3],                # heavy ties on both sort keys
+                price_real=(4000.0, 5500.0, 4000.0, 7000.0)[i % 4],
+                base_price=4000.0, seats_total=180, seats_available=180,
+                flight_date=departure.date().isoformat(),
+            ))
+        db.commit()
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    engine.dispose()
+
+
+def walk_cursor(client, path, params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, limit=PAGE, **({"cursor": cursor} if cursor else {}))
+        r = client.get(path, params=query)
+        assert r.status_code == 200, r.text
+        ids += [f["id"] for f in r.json()]
+        pages += 1
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids, pages
+
+
+def walk_offset(client, path, params):
+    ids, offset = [], 0
+    while True:
+        r = client.get(path, params=dict(params, limit=PAGE, offset=offset))
+        assert r.status_code == 200, r.text
+        page = [f["id"] for f in r.json()]
+        ids += page
+        if len(page) < PAGE:
+            return ids
+        offset += PAGE
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/v1/flights", {}),
+    ("/api/v1/flights/search", {}),
+    ("/api/v1/flights/search", {"sort_by": "price", "order": "asc"}),
+    ("/api/v1/flights/search", {"sort_by": "price", "order": "desc"}),
+    ("/api/v1/flights/search", {"sort_by": "duration", "order": "asc"}),
+    ("/api/v1/flights/search", {"sort_by": "duration", "order": "desc"}),
+])
+def test_cursor_pages_match_offset_pages(client, path, params):
+    by_cursor, pages = walk_cursor(client, path, params)
+    by_offset = walk_offset(client, path, params)
+
+    assert pages == -(-FLIGHTS // PAGE)
+    assert len(by_cursor) == len(set(by_cursor)) == FLIGHTS   # no duplicates, no gaps
+    assert by_cursor == by_offset
+
+
+def test_sort_order_breaks_ties_by_id(client):
+    rows = client.get("/api/v1/flights/search", params={"sort_by": "price", "order": "desc", "limit": 100}).json()
+    keys = [(f["price_real"], f["id"]) for f in rows]
+    assert keys == sorted(keys, key=lambda k: (-k[0], -k[1]))
+
+
+def test_cursor_for_another_sort_is_rejected(client):
+    r = client.get("/api/v1/flights/search", params={"sort_by": "price", "limit": PAGE})
+    cursor = r.headers[NEXT_CURSOR_HEADER]
+
+    r = client.get("/api/v1/flights/search", params={"sort_by": "duration", "limit": PAGE, "cursor": cursor})
+    assert r.status_code == 422
+    assert "price" in r.json()["detail"]
+    assert client.get("/api/v1/flights", params={"cursor": cursor}).status_code == 422
+
+
+@pytest.mark.parametrize("token", ["not-a-cursor", "e30", "!!!"])
+def test_malformed_cursor_is_rejected(client, token):
+    assert client.get("/api/v1/flights", params={"cursor": token}).status_code == 422
+    assert client.get("/api/v1/flights/search", params={"sort_by": "price", "cursor": token}).status_code == 422
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("price", 4999.5, 42)
+    assert "=" not in token
+    assert decode_cursor(token, "price") == (4999.5, 42)
+    with pytest.raises(ValueError):
+        decode_cursor(token, "duration")
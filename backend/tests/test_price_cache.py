@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import pricing as pricing_api
+from app.db.models import Base, Flight
+from app.services import booking_service, demand_events as events_module, pricing
+from app.services.booking_service import cancel_booking, confirm_reservation, reserve_seats
+from app.services.demand_events import DemandEventIndex
+from app.services.pricing import PriceCache, cached_prices_for_flights
+
+# middle of a cache bucket, so every lookup in a test lands in the same one
+NOW = datetime.fromtimestamp(
+    (int(datetime.now(timezone.utc).timestamp()) // 300) * 300 + 150, tz=timezone.utc
+)
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}", connect_args={"check_same_thread": False}, future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    monkeypatch.setattr(events_module, "SessionLocal", Session)
+    monkeypatch.setattr(pricing, "demand_events", DemandEventIndex())
+    yield Session
+    engine.dispose()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PriceCache()
+    for module in (pricing, booking_service, pricing_api):
+        monkeypatch.setattr(module, "price_cache", cache)
+    return cache
+
+
+def add_flight(Session, seats: int = 10) -> Flight:
+    departure = datetime.now() + timedelta(days=3)
+    with Session() as db:
+        flight = Flight(
+            flight_number="SF101", airline="SkyFly", origin="Bengaluru", destination="Delhi",
+            departure_iso=departure.isoformat(timespec="seconds"),
+            arrival_iso=(departure + timedelta(hours=3)).isoformat(timespec="seconds"),
+            duration_min=180, price_real=5000.0, base_price=5000.0,
+            seats_total=seats, seats_available=seats, flight_date=departure.date().isoformat(),
+        )
+        db.add(flight)
+        db.commit()
+        db.refresh(flight)
+        db.expunge(flight)
+        return flight
+
+
+def snapshot(flight: Flight) -> SimpleNamespace:
+    """The pricing inputs of a flight as they were before a write."""
+    return SimpleNamespace(**{name: getattr(flight, name) for name in (
+        "id", "base_price", "price_real", "seats_available", "seats_total",
+        "departure_ts", "departure_iso", "origin_code", "destination_code",
+    )})
+
+
+def price(flight, demand: float = 0.2):
+    return cached_prices_for_flights([flight], [demand], now=NOW)[0][0]
+
+
+def counts(cache):
+    return cache.hits, cache.misses
+
+
+# ----------------------------
+# Hits and key changes
+# ----------------------------
+def test_repeat_lookup_is_a_hit(Session, cache):
+    flight = add_flight(Session)
+    first = price(flight)
+    assert counts(cache) == (0, 1)
+    assert price(flight) == first
+    assert counts(cache) == (1, 1)
+
+
+def test_changed_seat_count_misses(Session, cache):
+    flight = snapshot(add_flight(Session))
+    full = price(flight)
+    flight.seats_available -= 6
+    assert price(flight) > full
+    assert counts(cache) == (0, 2)
+
+
+def test_changed_demand_score_misses(Session, cache):
+    flight = add_flight(Session)
+    low = price(flight, demand=0.1)
+    assert price(flight, demand=0.9) > low
+    assert counts(cache) == (0, 2)
+    assert price(flight, demand=0.9) > low
+    assert counts(cache) == (1, 2)
+
+
+# ----------------------------
+# Invalidation hooks
+# ----------------------------
+def test_confirm_invalidates_flight(Session, cache):
+    flight = add_flight(Session)
+    before = snapshot(flight)
+    with Session() as db:
+        booking, _, _ = reserve_seats(db, flight.id, 2, "Asha", "asha@example.com")
+    price(before)
+    price(before)
+    assert counts(cache) == (1, 1)
+
+    with Session() as db:
+        _, status, _ = confirm_reservation(db, booking.id)
+    assert status == "confirmed"
+    price(before)                              # same inputs, new demand version
+    assert counts(cache) == (1, 2)
+    assert cache.invalidations == 1
+
+
+def test_cancel_invalidates_flight(Session, cache):
+    flight = add_flight(Session)
+    with Session() as db:
+        booking, _, _ = reserve_seats(db, flight.id, 2, "Asha", "asha@example.com")
+    with Session() as db:
+        confirm_reservation(db, booking.id)
+        sold = snapshot(db.get(Flight, flight.id))
+    price(sold)
+    price(sold)
+    assert counts(cache) == (1, 1)
+
+    with Session() as db:
+        _, result = cancel_booking(db, reservation_id=booking.id)
+    assert result["status"] == "cancelled"
+    price(sold)
+    assert counts(cache) == (1, 2)
+
+
+def test_surge_start_and_end_miss(Session, cache):
+    flight = add_flight(Session)
+    calm = price(flight)
+    assert price(flight) == calm
+    assert counts(cache) == (1, 1)
+
+    pricing.demand_events.create("Delhi", 0.5, starts_ts=int(NOW.timestamp()) - 60)
+    surged = price(flight)
+    assert surged > calm
+    assert counts(cache) == (1, 2)
+    assert price(flight) == surged
+    assert counts(cache) == (2, 2)
+
+    assert pricing.demand_events.end("Delhi") == 1
+    price(flight)
+    assert counts(cache) == (2, 3)
+
+
+# ----------------------------
+# /pricing/cache
+# ----------------------------
+def test_cache_endpoint_counters_move(Session, cache):
+    app = FastAPI()
+    app.include_router(pricing_api.router, prefix="/api/v1")
+    client = TestClient(app)
+    assert client.get("/api/v1/pricing/cache").json()["hits"] == 0
+
+    flight = add_flight(Session)
+    price(flight)
+    price(flight)
+    cache.invalidate_flight(flight.id)
+    price(flight)
+
+    stats = client.get("/api/v1/pricing/cache").json()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+    assert stats["size"] == 2
+    assert stats["hit_rate"] == round(1 / 3, 4)
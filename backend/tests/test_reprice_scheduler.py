@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Flight
+from app.services import reprice_scheduler as module
+from app.services.reprice_scheduler import RETRY_SECONDS, RepriceScheduler, cadence_for
+
+NOW = 1_800_000_000
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+@pytest.fixture
+def scheduler():
+    return RepriceScheduler()
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reprice.db'}", connect_args={"check_same_thread": False}, future=True)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    engine.dispose()
+
+
+def make_flight(days_out: float, number: str = "SF101") -> Flight:
+    departure = datetime.now() + timedelta(days=days_out)
+    return Flight(
+        flight_number=number, airline="SkyFly", origin="Bengaluru", destination="Delhi",
+        departure_iso=departure.isoformat(timespec="seconds"),
+        arrival_iso=(departure + timedelta(hours=3)).isoformat(timespec="seconds"),
+        duration_min=180, price_real=5000.0, base_price=5000.0,
+        seats_total=180, seats_available=180, flight_date=departure.date().isoformat(),
+    )
+
+
+# ----------------------------
+# Cadence tiers
+# ----------------------------
+@pytest.mark.parametrize("to_departure, cadence", [
+    (HOUR, 5 * 60),
+    (2 * DAY, 15 * 60),
+    (5 * DAY, HOUR),
+    (10 * DAY, 3 * HOUR),
+    (60 * DAY, 6 * HOUR),
+])
+def test_cadence_tiers(to_departure, cadence):
+    assert cadence_for(to_departure) == cadence
+
+
+def test_departed_flights_have_no_cadence():
+    assert cadence_for(0) is None
+    assert cadence_for(-60) is None
+
+
+# ----------------------------
+# Due order, reschedule, retry
+# ----------------------------
+def test_pop_due_returns_most_overdue_first(scheduler):
+    scheduler.schedule(1, NOW + DAY, NOW - 300, delay=0)
+    scheduler.schedule(2, NOW + DAY, NOW - 900, delay=0)
+    scheduler.schedule(3, NOW + DAY, NOW - 600, delay=0)
+    scheduler.schedule(4, NOW + DAY, NOW + 60, delay=0)   # not due yet
+
+    assert scheduler.pop_due(NOW, limit=2) == [2, 3]
+    assert scheduler.pop_due(NOW) == [1]
+    assert scheduler.pop_due(NOW) == []
+    assert scheduler.pop_due(NOW + 60) == [4]
+
+
+def test_reschedule_uses_cadence_from_time_to_departure(scheduler):
+    scheduler.schedule(1, NOW + HOUR, NOW, delay=0)
+    scheduler.schedule(2, NOW + 10 * DAY, NOW, delay=0)
+    assert sorted(scheduler.pop_due(NOW)) == [1, 2]
+
+    scheduler.reschedule([(1, NOW + HOUR), (2, NOW + 10 * DAY)], NOW)
+    assert scheduler.pop_due(NOW + 5 * 60 - 1) == []
+    assert scheduler.pop_due(NOW + 5 * 60) == [1]
+    assert scheduler.pop_due(NOW + 3 * HOUR) == [2]
+
+
+def test_retry_puts_failed_flights_back_after_retry_delay(scheduler):
+    scheduler.schedule(1, NOW + 2 * DAY, NOW, delay=0)
+    assert scheduler.pop_due(NOW) == [1]
+
+    scheduler.retry([1], NOW)
+    assert scheduler.stats(NOW)["scheduled"] == 1
+    assert scheduler.pop_due(NOW + RETRY_SECONDS - 1) == []
+    assert scheduler.pop_due(NOW + RETRY_SECONDS) == [1]
+
+
+def test_departed_flights_are_dropped(scheduler):
+    scheduler.schedule(1, NOW + 60, NOW, delay=0)
+    assert scheduler.pop_due(NOW) == [1]
+
+    scheduler.reschedule([(1, NOW + 60)], NOW + 120)   # departed while being repriced
+    scheduler.schedule(2, NOW - 1, NOW)
+    assert scheduler.stats(NOW)["scheduled"] == 0
+    assert scheduler.pop_due(NOW + 7 * DAY) == []
+
+
+# ----------------------------
+# Stale entries and compaction
+# ----------------------------
+def test_rescheduled_flight_is_popped_once_at_its_new_time(scheduler):
+    scheduler.schedule(1, NOW + DAY, NOW, delay=100)
+    scheduler.schedule(1, NOW + DAY, NOW, delay=500)   # leaves a stale entry at NOW + 100
+
+    assert scheduler.pop_due(NOW + 200) == []
+    assert scheduler.pop_due(NOW + 500) == [1]
+    assert scheduler.pop_due(NOW + DAY) == []
+
+
+def test_removed_flight_is_never_popped(scheduler):
+    scheduler.schedule(1, NOW + DAY, NOW, delay=0)
+    scheduler.remove(1)
+    assert scheduler.pop_due(NOW) == []
+
+
+def test_stale_entries_are_compacted(scheduler):
+    for i in range(3000):
+        scheduler.schedule(1, NOW + 60 * DAY, NOW, delay=1000 + i)
+    assert scheduler.stats(NOW)["heap_entries"] == 3000
+
+    scheduler.pop_due(NOW)
+    stats = scheduler.stats(NOW)
+    assert stats["heap_entries"] == stats["scheduled"] == 1
+    assert scheduler.pop_due(NOW + 1000 + 2999) == [1]
+
+
+# ----------------------------
+# Catalog load and ORM listeners
+# ----------------------------
+def test_load_schedules_upcoming_flights_within_their_cadence(Session, scheduler):
+    with Session() as db:
+        db.add_all([make_flight(0.5, "SF1"), make_flight(20, "SF2"), make_flight(-1, "SF3")])
+        db.commit()
+        upcoming = {f.id: f.departure_ts for f in db.query(Flight) if f.flight_number != "SF3"}
+        now = min(upcoming.values()) - 12 * HOUR
+        assert scheduler.load(db, now) == 2
+
+    for flight_id, departure_ts in upcoming.items():
+        due = scheduler._due[flight_id]
+        assert now <= due <= now + cadence_for(departure_ts - now)
+
+
+def test_orm_writes_keep_the_heap_in_step(Session, monkeypatch):
+    scheduler = RepriceScheduler()
+    monkeypatch.setattr(module, "reprice_scheduler", scheduler)
+    with Session() as db:
+        scheduler.load(db)
+
+        flight = make_flight(2)
+        db.add(flight)
+        db.commit()
+        assert flight.id in scheduler.pop_due()              # inserted: due straight away
+
+        flight.departure_iso = (datetime.now() + timedelta(days=40)).isoformat(timespec="seconds")
+        db.commit()
+        assert scheduler.pop_due() == [flight.id]             # moved: rescheduled straight away
+        assert scheduler._departures[flight.id] == flight.departure_ts
+
+        scheduler.schedule(flight.id, flight.departure_ts, delay=0)
+        db.delete(flight)
+        db.commit()
+        assert scheduler.pop_due() == []                      # deleted: unscheduled
+        assert scheduler.stats()["scheduled"] == 0
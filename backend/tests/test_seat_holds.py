@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Booking, Flight
+from app.services import booking_service
+from app.services.booking_service import (
+    _take_seats,
+    cancel_booking,
+    confirm_reservation,
+    expire_holds,
+    reserve_seats,
+)
+from app.utils.epoch_utils import now_ts
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seats.db'}",
+                           connect_args={"check_same_thread": False, "timeout": 30}, future=True)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    engine.dispose()
+
+
+def add_flight(Session, seats: int) -> int:
+    departure = datetime.now() + timedelta(days=3)
+    with Session() as db:
+        flight = Flight(
+            flight_number="SF101", airline="SkyFly", origin="Bengaluru", destination="Delhi",
+            departure_iso=departure.isoformat(timespec="seconds"),
+            arrival_iso=(departure + timedelta(hours=3)).isoformat(timespec="seconds"),
+            duration_min=180, price_real=5000.0, base_price=5000.0,
+            seats_total=seats, seats_available=seats, flight_date=departure.date().isoformat(),
+        )
+        db.add(flight)
+        db.commit()
+        return flight.id
+
+
+def seats(Session, flight_id: int):
+    """(seats_available, seats_held, seats in 'reserved' bookings), checking the invariants."""
+    with Session() as db:
+        flight = db.get(Flight, flight_id)
+        reserved = sum(b.seats_booked for b in db.query(Booking).filter(
+            Booking.flight_id == flight_id, Booking.status == "reserved"))
+        assert 0 <= flight.seats_held <= flight.seats_available
+        assert flight.seats_held == reserved
+        return flight.seats_available, flight.seats_held
+
+
+def reserve(Session, flight_id: int, n: int) -> int:
+    with Session() as db:
+        booking, _, _ = reserve_seats(db, flight_id, n, "Asha", "asha@example.com")
+        return booking.id
+
+
+def test_take_seats_refuses_hold_past_capacity(Session):
+    fid = add_flight(Session, 3)
+    with Session() as db:
+        assert _take_seats(db, fid, 2)
+        assert not _take_seats(db, fid, 2)
+        assert _take_seats(db, fid, 1)
+        assert not _take_seats(db, fid, 1)
+        db.commit()
+        assert db.get(Flight, fid).seats_held == 3
+
+
+def test_second_reservation_past_capacity_is_refused(Session):
+    fid = add_flight(Session, 3)
+    reserve(Session, fid, 2)
+    with pytest.raises(ValueError):
+        reserve(Session, fid, 2)
+    assert seats(Session, fid) == (3, 2)
+
+
+def test_concurrent_reservations_never_overbook(Session):
+    fid = add_flight(Session, 4)
+
+    def attempt(_):
+        try:
+            return reserve(Session, fid, 1)
+        except ValueError:
+            return None
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(attempt, range(12)))
+    assert sum(r is not None for r in results) == 4
+    assert seats(Session, fid) == (4, 4)
+
+
+def test_confirm_turns_held_seats_into_sold_seats(Session):
+    fid = add_flight(Session, 5)
+    bid = reserve(Session, fid, 2)
+    with Session() as db:
+        _, status, _ = confirm_reservation(db, bid)
+    assert status == "confirmed"
+    assert seats(Session, fid) == (3, 0)
+    with Session() as db:
+        _, status, _ = confirm_reservation(db, bid)
+    assert status == "already_confirmed"
+    assert seats(Session, fid) == (3, 0)
+
+
+def test_failed_payment_releases_hold(Session):
+    fid = add_flight(Session, 5)
+    bid = reserve(Session, fid, 2)
+    with Session() as db:
+        _, status, _ = confirm_reservation(db, bid, payment_success=False)
+    assert status == "payment_failed"
+    assert seats(Session, fid) == (5, 0)
+
+
+def test_expired_holds_are_released(Session):
+    fid = add_flight(Session, 3)
+    bid = reserve(Session, fid, 3)
+    with Session() as db:
+        db.execute(update(Booking).where(Booking.id == bid).values(hold_expires_ts=now_ts() - 1))
+        db.commit()
+        assert expire_holds(db) == 1
+        db.commit()
+        assert db.get(Booking, bid).status == "expired"
+    assert seats(Session, fid) == (3, 0)
+
+    # a lapsed hold also gives way to the next reservation on its flight
+    bid = reserve(Session, fid, 3)
+    with Session() as db:
+        db.execute(update(Booking).where(Booking.id == bid).values(hold_expires_ts=now_ts() - 1))
+        db.commit()
+    reserve(Session, fid, 3)
+    assert seats(Session, fid) == (3, 3)
+
+
+def test_confirming_an_expired_hold_releases_it(Session):
+    fid = add_flight(Session, 3)
+    bid = reserve(Session, fid, 2)
+    with Session() as db:
+        db.execute(update(Booking).where(Booking.id == bid).values(hold_expires_ts=now_ts() - 1))
+        db.commit()
+        _, status, _ = confirm_reservation(db, bid)
+    assert status == "expired"
+    assert seats(Session, fid) == (3, 0)
+
+
+def test_cancel_releases_holds_and_restores_sold_seats(Session):
+    fid = add_flight(Session, 5)
+    held = reserve(Session, fid, 2)
+    sold = reserve(Session, fid, 1)
+    with Session() as db:
+        confirm_reservation(db, sold)
+    assert seats(Session, fid) == (4, 2)
+
+    with Session() as db:
+        _, result = cancel_booking(db, reservation_id=held)
+    assert result["status"] == "cancelled"
+    assert seats(Session, fid) == (4, 0)
+
+    with Session() as db:
+        _, result = cancel_booking(db, reservation_id=sold, refund=True)
+    assert result["refunded"]
+    assert seats(Session, fid) == (5, 0)
+
+    with Session() as db:
+        _, result = cancel_booking(db, reservation_id=sold)
+    assert result["status"] == "already_cancelled"
+    assert seats(Session, fid) == (5, 0)
+
+
+def test_release_never_drives_counter_negative(Session):
+    fid = add_flight(Session, 5)
+    bid = reserve(Session, fid, 2)
+    with Session() as db:
+        db.execute(update(Flight).where(Flight.id == fid).values(seats_held=1))   # drifted counter
+        db.commit()
+        booking = db.get(Booking, bid)
+        assert booking_service._release_hold(db, booking, "cancelled")
+        db.commit()
+        assert db.get(Flight, fid).seats_held == 0
@@ -42,10 +42,10 @@ function ResultsContent() {
   // Data Fetching
   // -------------------------
   // 1. Outbound
-  const { data: flightsOutbound, isLoading: isLoadingOut, error: errorOut } = useFlights({ origin, destination, date });
+  const { data: flightsOutbound, isLoading: isLoadingOut, error: errorOut, refetch: refetchOut } = useFlights({ origin, destination, date });
 
   // 2. Return (only if round trip)
-  const { data: flightsReturn, isLoading: isLoadingRet, error: errorRet } = useFlights(
+  const { data: flightsReturn, isLoading: isLoadingRet, error: errorRet, refetch: refetchRet } = useFlights(
     { origin: destination, destination: origin, date: returnDate },
     { enabled: isRoundTrip }
   );
@@ -55,7 +55,15 @@ function ResultsContent() {
   // -------------------------
   // Live Updates (WebSocket)
   // -------------------------
-  const { lastMessage } = useWebSocket();
+  // Only this search's routes (the server resolves city names to airport codes)
+  const liveTopics = useMemo(() => {
+    const route = (from: string, to: string, day: string) => `route:${from}:${to}${day ? `:${day}` : ''}`;
+    if (!origin || !destination) return [];
+    const topics = [route(origin, destination, date)];
+    if (isRoundTrip) topics.push(route(destination, origin, returnDate));
+    return topics;
+  }, [origin, destination, date, returnDate, isRoundTrip]);
+  const { lastMessage } = useWebSocket(liveTopics);
   const [liveOutbound, setLiveOutbound] = useState<FlightItem[]>([]);
   const [liveReturn, setLiveReturn] = useState<FlightItem[]>([]);
 
@@ -68,32 +76,45 @@ function ResultsContent() {
     if (flightsReturn) setLiveReturn(filterValidFlights(flightsReturn));
   }, [flightsReturn]);
 
-  // Handle Socket Updates
+  // Handle Socket Updates (single `flight_update`, a batched `flight_updates` frame,
+  // or the `resync` sent after a reconnect with whatever was missed)
   useEffect(() => {
-    if (lastMessage && lastMessage.type === 'flight_update' && lastMessage.flight_id) {
-      const updateFlightList = (list: FlightItem[]) =>
-        list.map(f => {
-          if (f.id === String(lastMessage.flight_id)) {
-            return {
-              ...f,
-              dynamic_price: lastMessage.price ?? f.dynamic_price,
-              seats_available: lastMessage.seats ?? f.seats_available,
-              _justUpdated: true,
-            };
-          }
-          return f;
-        });
-
-      setLiveOutbound(prev => updateFlightList(prev));
-      setLiveReturn(prev => updateFlightList(prev));
-
-      // Clear flag
-      setTimeout(() => {
-        const clearFlag = (list: FlightItem[]) => list.map(f => ({ ...f, _justUpdated: undefined }));
-        setLiveOutbound(prev => clearFlag(prev));
-        setLiveReturn(prev => clearFlag(prev));
-      }, 3500);
+    if (!lastMessage) return;
+    if (lastMessage.type === 'resync' && lastMessage.mode === 'full') {
+      // Server restarted: its sequence numbers are new, so reload the results instead
+      refetchOut();
+      if (isRoundTrip) refetchRet();
+      return;
     }
+    const updates =
+      lastMessage.type === 'flight_updates' || lastMessage.type === 'resync' ? (lastMessage.updates ?? []) :
+      lastMessage.type === 'flight_update' ? [lastMessage] : [];
+    const byId = new Map(updates.filter(u => u.flight_id).map(u => [String(u.flight_id), u]));
+    if (byId.size === 0) return;
+
+    const updateFlightList = (list: FlightItem[]) =>
+      list.map(f => {
+        const update = byId.get(f.id);
+        if (update) {
+          return {
+            ...f,
+            dynamic_price: update.price ?? f.dynamic_price,
+            seats_available: update.seats ?? f.seats_available,
+            _justUpdated: true,
+          };
+        }
+        return f;
+      });
+
+    setLiveOutbound(prev => updateFlightList(prev));
+    setLiveReturn(prev => updateFlightList(prev));
+
+    // Clear flag
+    setTimeout(() => {
+      const clearFlag = (list: FlightItem[]) => list.map(f => ({ ...f, _justUpdated: undefined }));
+      setLiveOutbound(prev => clearFlag(prev));
+      setLiveReturn(prev => clearFlag(prev));
+    }, 3500);
   }, [lastMessage]);
 
 
@@ -4,9 +4,18 @@
 import { useEffect, useRef, useState, useCallback } from 'react';
 
 export interface FlightUpdate {
-    type: 'flight_update' | 'connection_established';
+    type: 'flight_update' | 'flight_updates' | 'connection_established' | 'subscribed' | 'resync';
     flight_id?: number;
     flight_number?: string;
+    origin_code?: string;
+    destination_code?: string;
+    flight_date?: string;
+    topics?: string[];
+    seq?: number;
+    stream?: string;
+    encoding?: 'json' | 'packed' | 'msgpack';
+    mode?: 'replay' | 'snapshot' | 'full'; // resync: 'full' means refetch, the server restarted
+    updates?: FlightUpdate[]; // flight_updates: one simulator tick / surge, batched
     price?: number;
     seats?: number;
     timestamp?: string;
@@ -25,10 +34,41 @@ const WS_URL = process.env.NEXT_PUBLIC_WS_URL || 'wss://flysmart-backend-448p.on
 if (!WS_URL) {
     if (typeof window !== 'undefined') console.warn('WebSocket URL is not defined. Real-time updates will be disabled.');
 }
+// Column-oriented flight_updates frames (flight_id/price/seats arrays): ~10x smaller than JSON objects
+const FEED_URL = WS_URL ? `${WS_URL}${WS_URL.includes('?') ? '&' : '?'}encoding=packed` : WS_URL;
 const RECONNECT_DELAY = 3000; // 3 seconds
 const MAX_RECONNECT_DELAY = 30000; // 30 seconds
 
-export function useWebSocket(): UseWebSocketReturn {
+interface PackedFrame {
+    type: 'flight_updates';
+    encoding: 'packed';
+    seq: number;
+    stream: string;
+    flight_id: number[];
+    price: number[];
+    seats: number[];
+}
+
+// Expand a packed flight_updates frame back into `updates` objects
+function unpackFrame(data: FlightUpdate | PackedFrame): FlightUpdate {
+    if (data.type !== 'flight_updates' || data.encoding !== 'packed') return data as FlightUpdate;
+    const packed = data as PackedFrame;
+    const ids = packed.flight_id ?? [];
+    const updates: FlightUpdate[] = ids.map((id, i) => ({
+        type: 'flight_update',
+        flight_id: id,
+        price: packed.price[i],
+        seats: packed.seats[i],
+    }));
+    return { type: 'flight_updates', seq: packed.seq, stream: packed.stream, updates };
+}
+
+/**
+ * Live flight updates from /ws/feeds.
+ * `topics` limits what the server sends, e.g. ['route:HYD:BLR:2025-12-09', 'flight:123'];
+ * cities are accepted in route topics. Omit it to receive every update.
+ */
+export function useWebSocket(topics?: string[]): UseWebSocketReturn {
     const [isConnected, setIsConnected] = useState(false);
     const [lastMessage, setLastMessage] = useState<FlightUpdate | null>(null);
     const [error, setError] = useState<Error | null>(null);
@@ -37,6 +77,20 @@ export function useWebSocket(): UseWebSocketReturn {
     const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null);
     const reconnectDelayRef = useRef(RECONNECT_DELAY);
     const shouldConnectRef = useRef(true);
+    const topicsKey = topics && topics.length > 0 ? JSON.stringify(topics) : '';
+    const topicsRef = useRef(topicsKey);
+    topicsRef.current = topicsKey;
+    const subscribedKeyRef = useRef<string>('');
+    // Last seq/stream seen, so a reconnect can ask for just the updates it missed
+    const positionRef = useRef<{ seq: number; stream: string } | null>(null);
+
+    // Send the current topics (a fresh connection starts on "all", so nothing to send without topics)
+    const sendSubscription = useCallback((ws: WebSocket) => {
+        subscribedKeyRef.current = topicsRef.current;
+        if (topicsRef.current && ws.readyState === WebSocket.OPEN) {
+            ws.send(JSON.stringify({ action: 'subscribe', topics: JSON.parse(topicsRef.current) }));
+        }
+    }, []);
 
     const connect = useCallback(() => {
         if (!shouldConnectRef.current) return;
@@ -48,7 +102,7 @@ export function useWebSocket(): UseWebSocketReturn {
             }
 
             if (!WS_URL) return;
-            const ws = new WebSocket(WS_URL);
+            const ws = new WebSocket(FEED_URL);
             wsRef.current = ws;
 
             ws.onopen = () => {
@@ -56,17 +110,32 @@ export function useWebSocket(): UseWebSocketReturn {
                 setIsConnected(true);
                 setError(null);
                 reconnectDelayRef.current = RECONNECT_DELAY; // Reset delay on successful connection
+                sendSubscription(ws);
+                if (positionRef.current) {
+                    ws.send(JSON.stringify({ action: 'resume', last_seq: positionRef.current.seq, stream: positionRef.current.stream }));
+                }
             };
 
             ws.onmessage = (event) => {
                 try {
-                    const data: FlightUpdate = JSON.parse(event.data);
+                    const data = unpackFrame(JSON.parse(event.data));
+                    if (data.type === 'flight_updates' || data.type === 'resync') {
+                        if (data.seq !== undefined && data.stream) {
+                            positionRef.current = { seq: data.seq, stream: data.stream };
+                        }
+                    } else if (data.type === 'connection_established' && !positionRef.current && data.stream) {
+                        positionRef.current = { seq: data.seq ?? 0, stream: data.stream };
+                    }
                     setLastMessage(data);
 
-                    if (data.type === 'connection_established') {
+                    if (data.type === 'resync') {
+                        console.log(`[WebSocket] Resynced (${data.mode}): ${data.updates?.length ?? 0} missed updates`);
+                    } else if (data.type === 'connection_established') {
                         console.log('[WebSocket] Connection confirmed:', data.message);
                     } else if (data.type === 'flight_update') {
                         console.log('[WebSocket] Flight update received:', data);
+                    } else if (data.type === 'flight_updates') {
+                        console.log(`[WebSocket] ${data.updates?.length ?? 0} flight updates received (seq ${data.seq})`);
                     }
                 } catch (err) {
                     console.error('[WebSocket] Failed to parse message:', err);
@@ -108,7 +177,22 @@ export function useWebSocket(): UseWebSocketReturn {
             console.error('[WebSocket] Connection failed:', err);
             setError(err as Error);
         }
-    }, []);
+    }, [sendSubscription]);
+
+    // Topics changed on an open socket: swap the subscription without reconnecting
+    useEffect(() => {
+        const ws = wsRef.current;
+        if (!ws || ws.readyState !== WebSocket.OPEN || subscribedKeyRef.current === topicsKey) return;
+        if (subscribedKeyRef.current) {
+            ws.send(JSON.stringify({ action: 'unsubscribe', topics: JSON.parse(subscribedKeyRef.current) }));
+        }
+        if (!topicsKey) {
+            subscribedKeyRef.current = '';
+            ws.send(JSON.stringify({ action: 'subscribe', topics: ['all'] }));
+            return;
+        }
+        sendSubscription(ws);
+    }, [topicsKey, isConnected, sendSubscription]);
 
     const reconnect = useCallback(() => {
         reconnectDelayRef.current = RECONNECT_DELAY;